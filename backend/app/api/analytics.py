@@ -3,21 +3,33 @@ Analytics API Routes
 AI-powered analytics and insights
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
 from typing import List, Optional
 from pydantic import BaseModel
-from app.database import get_db
+import os
+import threading
+from app.database import get_read_db
 from app.models.price_history import PriceHistory
 from app.models.product import Product
 from app.models.competitor import Competitor
+from app.models.latest_price import LatestPrice
+from app.api.caching import cached_json
+from app.services.aggregation import category_price_index, market_insights
+from app.services.response_cache import PRICES_TAG, PRODUCTS_TAG, cache, competitor_tag
 from app.services.ollama_service import OllamaService
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 router = APIRouter()
 ollama_service = OllamaService()
 
+# Whole-catalog computations (cache misses) run at most this many at a time, so
+# they can't take over the threadpool and the GIL from light requests
+ANALYTICS_CONCURRENCY = int(os.getenv("ANALYTICS_CONCURRENCY", "2"))
+analytics_slots = threading.BoundedSemaphore(ANALYTICS_CONCURRENCY)
+
 class PricingRecommendation(BaseModel):
     recommended_price: float
     strategy: str
@@ -32,36 +44,42 @@ class MarketInsight(BaseModel):
     max_price: float
     price_trend: str  # "increasing", "decreasing", "stable"
     competitor_count: int
+    median_price: Optional[float] = None
+    trend_slope: Optional[float] = None  # fitted relative change per day, e.g. 0.01 = +1%/day; None under a day of data
+    price_volatility: Optional[float] = None  # std of log returns between observations
+    ewma_price: Optional[float] = None
+    moving_average: Optional[float] = None
+    price_position: Optional[float] = None  # percentile of base_price among competitors' latest prices
 
-@router.get("/recommendation/{product_id}", response_model=PricingRecommendation)
-async def get_pricing_recommendation(product_id: int, db: Session = Depends(get_db)):
-    """Get AI-powered pricing recommendation for a product"""
+class CategoryPriceIndex(BaseModel):
+    category: str
+    date: date
+    index: float  # 100 = first day in the window
+    series_count: int
+
+def _recommendation_inputs(db: Session, product_id: int):
     product = db.query(Product).filter(Product.id == product_id).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    # Get latest prices from all competitors
-    latest_prices = db.query(
-        PriceHistory.competitor_id,
-        func.max(PriceHistory.timestamp).label('max_timestamp')
-    ).filter(
-        PriceHistory.product_id == product_id
-    ).group_by(PriceHistory.competitor_id).all()
-    
-    competitor_prices = []
-    for comp_id, _ in latest_prices:
-        price_record = db.query(PriceHistory).filter(
-            PriceHistory.product_id == product_id,
-            PriceHistory.competitor_id == comp_id
-        ).order_by(desc(PriceHistory.timestamp)).first()
-        
-        if price_record:
-            competitor_prices.append(price_record.price)
+    # Latest price from every competitor
+    competitor_prices = [
+        price for (price,) in db.query(LatestPrice.price).filter(
+            LatestPrice.product_id == product_id
+        ).order_by(LatestPrice.competitor_id)
+    ]
     
     current_price = product.base_price or (competitor_prices[0] if competitor_prices else 0)
+    return product.name, current_price, competitor_prices
+
+@router.get("/recommendation/{product_id}", response_model=PricingRecommendation)
+async def get_pricing_recommendation(product_id: int, db: Session = Depends(get_read_db)):
+    """Get AI-powered pricing recommendation for a product"""
+    # Queries run in the threadpool; only the model call is awaited on the event loop
+    product_name, current_price, competitor_prices = await run_in_threadpool(_recommendation_inputs, db, product_id)
     
     recommendation = await ollama_service.generate_pricing_recommendation(
-        product_name=product.name,
+        product_name=product_name,
         current_price=current_price,
         competitor_prices=competitor_prices
     )
@@ -69,78 +87,55 @@ async def get_pricing_recommendation(product_id: int, db: Session = Depends(get_
     return recommendation
 
 @router.get("/insights", response_model=List[MarketInsight])
-async def get_market_insights(
+def get_market_insights(
+    request: Request,
     days: int = 30,
-    db: Session = Depends(get_db)
+    resolution: str = Query("raw", pattern="^(raw|hour|day)$"),
+    db: Session = Depends(get_read_db)
 ):
-    """Get market insights for all products"""
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    products = db.query(Product).all()
-    insights = []
+    """Get market insights for all products; hour/day resolution reads the rollup tables"""
+    def compute():
+        start_date = datetime.utcnow() - timedelta(days=days)
+        with analytics_slots:
+            return [MarketInsight(**insight) for insight in market_insights(db, start_date, resolution)]
     
-    for product in products:
-        prices = db.query(PriceHistory).filter(
-            PriceHistory.product_id == product.id,
-            PriceHistory.timestamp >= start_date
-        ).all()
-        
-        if not prices:
-            continue
-        
-        price_list = [p.price for p in prices]
-        avg_price = sum(price_list) / len(price_list)
-        min_price = min(price_list)
-        max_price = max(price_list)
-        
-        # Determine trend (simple: compare first half vs second half)
-        if len(price_list) > 10:
-            first_half = price_list[:len(price_list)//2]
-            second_half = price_list[len(price_list)//2:]
-            first_avg = sum(first_half) / len(first_half)
-            second_avg = sum(second_half) / len(second_half)
-            
-            if second_avg > first_avg * 1.05:
-                trend = "increasing"
-            elif second_avg < first_avg * 0.95:
-                trend = "decreasing"
-            else:
-                trend = "stable"
-        else:
-            trend = "stable"
-        
-        # Count unique competitors
-        competitor_ids = set([p.competitor_id for p in prices])
-        
-        insights.append(MarketInsight(
-            product_id=product.id,
-            product_name=product.name,
-            average_price=avg_price,
-            min_price=min_price,
-            max_price=max_price,
-            price_trend=trend,
-            competitor_count=len(competitor_ids)
-        ))
+    return cached_json(
+        request, "insights", {"days": days, "resolution": resolution}, [PRICES_TAG, PRODUCTS_TAG], compute
+    )
+
+@router.get("/price-index", response_model=List[CategoryPriceIndex])
+def get_category_price_index(
+    request: Request,
+    days: int = 30,
+    category: Optional[str] = None,
+    resolution: str = Query("raw", pattern="^(raw|hour|day)$"),
+    db: Session = Depends(get_read_db)
+):
+    """Daily price index per product category, relative to the start of the window"""
+    def compute():
+        start_date = datetime.utcnow() - timedelta(days=days)
+        with analytics_slots:
+            return category_price_index(db, start_date, resolution, category)
     
-    return insights
+    return cached_json(
+        request,
+        "price-index",
+        {"days": days, "category": category, "resolution": resolution},
+        [PRICES_TAG, PRODUCTS_TAG],
+        compute,
+    )
 
-@router.get("/competitor-analysis/{competitor_id}")
-async def get_competitor_analysis(competitor_id: int, db: Session = Depends(get_db)):
-    """Analyze competitor pricing strategy"""
+def _competitor_analysis(db: Session, competitor_id: int) -> dict:
     competitor = db.query(Competitor).filter(Competitor.id == competitor_id).first()
     if not competitor:
         raise HTTPException(status_code=404, detail="Competitor not found")
     
-    # Get all products tracked for this competitor
-    prices = db.query(PriceHistory).filter(
-        PriceHistory.competitor_id == competitor_id
-    ).order_by(desc(PriceHistory.timestamp)).all()
-    
-    # Group by product
-    product_prices = {}
-    for price in prices:
-        if price.product_id not in product_prices:
-            product_prices[price.product_id] = price.price
+    # Latest price of every product tracked for this competitor
+    product_prices = dict(
+        db.query(LatestPrice.product_id, LatestPrice.price).filter(
+            LatestPrice.competitor_id == competitor_id
+        ).all()
+    )
     
     if not product_prices:
         return {
@@ -167,5 +162,18 @@ async def get_competitor_analysis(competitor_id: int, db: Session = Depends(get_
         "pricing_strategy": "competitive" if promotions > len(product_prices) * 0.3 else "standard"
     }
 
+@router.get("/competitor-analysis/{competitor_id}")
+def get_competitor_analysis(competitor_id: int, request: Request, db: Session = Depends(get_read_db)):
+    """Analyze competitor pricing strategy"""
+    return cached_json(
+        request,
+        "competitor-analysis",
+        {"competitor_id": competitor_id},
+        [competitor_tag(competitor_id)],
+        lambda: _competitor_analysis(db, competitor_id),
+    )
 
-
+@router.get("/cache/stats")
+def get_cache_stats():
+    """Response and LLM cache counters, plus LLM retry/circuit breaker state (this process)"""
+    return {**cache.info(), "llm": ollama_service.cache_stats(), "llm_upstream": ollama_service.upstream_stats()}
@@ -0,0 +1,52 @@
+"""
+Cached Responses
+Serve read endpoints from the response cache with ETag / If-None-Match support
+
+Cached endpoints return the JSON body straight from the cache. Every
+response carries an ETag (hash of the body) and `Cache-Control: no-cache`,
+so browsers revalidate each time and get an empty 304 when nothing changed.
+"""
+
+import json
+from typing import Any, Callable, Dict, Iterable
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from app.services.response_cache import cache, cache_key
+
+CACHE_STATUS_HEADER = "X-Cache"
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 prescribes for If-None-Match
+    return "*" in candidates or etag in [candidate.removeprefix("W/") for candidate in candidates]
+
+
+def cached_json(
+    request: Request,
+    name: str,
+    params: Dict[str, Any],
+    tags: Iterable[str],
+    compute: Callable[[], Any],
+) -> Response:
+    """
+    Response for endpoint `name` with `params`, computing it only on a miss
+
+    `compute` returns anything jsonable_encoder accepts (e.g. pydantic
+    models); exceptions it raises (HTTPException included) are not cached.
+    """
+    key = cache_key(name, params)
+    entry = cache.get(key)
+    status = "HIT"
+    if entry is None:
+        tags = sorted(tags)
+        versions = cache.versions(tags)
+        body = json.dumps(jsonable_encoder(compute()), separators=(",", ":")).encode()
+        entry = cache.set(key, body, tags, versions)
+        status = "MISS"
+
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", CACHE_STATUS_HEADER: status}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
@@ -2,11 +2,12 @@
 Competitors API Routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from app.database import get_db
+from app.api.pagination import keyset, page
 from app.models.competitor import Competitor, CompetitorType
 from datetime import datetime
 
@@ -33,7 +34,7 @@ class CompetitorResponse(BaseModel):
         from_attributes = True
 
 @router.post("/", response_model=CompetitorResponse)
-async def create_competitor(competitor: CompetitorCreate, db: Session = Depends(get_db)):
+def create_competitor(competitor: CompetitorCreate, db: Session = Depends(get_db)):
     """Create a new competitor"""
     competitor_type = CompetitorType[competitor.type.upper()] if competitor.type else CompetitorType.ECOMMERCE
     db_competitor = Competitor(
@@ -49,9 +50,11 @@ async def create_competitor(competitor: CompetitorCreate, db: Session = Depends(
     return db_competitor
 
 @router.get("/", response_model=List[CompetitorResponse])
-async def get_competitors(
-    skip: int = Query(0, ge=0),
+def get_competitors(
+    response: Response,
+    skip: int = Query(0, ge=0, description="Deprecated: use cursor"),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     active_only: bool = Query(True),
     db: Session = Depends(get_db)
 ):
@@ -61,11 +64,13 @@ async def get_competitors(
     if active_only:
         query = query.filter(Competitor.is_active == 1)
     
-    competitors = query.offset(skip).limit(limit).all()
-    return competitors
+    query = keyset(query, [Competitor.id], cursor, limit)
+    if skip:
+        query = query.offset(skip)
+    return page(query.all(), [Competitor.id], limit, response)
 
 @router.get("/{competitor_id}", response_model=CompetitorResponse)
-async def get_competitor(competitor_id: int, db: Session = Depends(get_db)):
+def get_competitor(competitor_id: int, db: Session = Depends(get_db)):
     """Get a specific competitor by ID"""
     competitor = db.query(Competitor).filter(Competitor.id == competitor_id).first()
     if not competitor:
@@ -0,0 +1,49 @@
+"""
+Export API Routes
+Columnar downloads of price history for offline analytics
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.database import ReadSessionLocal
+from app.services import price_export
+from datetime import datetime, timedelta
+
+router = APIRouter()
+
+def _arrow_bytes(query, schema, chunk_size: int):
+    # Own session: the stream outlives the request's dependency-scoped one
+    db = ReadSessionLocal()
+    try:
+        yield from price_export.arrow_stream(db, query, schema, chunk_size)
+    finally:
+        db.close()
+
+@router.get("/prices.arrow")
+async def download_price_history_arrow(
+    product_id: Optional[int] = None,
+    days: Optional[int] = Query(None, ge=1),
+    after_id: Optional[int] = Query(None, ge=0, description="Only rows with a larger id (incremental pulls)"),
+    dimensions: bool = Query(True, description="Join product name/category/brand and competitor name"),
+    chunk_size: int = Query(price_export.EXPORT_CHUNK_SIZE, ge=1000, le=500000),
+):
+    """
+    Stream price history as an Arrow IPC stream
+    
+    Read with pyarrow.ipc.open_stream or pandas; rows are sent in id order,
+    one record batch of `chunk_size` rows at a time.
+    """
+    try:
+        price_export.require_pyarrow()
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    
+    since = datetime.utcnow() - timedelta(days=days) if days else None
+    query = price_export.export_query(after_id, product_id, since, dimensions)
+    schema = price_export.export_schema(dimensions)
+    return StreamingResponse(
+        _arrow_bytes(query, schema, chunk_size),
+        media_type=price_export.ARROW_STREAM_MEDIA_TYPE,
+        headers={"Content-Disposition": "attachment; filename=price_history.arrow"}
+    )
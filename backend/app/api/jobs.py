@@ -0,0 +1,186 @@
+"""
+Scrape Jobs API Routes
+Queue scrapes and manage recurring refresh schedules; app.worker executes them
+"""
+
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from app.database import get_db
+from app.api.pagination import keyset, page
+from app.models.product import Product
+from app.models.competitor import Competitor
+from app.models.scrape_job import ScrapeJob, JobStatus
+from app.models.scrape_schedule import ScrapeSchedule
+from app.services import job_queue, recrawl_scheduler
+from datetime import datetime
+
+router = APIRouter()
+
+class ScrapeJobCreate(BaseModel):
+    url: str
+    product_id: Optional[int] = None
+    competitor_id: Optional[int] = None
+    max_attempts: int = Field(3, ge=1, le=10)
+
+class ScrapeJobResponse(BaseModel):
+    id: int
+    url: str
+    product_id: Optional[int]
+    competitor_id: Optional[int]
+    schedule_id: Optional[int]
+    status: str
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    last_error: Optional[str]
+    price: Optional[float]
+    unchanged: Optional[int]
+    result: Optional[dict] = None
+    created_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+class ScheduleCreate(BaseModel):
+    product_id: int
+    competitor_id: int
+    url: str
+    interval_seconds: int = Field(86400, ge=60)
+    adaptive: bool = True  # let the recrawl scheduler manage interval_seconds
+
+class ScheduleResponse(BaseModel):
+    id: int
+    product_id: int
+    competitor_id: int
+    url: str
+    interval_seconds: int
+    next_run_at: datetime
+    is_active: int
+    is_adaptive: Optional[int]
+    change_rate: Optional[float]
+
+    class Config:
+        from_attributes = True
+
+def _job_response(job: ScrapeJob) -> ScrapeJobResponse:
+    return ScrapeJobResponse(
+        id=job.id,
+        url=job.url,
+        product_id=job.product_id,
+        competitor_id=job.competitor_id,
+        schedule_id=job.schedule_id,
+        status=job.status.value,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        run_at=job.run_at,
+        last_error=job.last_error,
+        price=job.price,
+        unchanged=job.unchanged,
+        result=json.loads(job.result) if job.result else None,
+        created_at=job.created_at,
+        finished_at=job.finished_at
+    )
+
+def _check_product_competitor(db: Session, product_id: Optional[int], competitor_id: Optional[int]):
+    if product_id and not db.query(Product.id).filter(Product.id == product_id).first():
+        raise HTTPException(status_code=404, detail="Product not found")
+    if competitor_id and not db.query(Competitor.id).filter(Competitor.id == competitor_id).first():
+        raise HTTPException(status_code=404, detail="Competitor not found")
+
+@router.post("/scrape", response_model=ScrapeJobResponse, status_code=202)
+def enqueue_scrape(request: ScrapeJobCreate, db: Session = Depends(get_db)):
+    """Queue a scrape and return its job id immediately"""
+    _check_product_competitor(db, request.product_id, request.competitor_id)
+    job = job_queue.enqueue(
+        db,
+        url=request.url,
+        product_id=request.product_id,
+        competitor_id=request.competitor_id,
+        max_attempts=request.max_attempts
+    )
+    return _job_response(job)
+
+@router.get("/", response_model=List[ScrapeJobResponse])
+def list_jobs(
+    response: Response,
+    status: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    db: Session = Depends(get_db)
+):
+    """List jobs newest first, optionally filtered by status"""
+    query = db.query(ScrapeJob)
+    if status:
+        try:
+            query = query.filter(ScrapeJob.status == JobStatus(status))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Unknown status: {status}")
+    jobs = keyset(query, [ScrapeJob.id], cursor, limit, descending=True).all()
+    return [_job_response(job) for job in page(jobs, [ScrapeJob.id], limit, response)]
+
+@router.post("/schedules", response_model=ScheduleResponse)
+def create_schedule(schedule: ScheduleCreate, db: Session = Depends(get_db)):
+    """Create or update the recurring refresh for a (product, competitor) pair"""
+    _check_product_competitor(db, schedule.product_id, schedule.competitor_id)
+    db_schedule = db.query(ScrapeSchedule).filter(
+        ScrapeSchedule.product_id == schedule.product_id,
+        ScrapeSchedule.competitor_id == schedule.competitor_id
+    ).first()
+    if db_schedule is None:
+        db_schedule = ScrapeSchedule(
+            product_id=schedule.product_id,
+            competitor_id=schedule.competitor_id,
+            next_run_at=datetime.utcnow()
+        )
+        db.add(db_schedule)
+    db_schedule.url = schedule.url
+    db_schedule.interval_seconds = schedule.interval_seconds
+    db_schedule.is_adaptive = 1 if schedule.adaptive else 0
+    db_schedule.is_active = 1
+    db.commit()
+    db.refresh(db_schedule)
+    return db_schedule
+
+@router.get("/schedules", response_model=List[ScheduleResponse])
+def list_schedules(
+    response: Response,
+    active_only: bool = Query(True),
+    limit: Optional[int] = Query(None, ge=1, le=10000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    db: Session = Depends(get_db)
+):
+    """List recurring refresh schedules (all of them unless `limit` is given)"""
+    query = db.query(ScrapeSchedule)
+    if active_only:
+        query = query.filter(ScrapeSchedule.is_active == 1)
+    schedules = keyset(query, [ScrapeSchedule.id], cursor, limit).all()
+    return page(schedules, [ScrapeSchedule.id], limit, response)
+
+@router.get("/schedules/metrics")
+def get_schedule_metrics(db: Session = Depends(get_db)):
+    """Planned requests vs expected freshness and detected changes, plus the last 24h actuals"""
+    return recrawl_scheduler.schedule_metrics(db)
+
+@router.post("/schedules/rebalance")
+def rebalance_schedules(budget_per_day: float = Query(..., gt=0), db: Session = Depends(get_db)):
+    """Re-estimate price volatility and spread `budget_per_day` fetches across adaptive schedules"""
+    return recrawl_scheduler.rebalance(db, budget_per_day)
+
+@router.delete("/schedules/{schedule_id}")
+def delete_schedule(schedule_id: int, db: Session = Depends(get_db)):
+    """Stop a recurring refresh"""
+    schedule = db.query(ScrapeSchedule).filter(ScrapeSchedule.id == schedule_id).first()
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    schedule.is_active = 0
+    db.commit()
+    return {"message": "Schedule deactivated"}
+
+@router.get("/{job_id}", response_model=ScrapeJobResponse)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    """Get job status and result"""
+    job = db.query(ScrapeJob).filter(ScrapeJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
@@ -0,0 +1,111 @@
+"""
+Keyset Pagination
+Opaque cursors over (column, ..., id) sort keys for list endpoints, and NDJSON streaming
+
+A page is fetched with `WHERE key > cursor ORDER BY key LIMIT n + 1`, so
+page N costs the same as page 1 (unlike OFFSET). The cursor for the next
+page is returned in the `X-Next-Cursor` response header; it is absent on
+the last page.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+from fastapi import HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_
+from sqlalchemy.types import DateTime
+from app.database import ReadSessionLocal
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+STREAM_BATCH_SIZE = 1000
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    """Cursor -> key values typed like `columns`; 400 on anything malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("wrong number of key values")
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+            for column, value in zip(columns, values)
+        ]
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+
+def _after(columns: Sequence, values: Sequence[Any], descending: bool):
+    """(c1, c2, ...) > (v1, v2, ...) lexicographically, spelled out so each value binds with its column type"""
+    clauses = []
+    for index, column in enumerate(columns):
+        beyond = column < values[index] if descending else column > values[index]
+        clauses.append(and_(*[columns[i] == values[i] for i in range(index)], beyond))
+    return or_(*clauses)
+
+
+def keyset(query, columns: Sequence, cursor: Optional[str], limit: Optional[int], descending: bool = False):
+    """
+    Order `query` by `columns` (last one must be unique, e.g. id), start
+    after `cursor`, and fetch one extra row to detect a next page
+
+    Works for ORM queries and Core selects alike.
+    """
+    if cursor:
+        query = query.where(_after(columns, decode_cursor(cursor, columns), descending))
+    query = query.order_by(*[column.desc() if descending else column for column in columns])
+    if limit is not None:
+        query = query.limit(limit + 1)
+    return query
+
+
+def page(items: List[Any], columns: Sequence, limit: Optional[int], response: Response) -> List[Any]:
+    """Trim the look-ahead row and set the next-page cursor header"""
+    if limit is None or len(items) <= limit:
+        return items
+    items = items[:limit]
+    last = items[-1]
+    key = (lambda column: last[column.key]) if isinstance(last, dict) else (lambda column: getattr(last, column.key))
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor([key(column) for column in columns])
+    return items
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _ndjson_lines(
+    statement,
+    decorate: Optional[Callable[[Any, List[Dict[str, Any]]], List[Dict[str, Any]]]],
+    batch_size: int,
+) -> Iterator[bytes]:
+    # Own session: the generator outlives the request's dependency-scoped one
+    db = ReadSessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=batch_size))
+        for rows in result.mappings().partitions():
+            rows = [dict(row) for row in rows]
+            if decorate is not None:
+                rows = decorate(db, rows)
+            yield b"".join(json.dumps(row, default=_json_default).encode() + b"\n" for row in rows)
+    finally:
+        db.close()
+
+
+def ndjson_response(statement, decorate=None, batch_size: int = STREAM_BATCH_SIZE) -> StreamingResponse:
+    """
+    Stream a Core select as NDJSON from a server-side cursor
+
+    Rows are fetched `batch_size` at a time (optionally passed through
+    `decorate(db, rows)`), so memory stays constant however many rows match.
+    """
+    return StreamingResponse(_ndjson_lines(statement, decorate, batch_size), media_type="application/x-ndjson")
@@ -2,15 +2,23 @@
 Price History API Routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List, Optional
+from sqlalchemy import desc, select
+from typing import List, Optional, Union
 from pydantic import BaseModel
 from app.database import get_db
+from app.api.pagination import keyset, ndjson_response, page
 from app.models.price_history import PriceHistory
 from app.models.product import Product
 from app.models.competitor import Competitor
+from app.models.latest_price import LatestPrice
+from app.services.price_ingest import DEFAULT_BATCH_SIZE, PriceIngestor, decoder_for
+from app.services.aggregation import BUCKET_KEY, price_bucket_query, price_stats
+from app.services.names import attach_names
+from app.services.price_store import record_price
+from app.services.write_queue import run_write
 from datetime import datetime, timedelta
 
 router = APIRouter()
@@ -25,6 +33,10 @@ class PriceHistoryCreate(BaseModel):
     discount_percentage: Optional[float] = None
     promotion_active: Optional[int] = 0
 
+class BulkPriceRow(PriceHistoryCreate):
+    """One observation in a bulk feed; timestamp defaults to ingestion time"""
+    timestamp: Optional[datetime] = None
+
 class PriceHistoryResponse(BaseModel):
     id: int
     product_id: int
@@ -42,8 +54,29 @@ class PriceHistoryResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class PriceBucketResponse(BaseModel):
+    """Hourly or daily OHLC bucket, returned for hour/day resolution"""
+    product_id: int
+    competitor_id: int
+    resolution: str
+    bucket_start: datetime
+    open_price: float
+    high_price: float
+    low_price: float
+    close_price: float
+    average_price: float
+    price_count: int
+    promo_count: int
+    out_of_stock_count: int
+    product_name: Optional[str] = None
+    competitor_name: Optional[str] = None
+
+RESOLUTION_PATTERN = "^(raw|hour|day)$"
+# Unique sort key for paging through a product's history
+HISTORY_KEY = (PriceHistory.timestamp, PriceHistory.id)
+
 @router.post("/", response_model=PriceHistoryResponse)
-async def create_price_history(price: PriceHistoryCreate, db: Session = Depends(get_db)):
+def create_price_history(price: PriceHistoryCreate, db: Session = Depends(get_db)):
     """Record a new price"""
     # Verify product and competitor exist
     product = db.query(Product).filter(Product.id == price.product_id).first()
@@ -54,103 +87,132 @@ async def create_price_history(price: PriceHistoryCreate, db: Session = Depends(
     if not competitor:
         raise HTTPException(status_code=404, detail="Competitor not found")
     
-    db_price = PriceHistory(**price.dict())
-    db.add(db_price)
-    db.commit()
-    db.refresh(db_price)
+    response = run_write(db, lambda session: PriceHistoryResponse.from_orm(
+        record_price(session, PriceHistory(**price.dict()))
+    ))
     
     # Add product and competitor names
-    response = PriceHistoryResponse.from_orm(db_price)
     response.product_name = product.name
     response.competitor_name = competitor.name
     return response
 
-@router.get("/product/{product_id}", response_model=List[PriceHistoryResponse])
-async def get_product_price_history(
+@router.post("/bulk")
+async def bulk_ingest_prices(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv|json)$"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=100000),
+    db: Session = Depends(get_db)
+):
+    """
+    Load many prices from a streamed NDJSON, CSV or JSON-array body
+    
+    The format comes from `format` or the Content-Type header. Rows are
+    inserted in transactions of `batch_size`; invalid rows are reported
+    by record number and skipped. Latest prices and rollups catch up every
+    100,000 rows and when the feed ends.
+    """
+    try:
+        decoder = decoder_for(format, request.headers.get("content-type"))
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+    ingestor = await run_in_threadpool(PriceIngestor, db, decoder, BulkPriceRow, batch_size)
+    try:
+        async for chunk in request.stream():
+            if chunk:
+                # Decoding, validation and inserts are CPU/disk bound; keep them off the event loop
+                await run_in_threadpool(ingestor.feed, chunk)
+        return await run_in_threadpool(ingestor.close)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"error": str(e), **ingestor.summary()})
+    finally:
+        # Committed batches still owe their latest prices and rollups if the feed stopped early
+        await run_in_threadpool(ingestor.merge)
+
+@router.get("/product/{product_id}", response_model=Union[List[PriceHistoryResponse], List[PriceBucketResponse]])
+def get_product_price_history(
+    response: Response,
     product_id: int,
     days: Optional[int] = Query(30, ge=1, le=365),
     competitor_id: Optional[int] = None,
+    resolution: str = Query("raw", pattern=RESOLUTION_PATTERN),
+    limit: Optional[int] = Query(None, ge=1, le=10000, description="Page size; all rows when omitted"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
     db: Session = Depends(get_db)
 ):
-    """Get price history for a product"""
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    query = db.query(PriceHistory).filter(
-        PriceHistory.product_id == product_id,
-        PriceHistory.timestamp >= start_date
-    )
+    """
+    Get price history for a product, newest first: every observation, or hourly/daily OHLC buckets
     
-    if competitor_id:
-        query = query.filter(PriceHistory.competitor_id == competitor_id)
+    Page with `limit` + `cursor`, or use format=ndjson to stream every
+    matching row from a server-side cursor.
+    """
+    start_date = datetime.utcnow() - timedelta(days=days)
     
-    prices = query.order_by(desc(PriceHistory.timestamp)).all()
+    if resolution == "raw":
+        query = select(PriceHistory.__table__).where(
+            PriceHistory.product_id == product_id,
+            PriceHistory.timestamp >= start_date
+        )
+        if competitor_id:
+            query = query.where(PriceHistory.competitor_id == competitor_id)
+        key = HISTORY_KEY
+    else:
+        query = price_bucket_query(product_id, start_date, resolution, competitor_id)
+        key = BUCKET_KEY
     
-    # Add product and competitor names
-    product = db.query(Product).filter(Product.id == product_id).first()
-    result = []
-    for price in prices:
-        competitor = db.query(Competitor).filter(Competitor.id == price.competitor_id).first()
-        response = PriceHistoryResponse.from_orm(price)
-        response.product_name = product.name if product else None
-        response.competitor_name = competitor.name if competitor else None
-        result.append(response)
+    if format == "ndjson":
+        query = keyset(query, key, cursor, None, descending=True)
+        return ndjson_response(query.limit(limit) if limit else query, attach_names)
     
-    return result
+    # Plain row dicts, not ORM objects; names come from one lookup per table
+    rows = [dict(row._mapping) for row in db.execute(keyset(query, key, cursor, limit, descending=True))]
+    return attach_names(db, page(rows, key, limit, response))
 
 @router.get("/compare", response_model=List[PriceHistoryResponse])
-async def compare_prices(
+def compare_prices(
     product_id: int,
     db: Session = Depends(get_db)
 ):
     """Get current prices from all competitors for a product"""
-    # Get latest price from each competitor
-    latest_prices = db.query(PriceHistory).filter(
-        PriceHistory.product_id == product_id
+    latest_prices = db.query(LatestPrice).filter(
+        LatestPrice.product_id == product_id
     ).order_by(
-        desc(PriceHistory.timestamp)
+        desc(LatestPrice.timestamp)
     ).all()
     
-    # Group by competitor and get latest
-    competitor_latest = {}
-    for price in latest_prices:
-        if price.competitor_id not in competitor_latest:
-            competitor_latest[price.competitor_id] = price
-    
-    result = []
-    product = db.query(Product).filter(Product.id == product_id).first()
-    for competitor_id, price in competitor_latest.items():
-        competitor = db.query(Competitor).filter(Competitor.id == competitor_id).first()
-        response = PriceHistoryResponse.from_orm(price)
-        response.product_name = product.name if product else None
-        response.competitor_name = competitor.name if competitor else None
-        result.append(response)
-    
-    return result
+    return attach_names(db, [
+        {
+            "id": latest.price_history_id,
+            "product_id": latest.product_id,
+            "competitor_id": latest.competitor_id,
+            "price": latest.price,
+            "currency": latest.currency,
+            "availability": latest.availability,
+            "sale_price": latest.sale_price,
+            "discount_percentage": latest.discount_percentage,
+            "promotion_active": latest.promotion_active,
+            "timestamp": latest.timestamp,
+        }
+        for latest in latest_prices
+    ])
 
 @router.get("/stats/{product_id}")
-async def get_price_stats(product_id: int, days: int = Query(30, ge=1), db: Session = Depends(get_db)):
+def get_price_stats(
+    product_id: int,
+    days: int = Query(30, ge=1),
+    resolution: str = Query("raw", pattern=RESOLUTION_PATTERN),
+    db: Session = Depends(get_db)
+):
     """Get price statistics for a product"""
     start_date = datetime.utcnow() - timedelta(days=days)
     
-    prices = db.query(PriceHistory).filter(
-        PriceHistory.product_id == product_id,
-        PriceHistory.timestamp >= start_date
-    ).all()
-    
-    if not prices:
+    stats = price_stats(db, product_id, start_date, resolution)
+    if stats is None:
         return {"error": "No price data found"}
     
-    price_list = [p.price for p in prices]
-    
     return {
         "product_id": product_id,
         "period_days": days,
-        "average_price": sum(price_list) / len(price_list),
-        "min_price": min(price_list),
-        "max_price": max(price_list),
-        "price_count": len(price_list),
-        "price_range": max(price_list) - min(price_list)
+        **stats
     }
-
-
-
@@ -2,12 +2,16 @@
 Products API Routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from app.database import get_db
+from app.api.pagination import keyset, page
 from app.models.product import Product
+from app.services.product_matcher import MIN_SCORE, match_titles, matcher_cache
+from app.services.product_search import search_filter, search_products
+from app.services.response_cache import PRODUCTS_TAG, invalidate_on_commit, product_tag
 from datetime import datetime
 
 router = APIRouter()
@@ -36,22 +40,47 @@ class ProductResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ProductSearchResult(ProductResponse):
+    score: float
+    name_highlight: str
+    snippet: Optional[str]
+
+class MatchRequest(BaseModel):
+    titles: List[str] = Field(..., min_length=1, max_length=1000)
+    limit: int = Field(5, ge=1, le=50)
+    min_score: float = Field(MIN_SCORE, ge=0, le=1)
+
+class MatchCandidate(BaseModel):
+    product_id: int
+    name: str
+    brand: Optional[str]
+    sku: Optional[str]
+    score: float
+    matched_on: str  # "sku", "gtin" or "title"
+
+class ListingMatches(BaseModel):
+    title: str
+    candidates: List[MatchCandidate]
+
 @router.post("/", response_model=ProductResponse)
-async def create_product(product: ProductCreate, db: Session = Depends(get_db)):
+def create_product(product: ProductCreate, db: Session = Depends(get_db)):
     """Create a new product"""
     db_product = Product(**product.dict())
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
+    matcher_cache.invalidate()
     return db_product
 
 @router.get("/", response_model=List[ProductResponse])
-async def get_products(
-    skip: int = Query(0, ge=0),
+def get_products(
+    response: Response,
+    skip: int = Query(0, ge=0, description="Deprecated: use cursor"),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     category: Optional[str] = None,
     brand: Optional[str] = None,
-    search: Optional[str] = None,
+    search: Optional[str] = Query(None, description="Full-text filter (prefix match on name, brand, description, sku)"),
     db: Session = Depends(get_db)
 ):
     """Get list of products with filtering"""
@@ -62,13 +91,43 @@ async def get_products(
     if brand:
         query = query.filter(Product.brand == brand)
     if search:
-        query = query.filter(Product.name.contains(search))
+        query = query.filter(search_filter(db, search))
+    
+    query = keyset(query, [Product.id], cursor, limit)
+    if skip:
+        query = query.offset(skip)
+    return page(query.all(), [Product.id], limit, response)
+
+@router.get("/search", response_model=List[ProductSearchResult])
+def search_catalog(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    category: Optional[str] = None,
+    brand: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Full-text product search over name, brand, description and sku, best match first
+    
+    Every term matches as a prefix. Matched terms are wrapped in <mark> in
+    name_highlight and in the description snippet.
+    """
+    return search_products(db, q, limit, category, brand)
+
+@router.post("/match", response_model=List[ListingMatches])
+def match_listings(request: MatchRequest, db: Session = Depends(get_db)):
+    """
+    Link scraped listing titles to catalog products, best candidate first
     
-    products = query.offset(skip).limit(limit).all()
-    return products
+    A SKU or GTIN from the catalog found in a title scores 1.0
+    (matched_on "sku"/"gtin"); otherwise candidates are scored 0 .. 1 on
+    title similarity. The first call builds the match index.
+    """
+    matches = match_titles(db, request.titles, request.limit, request.min_score)
+    return [ListingMatches(title=title, candidates=candidates) for title, candidates in zip(request.titles, matches)]
 
 @router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(product_id: int, db: Session = Depends(get_db)):
+def get_product(product_id: int, db: Session = Depends(get_db)):
     """Get a specific product by ID"""
     product = db.query(Product).filter(Product.id == product_id).first()
     if not product:
@@ -76,7 +135,7 @@ async def get_product(product_id: int, db: Session = Depends(get_db)):
     return product
 
 @router.put("/{product_id}", response_model=ProductResponse)
-async def update_product(
+def update_product(
     product_id: int,
     product: ProductCreate,
     db: Session = Depends(get_db)
@@ -89,19 +148,23 @@ async def update_product(
     for key, value in product.dict().items():
         setattr(db_product, key, value)
     
+    invalidate_on_commit(db, [product_tag(product_id), PRODUCTS_TAG])
     db.commit()
     db.refresh(db_product)
+    matcher_cache.invalidate()
     return db_product
 
 @router.delete("/{product_id}")
-async def delete_product(product_id: int, db: Session = Depends(get_db)):
+def delete_product(product_id: int, db: Session = Depends(get_db)):
     """Delete a product"""
     db_product = db.query(Product).filter(Product.id == product_id).first()
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
     
     db.delete(db_product)
+    invalidate_on_commit(db, [product_tag(product_id), PRODUCTS_TAG])
     db.commit()
+    matcher_cache.invalidate()
     return {"message": "Product deleted successfully"}
 
 
@@ -4,15 +4,17 @@ Web scraping endpoints for price collection
 """
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from app.database import get_db
 from app.services.scraper import PriceScraper
+from app.services.price_store import record_scraped_page
+from app.services.product_matcher import match_titles
+from app.services.write_queue import run_write
 from app.models.product import Product
 from app.models.competitor import Competitor
-from app.models.price_history import PriceHistory
-from datetime import datetime
 
 router = APIRouter()
 scraper = PriceScraper()
@@ -27,37 +29,61 @@ class ScrapeResponse(BaseModel):
     price: Optional[float]
     product_info: dict
     success: bool
+    sale_price: Optional[float] = None
+    currency: Optional[str] = None
+    availability: Optional[int] = None
+    unchanged: bool = False
+    # Catalog products the page title matches, when no product_id was given
+    matches: List[dict] = []
+
+# The helpers below run in the threadpool so queries don't block the event loop
+
+def _check_product_competitor(db: Session, product_id: int, competitor_id: int) -> None:
+    product = db.query(Product).filter(Product.id == product_id).first()
+    competitor = db.query(Competitor).filter(Competitor.id == competitor_id).first()
+    
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if not competitor:
+        raise HTTPException(status_code=404, detail="Competitor not found")
+
+def _save_scraped(db: Session, page, product_id: int, competitor_id: int) -> bool:
+    """Record the scraped price; False if it matches what was last recorded"""
+    return run_write(db, lambda session: record_scraped_page(session, page, product_id, competitor_id) is not None)
+
+def _save_if_known(db: Session, page, product_id: int, competitor_id: int) -> None:
+    product = db.query(Product).filter(Product.id == product_id).first()
+    competitor = db.query(Competitor).filter(Competitor.id == competitor_id).first()
+    
+    if product and competitor:
+        _save_scraped(db, page, product_id, competitor_id)
+
+def _match_page(db: Session, page) -> List[dict]:
+    return match_titles(db, [page.title])[0] if page.title else []
 
 @router.post("/scrape", response_model=ScrapeResponse)
 async def scrape_price_endpoint(request: ScrapeRequest, db: Session = Depends(get_db)):
     """Scrape price from a URL"""
     try:
-        # Scrape price
-        price = scraper.scrape_price(request.url)
-        
-        # Get product info
-        product_info = scraper.get_product_info(request.url)
+        # One fetch + one parse for price and product info; blocking I/O stays off the event loop
+        page = await run_in_threadpool(scraper.scrape_page, request.url)
+        price = page.price
         
         # If product_id and competitor_id provided, save to database
         if request.product_id and request.competitor_id and price:
-            product = db.query(Product).filter(Product.id == request.product_id).first()
-            competitor = db.query(Competitor).filter(Competitor.id == request.competitor_id).first()
-            
-            if product and competitor:
-                price_history = PriceHistory(
-                    product_id=request.product_id,
-                    competitor_id=request.competitor_id,
-                    price=price,
-                    timestamp=datetime.utcnow()
-                )
-                db.add(price_history)
-                db.commit()
+            await run_in_threadpool(_save_if_known, db, page, request.product_id, request.competitor_id)
+        matches = [] if request.product_id else await run_in_threadpool(_match_page, db, page)
         
         return ScrapeResponse(
             url=request.url,
             price=price,
-            product_info=product_info,
-            success=price is not None
+            product_info=page.product_info(),
+            success=price is not None,
+            sale_price=page.sale_price,
+            currency=page.currency,
+            availability=page.availability,
+            unchanged=page.unchanged,
+            matches=matches
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Scraping error: {str(e)}")
@@ -69,34 +95,30 @@ async def scrape_and_save(
     competitor_id: int,
     db: Session = Depends(get_db)
 ):
-    """Scrape price and automatically save to database"""
-    product = db.query(Product).filter(Product.id == product_id).first()
-    competitor = db.query(Competitor).filter(Competitor.id == competitor_id).first()
-    
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    if not competitor:
-        raise HTTPException(status_code=404, detail="Competitor not found")
+    """Scrape price and automatically save to database (synchronous; see /api/jobs/scrape for queued scraping)"""
+    await run_in_threadpool(_check_product_competitor, db, product_id, competitor_id)
     
-    price = scraper.scrape_price(url)
+    page = await run_in_threadpool(scraper.scrape_page, url)
+    price = page.price
     
     if not price:
         raise HTTPException(status_code=400, detail="Could not extract price from URL")
     
-    price_history = PriceHistory(
-        product_id=product_id,
-        competitor_id=competitor_id,
-        price=price,
-        timestamp=datetime.utcnow()
-    )
-    db.add(price_history)
-    db.commit()
+    if not await run_in_threadpool(_save_scraped, db, page, product_id, competitor_id):
+        return {
+            "message": "Price unchanged since last scrape",
+            "price": price,
+            "product_id": product_id,
+            "competitor_id": competitor_id,
+            "unchanged": True
+        }
     
     return {
         "message": "Price scraped and saved successfully",
         "price": price,
         "product_id": product_id,
-        "competitor_id": competitor_id
+        "competitor_id": competitor_id,
+        "unchanged": False
     }
 
 
@@ -3,7 +3,10 @@ Database Configuration
 SQLite for free database (can migrate to PostgreSQL later)
 """
 
-from sqlalchemy import create_engine
+from datetime import datetime
+from operator import itemgetter
+from sqlalchemy import DateTime, create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -17,22 +20,149 @@ DATABASE_URL = os.getenv(
     "sqlite:///./pricing_intelligence.db"
 )
 
-# Create engine with SQLite-specific settings
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL, 
-        connect_args={"check_same_thread": False},
-        echo=False
-    )
-else:
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# Sync route handlers run in a threadpool of this size (see main.py); the
+# connection pool matches it so threads don't queue for a connection
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+
+# SQLite production profile (SQLITE_PROFILE=production, the default; "off"
+# keeps SQLite's defaults): WAL so readers and the writer don't block each
+# other, fsync at checkpoints rather than every commit, a 64 MB page cache,
+# memory-mapped reads and a busy timeout instead of instant "database is
+# locked". Analytics read through a separate query_only engine, and price
+# writes go through the group-commit writer in app/services/write_queue.py,
+# whose own engine keeps synchronous=FULL: it commits once per group, so
+# fsyncing every commit costs little and acknowledged price writes survive
+# a power loss.
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,  # negative = KiB
+    "mmap_size": 256 * 1024 * 1024,
+    "busy_timeout": 5000,  # ms
+    "temp_store": "MEMORY",
+}
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+IN_MEMORY = IS_SQLITE and (DATABASE_URL in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in DATABASE_URL)
+SQLITE_PRODUCTION = IS_SQLITE and not IN_MEMORY and SQLITE_PROFILE == "production"
+
+
+def _apply_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+    return on_connect
+
+
+def _create_engine(pragmas=None):
+    # Create engine with SQLite-specific settings
+    if IS_SQLITE:
+        new_engine = create_engine(
+            DATABASE_URL, 
+            connect_args={"check_same_thread": False},
+            pool_size=THREADPOOL_SIZE,
+            echo=False
+        )
+        if pragmas:
+            event.listen(new_engine, "connect", _apply_pragmas(pragmas))
+        return new_engine
+    return create_engine(DATABASE_URL, pool_pre_ping=True, pool_size=THREADPOOL_SIZE)
+
+
+engine = _create_engine(SQLITE_PRAGMAS if SQLITE_PRODUCTION else None)
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read-only sessions for analytics and exports (same engine unless the profile is on)
+if SQLITE_PRODUCTION:
+    read_engine = _create_engine({**SQLITE_PRAGMAS, "query_only": "ON"})
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+else:
+    read_engine = engine
+    ReadSessionLocal = SessionLocal
+
+# Sessions for the group-commit writer (same engine unless the profile is on)
+if SQLITE_PRODUCTION:
+    write_engine = _create_engine({**SQLITE_PRAGMAS, "synchronous": "FULL"})
+    WriteSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=write_engine)
+else:
+    write_engine = engine
+    WriteSessionLocal = SessionLocal
+
 # Base class for models
 Base = declarative_base()
 
+# Below this many rows executemany_rows() leaves parameter handling to SQLAlchemy
+EXECUTEMANY_MIN_ROWS = 100
+
+def upsert_insert(db):
+    """INSERT construct supporting on_conflict_do_update for the session's database"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"Upserts are not implemented for {dialect}")
+
+def executemany_rows(connection, statement, rows):
+    """
+    Execute an INSERT (or upsert) for many rows, handing the driver plain tuples
+
+    Connection.execute() runs SQLAlchemy's parameter processing for every
+    row, which costs more than SQLite's own insert for wide bulk writes. The
+    statement is compiled once for the keys of rows[0], so every row must
+    carry every column (Python-side column defaults are not applied). On
+    SQLite, datetimes are rendered as the text SQLAlchemy's DateTime stores
+    (naive, so any UTC offset is dropped); other drivers bind them natively.
+    Small writes go through Connection.execute(), whose compiled-statement
+    cache beats compiling here.
+    """
+    if not rows:
+        return
+    if len(rows) < EXECUTEMANY_MIN_ROWS:
+        connection.execute(statement, rows)
+        return
+    compiled = statement.compile(dialect=connection.dialect, column_keys=list(rows[0]))
+    keys = compiled.positiontup
+    if keys is None:
+        # Named paramstyle (psycopg2): the driver reads each row's dict
+        connection.exec_driver_sql(str(compiled), rows)
+        return
+    values = itemgetter(*keys) if len(keys) > 1 else (lambda row: (row[keys[0]],))
+    params = [values(row) for row in rows]
+    if connection.dialect.name == "sqlite":
+        dates = [index for index, key in enumerate(keys) if isinstance(compiled.binds[key].type, DateTime)]
+        if dates:
+            params = [_sqlite_dates(row, dates) for row in params]
+    connection.exec_driver_sql(str(compiled), params)
+
+def _sqlite_dates(row, dates):
+    row = list(row)
+    for index in dates:
+        value = row[index]
+        if isinstance(value, datetime):
+            row[index] = value.isoformat(" ", "microseconds")[:26]
+    return tuple(row)
+
+def refresh_planner_stats():
+    """
+    ANALYZE, so SQLite picks between composite indexes by selectivity
+
+    Without statistics the planner guesses, e.g. it serves a (product,
+    competitor) history filter from the per-competitor index. A full pass
+    takes ~0.3s per million price rows; sampling (analysis_limit) only reads
+    the first entries of each index and gets the competitor index badly
+    wrong. PostgreSQL's autovacuum keeps its own statistics.
+    """
+    if not IS_SQLITE:
+        return
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+
 # Dependency for FastAPI
 def get_db():
     db = SessionLocal()
@@ -41,3 +171,11 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    """Session on read-only connections, for endpoints that never write"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
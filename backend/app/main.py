@@ -3,11 +3,13 @@ FastAPI Main Application
 Pricing Intelligence Platform Backend
 """
 
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import os
 from dotenv import load_dotenv
+from app.database import THREADPOOL_SIZE, refresh_planner_stats
 
 load_dotenv()
 
@@ -40,13 +42,40 @@ async def health_check():
     return {"status": "healthy", "service": "pricing-intelligence-api"}
 
 # Import routers
-from app.api import products, competitors, prices, analytics, scraping
+from app.api import products, competitors, prices, analytics, scraping, jobs, exports
+from app.services import product_matcher, write_queue
 
 app.include_router(products.router, prefix="/api/products", tags=["products"])
 app.include_router(competitors.router, prefix="/api/competitors", tags=["competitors"])
 app.include_router(prices.router, prefix="/api/prices", tags=["prices"])
 app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
 app.include_router(scraping.router, prefix="/api/scraping", tags=["scraping"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
+app.include_router(exports.router, prefix="/api/exports", tags=["exports"])
+
+# Sync handlers (all database access) run in the default anyio threadpool
+@app.on_event("startup")
+async def size_threadpool():
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+# Fresh SQLite planner statistics, so queries pick the most selective index
+@app.on_event("startup")
+def analyze_database():
+    refresh_planner_stats()
+
+# Build the product match index in the background, so no request waits for it
+@app.on_event("startup")
+def warm_match_index():
+    product_matcher.matcher_cache.warm()
+
+@app.on_event("shutdown")
+async def close_ollama_client():
+    await analytics.ollama_service.aclose()
+
+@app.on_event("shutdown")
+def drain_write_queue():
+    if write_queue.writer is not None:
+        write_queue.writer.close()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,27 @@
+"""
+Latest Price Model - Current price per (product, competitor)
+Maintained by app.services.price_store on every PriceHistory insert
+"""
+
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Index
+from app.database import Base
+
+class LatestPrice(Base):
+    __tablename__ = "latest_prices"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    competitor_id = Column(Integer, ForeignKey("competitors.id"), primary_key=True)
+    price_history_id = Column(Integer, ForeignKey("price_history.id"), nullable=False)
+    price = Column(Float, nullable=False)
+    currency = Column(String(3), default="USD")
+    availability = Column(Integer, default=1)
+    sale_price = Column(Float, nullable=True)
+    discount_percentage = Column(Float, nullable=True)
+    promotion_active = Column(Integer, default=0)
+    timestamp = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        # Covering indexes: latest price(s) by product or pair, and by competitor
+        Index('idx_latest_prices_product_price', 'product_id', 'competitor_id', 'price'),
+        Index('idx_latest_prices_competitor_price', 'competitor_id', 'product_id', 'price'),
+    )
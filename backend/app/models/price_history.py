@@ -3,7 +3,7 @@ Price History Model - TimescaleDB Hypertable
 Stores historical price data for time-series analysis
 """
 
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -11,9 +11,9 @@ from app.database import Base
 class PriceHistory(Base):
     __tablename__ = "price_history"
 
-    id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
-    competitor_id = Column(Integer, ForeignKey("competitors.id"), nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    competitor_id = Column(Integer, ForeignKey("competitors.id"), nullable=False)
     price = Column(Float, nullable=False)
     currency = Column(String(3), default="USD")
     availability = Column(Integer, default=1)  # 1 = in stock, 0 = out of stock
@@ -24,9 +24,20 @@ class PriceHistory(Base):
     discount_percentage = Column(Float, nullable=True)
     promotion_active = Column(Integer, default=0)
 
-    # Composite index for efficient time-series queries
+    # Every insert updates each index, so keep only what endpoint queries use
+    # (benchmarks/query_plan_check.py fails if one falls back to a full scan).
+    # The timestamp index serves whole-catalog windows (insights, exports).
     __table_args__ = (
-        Index('idx_product_competitor_time', 'product_id', 'competitor_id', 'timestamp'),
+        # Product history and stats; includes price so stats never touch the table
+        Index('idx_price_history_product_time', 'product_id', 'timestamp', 'price'),
+        # Per-competitor queries and competitor foreign key lookups
+        Index('idx_price_history_competitor_time', 'competitor_id', 'timestamp'),
+        # Promotions are a small fraction of rows; count them without scanning the rest
+        Index(
+            'idx_price_history_active_promotions', 'competitor_id',
+            sqlite_where=text('promotion_active = 1'),
+            postgresql_where=text('promotion_active = 1'),
+        ),
     )
 
     # Relationships
@@ -0,0 +1,32 @@
+"""
+Price Rollup Model - Hourly and daily OHLC buckets per (product, competitor)
+Maintained incrementally by app.services.rollups as prices are recorded
+"""
+
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Index
+from app.database import Base
+
+class PriceRollup(Base):
+    __tablename__ = "price_rollups"
+
+    resolution = Column(String(8), primary_key=True)  # "hour" or "day"
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    competitor_id = Column(Integer, ForeignKey("competitors.id"), primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+
+    open_price = Column(Float, nullable=False)
+    high_price = Column(Float, nullable=False)
+    low_price = Column(Float, nullable=False)
+    close_price = Column(Float, nullable=False)
+    # Timestamps of the first/last observation, so late rows update open/close correctly
+    opened_at = Column(DateTime(timezone=True), nullable=False)
+    closed_at = Column(DateTime(timezone=True), nullable=False)
+    price_sum = Column(Float, nullable=False)
+    price_count = Column(Integer, nullable=False)
+    promo_count = Column(Integer, nullable=False, default=0)
+    out_of_stock_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index('idx_price_rollups_product_time', 'resolution', 'product_id', 'bucket_start'),
+        Index('idx_price_rollups_time', 'resolution', 'bucket_start'),
+    )
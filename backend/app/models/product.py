@@ -2,7 +2,7 @@
 Product Model
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float
+from sqlalchemy import DDL, Column, Integer, String, DateTime, Text, Float, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -26,4 +26,62 @@ class Product(Base):
     # reviews = relationship("Review", back_populates="product")
 
 
+# Full-text search index over name, brand, description and sku, queried by
+# app/services/product_search.py. Created with the table by create_all;
+# migrations/ carries the same DDL for existing databases.
+SEARCH_TABLE = "products_fts"
+SEARCH_VECTOR_COLUMN = "search_vector"
+SEARCH_INDEX = "idx_products_search"
+SEARCH_COLUMNS = ("name", "brand", "description", "sku")
 
+# SQLite: an external-content FTS5 table (stores only the index; text stays
+# in products), with prefix indexes for 2- and 3-character prefixes, kept in
+# sync by triggers so every write path (ORM, bulk inserts, raw SQL) updates it
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE products_fts USING fts5(
+        name, brand, description, sku,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, brand, description, sku)
+        VALUES (new.id, new.name, new.brand, new.description, new.sku);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, brand, description, sku)
+        VALUES ('delete', old.id, old.name, old.brand, old.description, old.sku);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_update AFTER UPDATE OF name, brand, description, sku ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, brand, description, sku)
+        VALUES ('delete', old.id, old.name, old.brand, old.description, old.sku);
+        INSERT INTO products_fts(rowid, name, brand, description, sku)
+        VALUES (new.id, new.name, new.brand, new.description, new.sku);
+    END
+    """,
+]
+
+# PostgreSQL: a generated, weighted tsvector column (name and sku rank above
+# brand, brand above description) with a GIN index
+POSTGRES_SEARCH_DDL = [
+    """
+    ALTER TABLE products ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(sku, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(brand, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX idx_products_search ON products USING GIN (search_vector)",
+]
+
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(Product.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in POSTGRES_SEARCH_DDL:
+    event.listen(Product.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
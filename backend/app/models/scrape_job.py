@@ -0,0 +1,45 @@
+"""
+Scrape Job Model - Persistent queue of scrape work
+Jobs are claimed and executed by app.worker, outside the API process
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey, Enum, Index
+from sqlalchemy.sql import func
+from app.database import Base
+import enum
+
+class JobStatus(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class ScrapeJob(Base):
+    __tablename__ = "scrape_jobs"
+
+    id = Column(Integer, primary_key=True)
+    url = Column(String(1000), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=True)
+    competitor_id = Column(Integer, ForeignKey("competitors.id"), nullable=True)
+    schedule_id = Column(Integer, ForeignKey("scrape_schedules.id"), nullable=True, index=True)
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    run_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    
+    # Result
+    price = Column(Float, nullable=True)
+    unchanged = Column(Integer, default=0)
+    price_changed = Column(Integer, default=0)  # differed from the previously recorded price
+    result = Column(Text, nullable=True)  # JSON-encoded ScrapedPage
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Workers poll for the oldest due job
+    __table_args__ = (
+        Index('idx_scrape_jobs_status_run_at', 'status', 'run_at'),
+    )
@@ -0,0 +1,28 @@
+"""
+Scrape Schedule Model - Recurring refresh of one (product, competitor) listing
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+class ScrapeSchedule(Base):
+    __tablename__ = "scrape_schedules"
+
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    competitor_id = Column(Integer, ForeignKey("competitors.id"), nullable=False)
+    url = Column(String(1000), nullable=False)
+    interval_seconds = Column(Integer, nullable=False, default=86400)
+    next_run_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    is_active = Column(Integer, default=1)
+    
+    # Adaptive scheduling: interval is derived from the estimated change rate
+    is_adaptive = Column(Integer, default=1)
+    change_rate = Column(Float, nullable=True)  # estimated price changes per day
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint('product_id', 'competitor_id', name='uq_schedule_product_competitor'),
+    )
@@ -0,0 +1,169 @@
+"""
+Price Aggregation
+Price statistics computed with grouped SQL, and market insights built on the analytics kernel
+
+Every function takes a `resolution`: "raw" reads price_history, "hour" or
+"day" reads the matching price_rollups buckets. Rollup windows start at the
+bucket containing `since`, so they may cover up to one extra bucket.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models.latest_price import LatestPrice
+from app.models.price_history import PriceHistory
+from app.models.price_rollup import PriceRollup
+from app.models.product import Product
+from app.services import analytics_kernel as kernel
+from app.services.names import product_fields
+from app.services.rollups import bucket_start
+
+RESOLUTIONS = ("raw", "hour", "day")
+
+
+def price_stats(db: Session, product_id: int, since: datetime, resolution: str = "raw") -> Optional[Dict]:
+    """avg/min/max/count of a product's prices since `since`, or None when there are none"""
+    if resolution == "raw":
+        query = select(
+            func.count(PriceHistory.id),
+            func.avg(PriceHistory.price),
+            func.min(PriceHistory.price),
+            func.max(PriceHistory.price),
+        ).where(
+            PriceHistory.product_id == product_id,
+            PriceHistory.timestamp >= since
+        )
+    else:
+        query = select(
+            func.sum(PriceRollup.price_count),
+            func.sum(PriceRollup.price_sum) / func.sum(PriceRollup.price_count),
+            func.min(PriceRollup.low_price),
+            func.max(PriceRollup.high_price),
+        ).where(
+            PriceRollup.resolution == resolution,
+            PriceRollup.product_id == product_id,
+            PriceRollup.bucket_start >= bucket_start(since, resolution)
+        )
+    count, average, minimum, maximum = db.execute(query).one()
+    if not count:
+        return None
+    return {
+        "average_price": average,
+        "min_price": minimum,
+        "max_price": maximum,
+        "price_count": count,
+        "price_range": maximum - minimum,
+    }
+
+
+# Unique sort key for paging through buckets of one product
+BUCKET_KEY = (PriceRollup.bucket_start, PriceRollup.competitor_id)
+
+
+def price_bucket_query(product_id: int, since: datetime, resolution: str, competitor_id: Optional[int] = None):
+    """SELECT of a product's OHLC buckets since `since` (unordered; see BUCKET_KEY)"""
+    query = select(
+        PriceRollup.product_id,
+        PriceRollup.competitor_id,
+        PriceRollup.resolution,
+        PriceRollup.bucket_start,
+        PriceRollup.open_price,
+        PriceRollup.high_price,
+        PriceRollup.low_price,
+        PriceRollup.close_price,
+        (PriceRollup.price_sum / PriceRollup.price_count).label("average_price"),
+        PriceRollup.price_count,
+        PriceRollup.promo_count,
+        PriceRollup.out_of_stock_count,
+    ).where(
+        PriceRollup.resolution == resolution,
+        PriceRollup.product_id == product_id,
+        PriceRollup.bucket_start >= bucket_start(since, resolution)
+    )
+    if competitor_id:
+        query = query.where(PriceRollup.competitor_id == competitor_id)
+    return query
+
+
+def _base_price_positions(db: Session, product_ids: np.ndarray, base_prices: np.ndarray) -> np.ndarray:
+    """Percentile of each product's base price among its competitors' latest prices (NaN without one)"""
+    latest = db.query(LatestPrice.product_id, LatestPrice.price).all()
+    groups = np.array([product_id for product_id, _ in latest], dtype=np.int64)
+    prices = np.array([price for _, price in latest], dtype=float)
+    return kernel.position_percentiles(groups, prices, product_ids, base_prices)
+
+
+def market_insights(db: Session, since: datetime, resolution: str = "raw") -> List[Dict]:
+    """
+    Per-product price summary, trend and volatility for every product with prices since `since`
+
+    Loads all series once and computes every product's metrics in a single
+    vectorized pass (see analytics_kernel). The trend is the least-squares
+    price change over the observed span, fitted per competitor series.
+    """
+    series = kernel.load_series(db, since, resolution)
+    if len(series) == 0:
+        return []
+    metrics = kernel.product_metrics(series)
+    product_ids = metrics["product_id"].tolist()
+    products = product_fields(db, product_ids, Product.name, Product.base_price)
+    base_prices = np.array([
+        products[product_id].base_price if product_id in products and products[product_id].base_price else np.nan
+        for product_id in product_ids
+    ])
+    positions = _base_price_positions(db, metrics["product_id"], base_prices)
+
+    insights = []
+    for row, product_id in enumerate(product_ids):
+        if product_id not in products:
+            continue
+        insights.append({
+            "product_id": product_id,
+            "product_name": products[product_id].name,
+            "average_price": float(metrics["average_price"][row]),
+            "min_price": float(metrics["min_price"][row]),
+            "max_price": float(metrics["max_price"][row]),
+            "median_price": float(metrics["median_price"][row]),
+            "price_trend": kernel.classify_change(metrics["trend_change"][row], metrics["observations"][row]),
+            "trend_slope": kernel.finite_or_none(metrics["trend_slope"][row]),
+            "price_volatility": float(metrics["price_volatility"][row]),
+            "ewma_price": float(metrics["ewma_price"][row]),
+            "moving_average": float(metrics["moving_average"][row]),
+            "price_position": kernel.finite_or_none(positions[row]),
+            "competitor_count": int(metrics["competitor_count"][row]),
+        })
+    return insights
+
+
+def category_price_index(db: Session, since: datetime, resolution: str = "raw", category: Optional[str] = None) -> List[Dict]:
+    """Daily fixed-base price index per product category (100 = each series' first day in the window)"""
+    series = kernel.load_series(db, since, resolution)
+    if len(series) == 0:
+        return []
+    products = product_fields(db, np.unique(series.series_products).tolist(), Product.category)
+    categories = [
+        products[product_id].category if product_id in products else None
+        for product_id in series.series_products.tolist()
+    ]
+    labels = sorted({label for label in categories if label is not None})
+    if category is not None:
+        labels = [label for label in labels if label == category]
+    codes = {label: code for code, label in enumerate(labels)}
+    # Uncategorised (or filtered-out) series go to group -1 and are dropped below
+    series_groups = np.array([codes.get(label, -1) for label in categories], dtype=np.int64)
+
+    index = kernel.price_index(series, series_groups)
+    return [
+        {
+            "category": labels[group],
+            "date": datetime.utcfromtimestamp(bucket * kernel.SECONDS_PER_DAY).date(),
+            "index": float(value),
+            "series_count": int(count),
+        }
+        for group, bucket, value, count in zip(
+            index["group"].tolist(), index["bucket"].tolist(), index["index"].tolist(), index["series_count"].tolist()
+        )
+        if group >= 0
+    ]
@@ -0,0 +1,400 @@
+"""
+Analytics Kernel
+Vectorized trend, volatility and price-index analytics over every price series at once
+
+Observations are loaded into flat NumPy arrays sorted by (product,
+competitor, time), so each (product, competitor) series is a contiguous
+slice described by `starts` / `lengths`. Per-series reductions are
+`np.add.reduceat` calls over those slices and every kernel below runs in a
+fixed number of array passes regardless of how many products there are.
+The one exception is EWMA, a recurrence: it takes one pass per position of
+the longest series, each pass vectorized across all series.
+
+Times are float days since the Unix epoch.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Sequence
+import numpy as np
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+from app.models.price_history import PriceHistory
+from app.models.price_rollup import PriceRollup
+from app.services.rollups import bucket_start
+
+SECONDS_PER_DAY = 86400
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+LOAD_CHUNK_SIZE = 50000
+MOVING_AVERAGE_WINDOW = 7
+EWMA_SPAN = 10
+
+# Trend needs more than this many observations; fewer is reported as "stable"
+TREND_MIN_OBSERVATIONS = 10
+# Fitted change over the observed span that counts as a trend
+TREND_THRESHOLD = 0.05
+# Per-day slope is only reported over at least this many days; shorter spans extrapolate noise
+TREND_MIN_SPAN_DAYS = 1.0
+
+
+@dataclass
+class PriceSeries:
+    """Observations sorted by (product, competitor, time), one contiguous slice per series"""
+    product_ids: np.ndarray
+    competitor_ids: np.ndarray
+    times: np.ndarray
+    prices: np.ndarray
+    # Observations behind each point (1 for raw rows, price_count for rollup buckets)
+    weights: np.ndarray
+    lows: np.ndarray
+    highs: np.ndarray
+    starts: np.ndarray
+    lengths: np.ndarray
+
+    @classmethod
+    def from_arrays(
+        cls,
+        product_ids,
+        competitor_ids,
+        times,
+        prices,
+        weights=None,
+        lows=None,
+        highs=None,
+        assume_sorted: bool = False,
+    ) -> "PriceSeries":
+        product_ids = np.asarray(product_ids, dtype=np.int64)
+        competitor_ids = np.asarray(competitor_ids, dtype=np.int64)
+        times = np.asarray(times, dtype=float)
+        prices = np.asarray(prices, dtype=float)
+        weights = np.ones_like(prices) if weights is None else np.asarray(weights, dtype=float)
+        lows = prices if lows is None else np.asarray(lows, dtype=float)
+        highs = prices if highs is None else np.asarray(highs, dtype=float)
+        if not assume_sorted:
+            order = np.lexsort((times, competitor_ids, product_ids))
+            product_ids, competitor_ids, times = product_ids[order], competitor_ids[order], times[order]
+            prices, weights, lows, highs = prices[order], weights[order], lows[order], highs[order]
+
+        boundaries = (product_ids[1:] != product_ids[:-1]) | (competitor_ids[1:] != competitor_ids[:-1])
+        starts = np.concatenate(([0], np.flatnonzero(boundaries) + 1)) if len(prices) else np.zeros(0, np.int64)
+        lengths = np.diff(np.append(starts, len(prices)))
+        return cls(product_ids, competitor_ids, times, prices, weights, lows, highs, starts, lengths)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @property
+    def series_count(self) -> int:
+        return len(self.starts)
+
+    @property
+    def series_products(self) -> np.ndarray:
+        return self.product_ids[self.starts]
+
+    @property
+    def series_competitors(self) -> np.ndarray:
+        return self.competitor_ids[self.starts]
+
+    @property
+    def series_index(self) -> np.ndarray:
+        """Series number of every observation"""
+        return np.repeat(np.arange(self.series_count), self.lengths)
+
+
+def epoch_days(db: Session, column):
+    """SQL for a naive UTC timestamp column as float days since the epoch"""
+    if db.get_bind().dialect.name == "sqlite":
+        return func.julianday(column) - UNIX_EPOCH_JULIAN_DAY
+    return func.extract("epoch", column) / SECONDS_PER_DAY
+
+
+def load_series(db: Session, since: datetime, resolution: str = "raw", chunk_size: int = LOAD_CHUNK_SIZE) -> PriceSeries:
+    """
+    All price series since `since` as one PriceSeries
+
+    "raw" loads every price_history row; "hour"/"day" load price_rollups
+    buckets (bucket average as the price, price_count as the weight), which
+    keeps long windows small. Rows are counted first and streamed from a
+    server-side cursor `chunk_size` at a time into preallocated arrays, so
+    at most one chunk of rows exists as Python objects. Timestamps arrive
+    as epoch days computed in SQL.
+    """
+    if resolution == "raw":
+        model = PriceHistory
+        columns = (
+            PriceHistory.product_id,
+            PriceHistory.competitor_id,
+            epoch_days(db, PriceHistory.timestamp),
+            PriceHistory.price,
+        )
+        condition = PriceHistory.timestamp >= since
+    else:
+        model = PriceRollup
+        columns = (
+            PriceRollup.product_id,
+            PriceRollup.competitor_id,
+            epoch_days(db, PriceRollup.bucket_start),
+            PriceRollup.price_sum / PriceRollup.price_count,
+            PriceRollup.price_count,
+            PriceRollup.low_price,
+            PriceRollup.high_price,
+        )
+        condition = and_(
+            PriceRollup.resolution == resolution,
+            PriceRollup.bucket_start >= bucket_start(since, resolution),
+        )
+
+    count = db.execute(select(func.count()).select_from(model).where(condition)).scalar()
+    values = np.empty((count, len(columns)))
+    filled = 0
+    # No ORDER BY: sorting by series in SQL makes SQLite walk an index and
+    # fetch every row by rowid (~15x slower than a scan); one lexsort here
+    # is cheap. The sort is stable and rows arrive in id order within a
+    # timestamp, so ties keep their insertion order as before.
+    result = db.connection().execute(select(*columns).where(condition).execution_options(stream_results=True))
+    # The first chunk goes through the Result, which may already hold rows
+    # it prefetched; after that, plain tuples straight from the DBAPI
+    # cursor, as building a Row per row would cost more than the query
+    rows = [tuple(row) for row in result.fetchmany(chunk_size)]
+    while rows and filled < count:
+        # Rows committed after the count are left out; the window is a snapshot either way
+        rows = rows[:count - filled]
+        values[filled:filled + len(rows)] = rows
+        filled += len(rows)
+        if len(rows) < chunk_size:
+            break
+        rows = result.cursor.fetchmany(chunk_size)
+    result.close()
+    values = values[:filled]
+
+    product_ids, competitor_ids, times, prices, *rest = values.T
+    return PriceSeries.from_arrays(
+        product_ids,
+        competitor_ids,
+        times,
+        prices,
+        *rest,
+    )
+
+
+def segment_sums(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Sum of `values` over each contiguous segment"""
+    if len(starts) == 0:
+        return np.zeros(0)
+    return np.add.reduceat(values, starts)
+
+
+def rolling_mean(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over the last `window` points, never reaching back into the previous series"""
+    sums = np.concatenate(([0.0], np.cumsum(values, dtype=float)))
+    index = np.arange(len(values))
+    low = np.maximum(index - window + 1, np.repeat(starts, lengths))
+    return (sums[index + 1] - sums[low]) / (index + 1 - low)
+
+
+def ewma(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray, span: float) -> np.ndarray:
+    """Exponentially weighted moving average, alpha = 2 / (span + 1), seeded with each series' first value"""
+    alpha = 2.0 / (span + 1.0)
+    out = np.array(values, dtype=float)
+    if len(starts) == 0:
+        return out
+    # Longest series first: the series still running at position p are then a prefix
+    order = np.argsort(-lengths, kind="stable")
+    sorted_starts, negative_lengths = starts[order], -lengths[order]
+    for position in range(1, -int(negative_lengths[0])):
+        running = np.searchsorted(negative_lengths, -position, side="left")
+        index = sorted_starts[:running] + position
+        out[index] = alpha * values[index] + (1 - alpha) * out[index - 1]
+    return out
+
+
+def volatility(prices: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Standard deviation of log returns per series (0 with fewer than three points)"""
+    returns = np.zeros(len(prices))
+    returns[1:] = np.diff(np.log(np.maximum(prices, 1e-9)))
+    returns[starts] = 0.0
+    count = lengths - 1
+    total = segment_sums(returns, starts)
+    squares = segment_sums(returns * returns, starts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = (squares - total * total / count) / (count - 1)
+    return np.sqrt(np.where(count > 1, np.maximum(variance, 0.0), 0.0))
+
+
+def regression_slope(times: np.ndarray, prices: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Least-squares price change per day for each series (0 when all points share one time)"""
+    mean_time = segment_sums(times, starts) / lengths
+    mean_price = segment_sums(prices, starts) / lengths
+    dt = times - np.repeat(mean_time, lengths)
+    dp = prices - np.repeat(mean_price, lengths)
+    covariance = segment_sums(dt * dp, starts)
+    spread = segment_sums(dt * dt, starts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(spread > 0, covariance / spread, 0.0)
+
+
+def _group_keys(groups: np.ndarray, values: np.ndarray, offset: float, span: float) -> np.ndarray:
+    """Float keys ordering by (group, value): each group gets its own range of width `span`"""
+    return groups * span + (values - offset)
+
+
+def _value_range(values: np.ndarray):
+    """(offset, span) with every value - offset in [0, span)"""
+    if len(values) == 0:
+        return 0.0, 1.0
+    low, high = float(np.min(values)), float(np.max(values))
+    return low, high - low + 1.0
+
+
+def segment_quantiles(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray, quantiles: Sequence[float]) -> np.ndarray:
+    """
+    Linearly interpolated quantiles per segment; shape (len(quantiles), segments)
+
+    Segments are sorted with one argsort over (segment, value) keys, several
+    times faster than np.lexsort on two keys.
+    """
+    groups = np.repeat(np.arange(len(starts)), lengths)
+    offset, span = _value_range(values)
+    ordered = values[np.argsort(_group_keys(groups, values, offset, span))]
+    result = np.empty((len(quantiles), len(starts)))
+    for row, quantile in enumerate(quantiles):
+        position = starts + quantile * (lengths - 1)
+        below = np.floor(position).astype(np.int64)
+        above = np.minimum(below + 1, starts + lengths - 1)
+        fraction = position - below
+        result[row] = ordered[below] * (1 - fraction) + ordered[above] * fraction
+    return result
+
+
+def position_percentiles(
+    groups: np.ndarray,
+    values: np.ndarray,
+    target_groups: np.ndarray,
+    targets: np.ndarray,
+) -> np.ndarray:
+    """
+    Percentile rank (0-100) of each target among the values of its group
+
+    Ties count half, so a price equal to every competitor's sits at 50.
+    NaN where the group has no values or the target is NaN.
+    """
+    # Targets share the key ranges, so they must fit inside them too
+    offset, span = _value_range(np.concatenate((values, targets[np.isfinite(targets)])))
+    keys = np.sort(_group_keys(groups, values, offset, span))
+    target_keys = _group_keys(target_groups, targets, offset, span)
+    sorted_groups = np.sort(groups)
+    group_start = np.searchsorted(sorted_groups, target_groups, side="left")
+    size = np.searchsorted(sorted_groups, target_groups, side="right") - group_start
+    below = np.searchsorted(keys, target_keys, side="left") - group_start
+    not_above = np.searchsorted(keys, target_keys, side="right") - group_start
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ranks = 100.0 * (below + not_above) / (2.0 * size)
+    return np.where((size > 0) & np.isfinite(targets), ranks, np.nan)
+
+
+def price_index(series: PriceSeries, series_groups: np.ndarray, bucket_days: float = 1.0) -> Dict[str, np.ndarray]:
+    """
+    Fixed-base price index per group (e.g. category) and time bucket
+
+    Each series is bucketed (weighted average), rebased to 100 at its first
+    bucket in the window, and the index of a group in a bucket is the
+    geometric mean of the relatives of its series observed in that bucket
+    (a Jevons index, so no single expensive product dominates).
+    Returns arrays group, bucket (start, in days), index and series_count.
+    """
+    if len(series) == 0:
+        empty = np.zeros(0)
+        return {"group": empty.astype(np.int64), "bucket": empty, "index": empty, "series_count": empty.astype(np.int64)}
+    buckets = np.floor(series.times / bucket_days)
+    index_of_series = series.series_index
+    # Rows are time-ordered within a series, so (series, bucket) runs are contiguous
+    change = (index_of_series[1:] != index_of_series[:-1]) | (buckets[1:] != buckets[:-1])
+    run_starts = np.concatenate(([0], np.flatnonzero(change) + 1))
+    averages = segment_sums(series.prices * series.weights, run_starts) / segment_sums(series.weights, run_starts)
+    run_series = index_of_series[run_starts]
+    run_buckets = buckets[run_starts]
+
+    first_run = np.concatenate(([True], run_series[1:] != run_series[:-1]))
+    base = averages[first_run][np.cumsum(first_run) - 1]
+    log_relatives = np.log(averages / base)
+
+    run_groups = np.asarray(series_groups, dtype=np.int64)[run_series]
+    bucket_numbers = (run_buckets - run_buckets.min()).astype(np.int64)
+    order = np.argsort(run_groups * (bucket_numbers.max() + 1) + bucket_numbers, kind="stable")
+    run_groups, run_buckets, log_relatives = run_groups[order], run_buckets[order], log_relatives[order]
+    change = (run_groups[1:] != run_groups[:-1]) | (run_buckets[1:] != run_buckets[:-1])
+    cell_starts = np.concatenate(([0], np.flatnonzero(change) + 1))
+    counts = np.diff(np.append(cell_starts, len(log_relatives)))
+    return {
+        "group": run_groups[cell_starts],
+        "bucket": run_buckets[cell_starts] * bucket_days,
+        "index": 100.0 * np.exp(segment_sums(log_relatives, cell_starts) / counts),
+        "series_count": counts,
+    }
+
+
+def classify_change(change: float, count: float) -> str:
+    """Trend label for a fitted relative change over the observed span"""
+    if count <= TREND_MIN_OBSERVATIONS:
+        return "stable"
+    if change > TREND_THRESHOLD:
+        return "increasing"
+    if change < -TREND_THRESHOLD:
+        return "decreasing"
+    return "stable"
+
+
+def product_metrics(series: PriceSeries) -> Dict[str, np.ndarray]:
+    """
+    Per-product summary of all its competitor series, one array entry per product
+
+    Trend and volatility are computed per (product, competitor) series so a
+    change in which competitors were scraped does not read as a price move,
+    then averaged per product weighted by observations.
+    """
+    starts, lengths = series.starts, series.lengths
+    series_products = series.series_products
+    product_change = np.concatenate(([True], series_products[1:] != series_products[:-1]))
+    product_series_starts = np.flatnonzero(product_change)
+    product_series_counts = np.diff(np.append(product_series_starts, series.series_count))
+    product_starts = starts[product_series_starts]
+    product_lengths = np.diff(np.append(product_starts, len(series)))
+
+    weighted_sum = segment_sums(series.prices * series.weights, product_starts)
+    counts = segment_sums(series.weights, product_starts)
+    series_mean = segment_sums(series.prices, starts) / lengths
+    with np.errstate(divide="ignore", invalid="ignore"):
+        relative_slope = np.where(series_mean > 0, regression_slope(series.times, series.prices, starts, lengths) / series_mean, 0.0)
+    series_volatility = volatility(series.prices, starts, lengths)
+    ends = starts + lengths - 1
+    last_ewma = ewma(series.prices, starts, lengths, EWMA_SPAN)[ends]
+    last_moving_average = rolling_mean(series.prices, starts, lengths, MOVING_AVERAGE_WINDOW)[ends]
+
+    def per_product(values, weights=None):
+        weights = lengths if weights is None else weights
+        return segment_sums(values * weights, product_series_starts) / segment_sums(weights, product_series_starts)
+
+    slope = per_product(relative_slope)
+    span_days = np.maximum.reduceat(series.times, product_starts) - np.minimum.reduceat(series.times, product_starts)
+    quartiles = segment_quantiles(series.prices, product_starts, product_lengths, (0.25, 0.5, 0.75))
+    return {
+        "product_id": series_products[product_series_starts],
+        "average_price": weighted_sum / counts,
+        "min_price": np.minimum.reduceat(series.lows, product_starts),
+        "max_price": np.maximum.reduceat(series.highs, product_starts),
+        "p25_price": quartiles[0],
+        "median_price": quartiles[1],
+        "p75_price": quartiles[2],
+        "observations": counts,
+        "competitor_count": product_series_counts,
+        "trend_slope": np.where(span_days >= TREND_MIN_SPAN_DAYS, slope, np.nan),
+        "trend_change": slope * span_days,
+        "price_volatility": per_product(series_volatility),
+        "ewma_price": per_product(last_ewma, np.ones(len(starts))),
+        "moving_average": per_product(last_moving_average, np.ones(len(starts))),
+    }
+
+
+def finite_or_none(value) -> Optional[float]:
+    value = float(value)
+    return value if np.isfinite(value) else None
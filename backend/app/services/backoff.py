@@ -0,0 +1,16 @@
+"""
+Retry Backoff
+Exponential backoff with full jitter, shared by the scrape job queue and the Ollama client
+
+The n-th retry (0-based) waits a uniformly random time in
+[0, min(cap, base * 2**n)]. Drawing from the whole interval rather than its
+upper half spreads retries of callers that failed together, so they don't
+hit the upstream again in lockstep.
+"""
+
+import random
+
+
+def full_jitter(retry: int, base: float, cap: float) -> float:
+    """Seconds to wait before the 0-based `retry`-th retry"""
+    return random.uniform(0, min(cap, base * 2 ** max(retry, 0)))
@@ -0,0 +1,155 @@
+"""
+Async Crawl Engine
+Concurrent price crawling with a global concurrency cap and per-host politeness
+"""
+
+import asyncio
+import random
+import time
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from app.services.http_client import async_client_for_host
+from app.services.scraper import PriceScraper, ScrapedPage
+
+
+class HostLimiter:
+    """Politeness limits for a single host: max in-flight requests plus a spacing between request starts"""
+
+    def __init__(self, max_concurrency: int, delay: float, jitter: float):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+        self.delay = delay
+        self.jitter = jitter
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        # Reserve the next start slot under the lock, then sleep outside it
+        async with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.delay + random.uniform(0, self.jitter)
+        if start > now:
+            await asyncio.sleep(start - now)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+
+
+class AsyncCrawler:
+    """
+    Crawl many URLs in parallel across hosts while rate-limiting each host
+
+    Requests to different hosts run concurrently up to `max_concurrency`;
+    each host is additionally limited to `per_host_concurrency` in-flight
+    requests spaced at least `per_host_delay` (+ jitter) seconds apart.
+    """
+
+    def __init__(
+        self,
+        scraper: Optional[PriceScraper] = None,
+        max_concurrency: int = 64,
+        per_host_concurrency: int = 2,
+        per_host_delay: float = 1.0,
+        jitter: float = 0.5,
+        timeout: float = 10.0,
+    ):
+        self.scraper = scraper or PriceScraper()
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_delay = per_host_delay
+        self.jitter = jitter
+        self.timeout = timeout
+
+    def _host(self, url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def _limiter(self, limiters: Dict[str, HostLimiter], host: str) -> HostLimiter:
+        limiter = limiters.get(host)
+        if limiter is None:
+            limiter = HostLimiter(self.per_host_concurrency, self.per_host_delay, self.jitter)
+            limiters[host] = limiter
+        return limiter
+
+    def _client(self, clients: Dict[str, httpx.AsyncClient], host: str) -> httpx.AsyncClient:
+        # One small pool per host: a single shared pool scans every connection
+        # on each request, which becomes the bottleneck at high concurrency
+        client = clients.get(host)
+        if client is None:
+            client = async_client_for_host(self.scraper.headers, self.per_host_concurrency, self.timeout)
+            clients[host] = client
+        return client
+
+    async def _fetch(
+        self,
+        clients: Dict[str, httpx.AsyncClient],
+        limiters: Dict[str, HostLimiter],
+        global_slots: asyncio.Semaphore,
+        url: str,
+    ) -> Dict:
+        result = {'url': url, 'price': None, 'status_code': None, 'error': None, 'unchanged': False}
+        host = self._host(url)
+        validators = self.scraper.validators
+        # Crawled pages carry only the price: keyed by the price-only plan so they never
+        # answer a 304 for scrape_page, which returns every field
+        key = self.scraper.plan_key(fields=('price',))
+        # Host politeness first so a throttled host never holds a global slot while waiting
+        async with self._limiter(limiters, host):
+            async with global_slots:
+                try:
+                    response = await self._client(clients, host).get(
+                        url, headers=validators.conditional_headers(url, key)
+                    )
+                    result['status_code'] = response.status_code
+                    if response.status_code != 304:
+                        response.raise_for_status()
+                except Exception as e:
+                    result['error'] = str(e)
+                    result['timestamp'] = time.time()
+                    return result
+
+        if response.status_code == 304:
+            cached = validators.get(url, key)
+            if cached is not None and cached.page is not None:
+                result['price'] = cached.page.price
+                result['unchanged'] = True
+            else:
+                result['error'] = "304 Not Modified without a cached page"
+            result['timestamp'] = time.time()
+            return result
+
+        try:
+            # Parsing is CPU-bound; keep it off the event loop
+            result['price'] = await asyncio.to_thread(self.scraper.parse_price, response.content)
+            validators.store(url, response.headers, ScrapedPage(url=url, price=result['price']), key)
+        except Exception as e:
+            result['error'] = str(e)
+        result['timestamp'] = time.time()
+        return result
+
+    async def crawl(self, urls: Iterable[str]) -> AsyncIterator[Dict]:
+        """Yield one result dict per URL as soon as it finishes (completion order)"""
+        # Limiters and pools are per crawl: asyncio primitives are bound to one event loop
+        global_slots = asyncio.Semaphore(self.max_concurrency)
+        clients: Dict[str, httpx.AsyncClient] = {}
+        limiters: Dict[str, HostLimiter] = {}
+        tasks = [
+            asyncio.create_task(self._fetch(clients, limiters, global_slots, url))
+            for url in urls
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            for client in clients.values():
+                await client.aclose()
+
+    async def crawl_all(self, urls: Iterable[str]) -> List[Dict]:
+        """Collect all crawl results into a list (completion order)"""
+        return [result async for result in self.crawl(urls)]
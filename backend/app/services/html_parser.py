@@ -0,0 +1,234 @@
+"""
+HTML Parser Backends
+Pluggable parsers (selectolax, lxml, BeautifulSoup) and precompiled extraction plans
+"""
+
+import os
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # optional dependency
+    LexborHTMLParser = None
+
+try:
+    from lxml import etree
+    from lxml.cssselect import CSSSelector
+except ImportError:  # optional dependency
+    etree = None
+    CSSSelector = None
+
+STREAM_CHUNK_SIZE = 16 * 1024
+
+
+class FieldMatch(NamedTuple):
+    """Backend-neutral view of a matched element"""
+    text: str
+    attrs: Dict[str, str]
+
+
+class ParserBackend(ABC):
+    """Base class: parse a document and evaluate compiled selectors against it"""
+
+    name = "base"
+    supports_streaming = False
+
+    @abstractmethod
+    def compile(self, selector: str):
+        """Precompile a CSS selector for this backend"""
+
+    @abstractmethod
+    def parse(self, content):
+        """Parse raw HTML (bytes or str) into a document"""
+
+    @abstractmethod
+    def select_one(self, document, compiled):
+        """First element matching a compiled selector, or None"""
+
+    @abstractmethod
+    def to_match(self, element, with_text: bool = True) -> FieldMatch:
+        """Backend-neutral FieldMatch for a matched element (text left empty unless with_text)"""
+
+
+class SoupBackend(ParserBackend):
+    """BeautifulSoup + html.parser; always available, slowest"""
+
+    name = "html.parser"
+
+    def compile(self, selector: str):
+        import soupsieve
+        return soupsieve.compile(selector)
+
+    def parse(self, content):
+        return BeautifulSoup(content, 'html.parser')
+
+    def select_one(self, document, compiled):
+        return compiled.select_one(document)
+
+    def to_match(self, element, with_text: bool = True) -> FieldMatch:
+        attrs = {
+            key: ' '.join(value) if isinstance(value, list) else value
+            for key, value in element.attrs.items()
+        }
+        return FieldMatch(element.get_text(strip=True) if with_text else '', attrs)
+
+
+class SelectolaxBackend(ParserBackend):
+    """selectolax (lexbor) - C parser with native CSS matching"""
+
+    name = "selectolax"
+
+    def compile(self, selector: str):
+        # lexbor compiles selectors internally; validate once up front
+        LexborHTMLParser("<html></html>").css_first(selector)
+        return selector
+
+    def parse(self, content):
+        return LexborHTMLParser(content)
+
+    def select_one(self, document, compiled):
+        return document.css_first(compiled)
+
+    def to_match(self, element, with_text: bool = True) -> FieldMatch:
+        attrs = {key: value or '' for key, value in element.attributes.items()}
+        return FieldMatch(element.text(strip=True) if with_text else '', attrs)
+
+
+class LxmlBackend(ParserBackend):
+    """lxml with CSS selectors translated to XPath once; supports early-exit streaming"""
+
+    name = "lxml"
+    supports_streaming = True
+
+    def compile(self, selector: str):
+        return CSSSelector(selector, translator='html')
+
+    def parse(self, content):
+        parser = etree.HTMLParser()
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        parser.feed(content)
+        return parser.close()
+
+    def select_one(self, document, compiled):
+        if document is None:
+            return None
+        matches = compiled(document)
+        return matches[0] if matches else None
+
+    def to_match(self, element, with_text: bool = True) -> FieldMatch:
+        text = ''.join(piece.strip() for piece in element.itertext()) if with_text else ''
+        return FieldMatch(text, dict(element.attrib))
+
+
+def _is_closed(element) -> bool:
+    """Whether anything follows `element` in the partially parsed tree, i.e. its content is complete"""
+    if element.getnext() is not None:
+        return True
+    return any(ancestor.getnext() is not None for ancestor in element.iterancestors())
+
+
+class ExtractionPlan:
+    """
+    Field -> ordered selector list, compiled once for a backend
+
+    For each field the first selector (in priority order) that matches wins,
+    and its first match in document order is used - same semantics as trying
+    `soup.select_one` for each selector in turn. Fields in `attribute_fields`
+    are read from attributes only, so matching a large element such as <html>
+    doesn't pay for extracting its text.
+    """
+
+    def __init__(self, backend: ParserBackend, fields: Dict[str, Sequence[str]], attribute_fields: Sequence[str] = ()):
+        self.backend = backend
+        self.attribute_fields = frozenset(attribute_fields)
+        self.fields: Dict[str, List[Tuple[str, object]]] = {
+            field: [(selector, backend.compile(selector)) for selector in selectors]
+            for field, selectors in fields.items()
+        }
+
+    def run(self, content, early_exit: bool = False) -> Dict[str, FieldMatch]:
+        """Return a FieldMatch for every field that matched"""
+        if early_exit and self.backend.supports_streaming:
+            return self._run_streaming(content)
+        document = self.backend.parse(content)
+        return self._resolve(document, self.fields)
+
+    def _resolve(self, document, fields) -> Dict[str, FieldMatch]:
+        results = {}
+        for field, selectors in fields.items():
+            for _, compiled in selectors:
+                element = self.backend.select_one(document, compiled)
+                if element is not None:
+                    results[field] = self.backend.to_match(element, field not in self.attribute_fields)
+                    break
+        return results
+
+    def _run_streaming(self, content) -> Dict[str, FieldMatch]:
+        """
+        Feed the document in chunks and stop tokenizing once every field's
+        top-priority selector has a complete match. Attribute fields are
+        complete as soon as their start tag is parsed, so <html lang> settles
+        with the first chunk. Fields whose first choice never matches fall
+        back to the full document, so results are identical to a full parse.
+        """
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        parser = etree.HTMLPullParser(events=('start',))
+        root = None
+        results = {}
+        pending = dict(self.fields)
+
+        for offset in range(0, len(content), STREAM_CHUNK_SIZE):
+            parser.feed(content[offset:offset + STREAM_CHUNK_SIZE])
+            events = parser.read_events()
+            if root is None:
+                for _, element in events:
+                    root = element
+                    break
+            deque(events, maxlen=0)
+            if root is None:
+                continue
+
+            for field, selectors in list(pending.items()):
+                element = self.backend.select_one(root, selectors[0][1])
+                if element is not None and (field in self.attribute_fields or _is_closed(element)):
+                    results[field] = self.backend.to_match(element, field not in self.attribute_fields)
+                    del pending[field]
+            if not pending:
+                return results
+
+        results.update(self._resolve(parser.close(), pending))
+        return results
+
+
+_BACKENDS = {
+    "selectolax": (SelectolaxBackend, lambda: LexborHTMLParser is not None),
+    "lxml": (LxmlBackend, lambda: etree is not None),
+    "html.parser": (SoupBackend, lambda: True),
+}
+
+
+def available_backends() -> List[str]:
+    """Names of installed backends, fastest first"""
+    return [name for name, (_, installed) in _BACKENDS.items() if installed()]
+
+
+def get_backend(name: Optional[str] = None) -> ParserBackend:
+    """
+    Resolve a parser backend by name, else from SCRAPER_PARSER, else the
+    fastest installed one. Falls back to html.parser.
+    """
+    name = name or os.getenv("SCRAPER_PARSER")
+    if name:
+        if name not in _BACKENDS:
+            raise ValueError(f"Unknown parser backend: {name}")
+        backend_class, installed = _BACKENDS[name]
+        if not installed():
+            raise ValueError(f"Parser backend {name} is not installed")
+        return backend_class()
+    return _BACKENDS[available_backends()[0]][0]()
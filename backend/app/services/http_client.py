@@ -0,0 +1,148 @@
+"""
+Pooled HTTP Clients
+Per-host keep-alive connection pools and ETag/Last-Modified validator caching for the scraper
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import brotli  # noqa: F401 - enables 'br' decoding in urllib3 and httpx
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+try:
+    import h2  # noqa: F401 - required for httpx HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def host_key(url: str) -> str:
+    """Pool key for a URL: scheme + host[:port]"""
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc.lower()}"
+
+
+@dataclass
+class CachedPage:
+    """Validators from the last 200 response for a URL, plus what we extracted from it"""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    page: Any = None
+    key: Any = None  # extraction plan the page was built with
+
+
+class ValidatorCache:
+    """
+    Thread-safe, size-bounded LRU of URL -> CachedPage
+
+    Entries carry the key of the extraction plan that built the page; lookups
+    with a different key miss, so a 304 never returns a page extracted with
+    other selectors or fewer fields.
+    """
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str, key: Any = None) -> Optional[CachedPage]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None or entry.key != key:
+                return None
+            self._entries.move_to_end(url)
+            return entry
+
+    def store(self, url: str, headers, page: Any, key: Any = None) -> None:
+        """Remember validators from a response; responses without any are not cached"""
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        with self._lock:
+            if not etag and not last_modified:
+                self._entries.pop(url, None)
+                return
+            self._entries[url] = CachedPage(etag, last_modified, page, key)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def conditional_headers(self, url: str, key: Any = None) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since for a URL we have a page for under this plan key"""
+        entry = self.get(url, key)
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+
+class HostSessionPool:
+    """
+    One keep-alive requests.Session per competitor host
+
+    Each session reuses up to `pool_maxsize` connections, so repeated scrapes
+    of the same host skip the TCP + TLS handshake.
+    """
+
+    def __init__(self, headers: Dict[str, str], pool_maxsize: int = 4, max_retries: int = 1):
+        self.headers = dict(headers, **{'Accept-Encoding': ACCEPT_ENCODING})
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def session_for(self, url: str) -> requests.Session:
+        key = host_key(url)
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = requests.Session()
+                    session.headers.update(self.headers)
+                    adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=self.pool_maxsize,
+                        max_retries=self.max_retries,
+                    )
+                    session.mount(key + '/', adapter)
+                    self._sessions[key] = session
+        return session
+
+    def close(self) -> None:
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+def async_client_for_host(headers: Dict[str, str], max_connections: int, timeout: float) -> httpx.AsyncClient:
+    """
+    Keep-alive httpx client for a single host
+
+    HTTP/2 is used when the `h2` package is installed and SCRAPER_HTTP2 is not "0".
+    """
+    http2 = HTTP2_AVAILABLE and os.getenv("SCRAPER_HTTP2", "1") != "0"
+    return httpx.AsyncClient(
+        headers=dict(headers, **{'Accept-Encoding': ACCEPT_ENCODING}),
+        timeout=timeout,
+        follow_redirects=True,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+    )
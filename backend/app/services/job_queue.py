@@ -0,0 +1,150 @@
+"""
+Scrape Job Queue
+SQLite/PostgreSQL-backed job queue with atomic claiming, retry backoff and recurring schedules
+"""
+
+import json
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.models.scrape_job import ScrapeJob, JobStatus
+from app.models.scrape_schedule import ScrapeSchedule
+from app.services.backoff import full_jitter
+from app.services.scraper import ScrapedPage
+
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+
+
+def enqueue(
+    db: Session,
+    url: str,
+    product_id: Optional[int] = None,
+    competitor_id: Optional[int] = None,
+    schedule_id: Optional[int] = None,
+    max_attempts: int = 3,
+    run_at: Optional[datetime] = None,
+) -> ScrapeJob:
+    """Add a job to the queue and commit; returns the persisted job"""
+    job = ScrapeJob(
+        url=url,
+        product_id=product_id,
+        competitor_id=competitor_id,
+        schedule_id=schedule_id,
+        max_attempts=max_attempts,
+        status=JobStatus.QUEUED,
+        run_at=run_at or datetime.utcnow(),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def claim_next(db: Session, worker_id: str) -> Optional[ScrapeJob]:
+    """
+    Atomically claim the oldest due job for `worker_id`
+
+    The conditional UPDATE only succeeds for one worker even when several
+    processes race for the same row.
+    """
+    now = datetime.utcnow()
+    while True:
+        job_id = db.query(ScrapeJob.id).filter(
+            ScrapeJob.status == JobStatus.QUEUED,
+            ScrapeJob.run_at <= now
+        ).order_by(ScrapeJob.run_at, ScrapeJob.id).limit(1).scalar()
+        if job_id is None:
+            db.rollback()
+            return None
+        claimed = db.execute(
+            update(ScrapeJob)
+            .where(ScrapeJob.id == job_id, ScrapeJob.status == JobStatus.QUEUED)
+            .values(
+                status=JobStatus.RUNNING,
+                locked_by=worker_id,
+                locked_at=now,
+                attempts=ScrapeJob.attempts + 1,
+            )
+        ).rowcount
+        db.commit()
+        if claimed:
+            return db.get(ScrapeJob, job_id)
+
+
+def complete(db: Session, job: ScrapeJob, page: ScrapedPage, price_changed: bool = False) -> None:
+    """Mark a job succeeded and store its result (caller commits)"""
+    job.status = JobStatus.SUCCEEDED
+    job.price = page.price
+    job.unchanged = 1 if page.unchanged else 0
+    job.price_changed = 1 if price_changed else 0
+    job.result = json.dumps(page.to_dict())
+    job.last_error = None
+    job.finished_at = datetime.utcnow()
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds before the next attempt after `attempts` failed ones (full jitter, capped at RETRY_MAX_SECONDS)"""
+    return full_jitter(attempts - 1, RETRY_BASE_SECONDS, RETRY_MAX_SECONDS)
+
+
+def fail(db: Session, job: ScrapeJob, error: str) -> None:
+    """Record a failed attempt: requeue with backoff, or give up after max_attempts (caller commits)"""
+    job.last_error = error[:2000]
+    job.locked_by = None
+    job.locked_at = None
+    if job.attempts < job.max_attempts:
+        job.status = JobStatus.QUEUED
+        job.run_at = datetime.utcnow() + timedelta(seconds=retry_delay(job.attempts))
+    else:
+        job.status = JobStatus.FAILED
+        job.finished_at = datetime.utcnow()
+
+
+def requeue_stale(db: Session, timeout_seconds: int = 600) -> int:
+    """Return jobs whose worker died mid-run to the queue; returns how many"""
+    cutoff = datetime.utcnow() - timedelta(seconds=timeout_seconds)
+    count = db.execute(
+        update(ScrapeJob)
+        .where(ScrapeJob.status == JobStatus.RUNNING, ScrapeJob.locked_at < cutoff)
+        .values(status=JobStatus.QUEUED, locked_by=None, locked_at=None, run_at=datetime.utcnow())
+    ).rowcount
+    db.commit()
+    return count
+
+
+def enqueue_due_schedules(db: Session) -> List[ScrapeJob]:
+    """Create one job for every active schedule whose next run is due, and advance it"""
+    now = datetime.utcnow()
+    due = db.query(ScrapeSchedule).filter(
+        ScrapeSchedule.is_active == 1,
+        ScrapeSchedule.next_run_at <= now
+    ).all()
+    if not due:
+        return []
+
+    # Don't pile up jobs for a schedule whose previous run hasn't finished
+    in_flight = {
+        schedule_id for (schedule_id,) in db.query(ScrapeJob.schedule_id).filter(
+            ScrapeJob.schedule_id.in_([s.id for s in due]),
+            ScrapeJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING])
+        ).all()
+    }
+    jobs = []
+    for schedule in due:
+        schedule.next_run_at = now + timedelta(seconds=schedule.interval_seconds)
+        if schedule.id in in_flight:
+            continue
+        job = ScrapeJob(
+            url=schedule.url,
+            product_id=schedule.product_id,
+            competitor_id=schedule.competitor_id,
+            schedule_id=schedule.id,
+            status=JobStatus.QUEUED,
+            run_at=now,
+        )
+        db.add(job)
+        jobs.append(job)
+    db.commit()
+    return jobs
@@ -0,0 +1,157 @@
+"""
+LLM Response Cache
+Persistent, content-addressed store of completions keyed by everything that shapes the answer
+
+Keys are SHA-256 hashes of (model, system prompt, prompt, temperature,
+max_tokens), so an unchanged prompt, e.g. the same review text or an
+unchanged product/competitor price set, is answered from disk. Entries live
+in their own SQLite file, independent of the application database, and the
+least recently used ones are evicted once the total size exceeds
+`max_bytes`.
+
+Every call does blocking SQLite I/O, so async callers run get/put in a
+worker thread (asyncio.to_thread). Eviction runs on a background thread
+woken by put, deleting EVICT_BATCH entries per transaction, so neither a
+put nor concurrent gets wait for a long eviction pass; the cache can
+overshoot max_bytes briefly meanwhile.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger("app.llm_cache")
+
+DEFAULT_PATH = "./llm_cache.db"
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+# Evict down to this fraction of max_bytes so eviction doesn't run on every put
+EVICT_TO = 0.9
+EVICT_BATCH = 500
+
+
+def completion_key(model: str, system_prompt: Optional[str], prompt: str, temperature: float, max_tokens: int) -> str:
+    payload = json.dumps([model, system_prompt, prompt, temperature, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path: str = DEFAULT_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._evict_wanted = threading.Event()
+        self._evictor: Optional[threading.Thread] = None
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_last_used ON completions (last_used)")
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        size = len(key) + len(response.encode())
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM completions WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, model, response, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now),
+            )
+            self._size += size - (previous[0] if previous else 0)
+            if self._size > self.max_bytes:
+                if self._evictor is None:
+                    self._evictor = threading.Thread(target=self._evict_forever, name="llm-cache-evictor", daemon=True)
+                    self._evictor.start()
+                self._evict_wanted.set()
+
+    def _evict_forever(self) -> None:
+        while True:
+            self._evict_wanted.wait()
+            self._evict_wanted.clear()
+            try:
+                self.evict()
+            except sqlite3.Error:
+                logger.exception("LLM cache eviction failed")
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache is at EVICT_TO of max_bytes"""
+        target = self.max_bytes * EVICT_TO
+        while True:
+            # One batch per transaction; gets and puts run in between
+            with self._lock:
+                if self._size <= target:
+                    return
+                rows = self._conn.execute(
+                    "SELECT key, size FROM completions ORDER BY last_used LIMIT ?", (EVICT_BATCH,)
+                ).fetchall()
+                if not rows:
+                    return
+                doomed = []
+                freed = 0
+                for key, size in rows:
+                    if self._size - freed <= target:
+                        break
+                    doomed.append((key,))
+                    freed += size
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._conn.executemany("DELETE FROM completions WHERE key = ?", doomed)
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._size -= freed
+                self.evictions += len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+            self._size = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        return {
+            "entries": entries,
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def cache_from_env() -> Optional[LLMCache]:
+    """LLMCache configured by LLM_CACHE_PATH / LLM_CACHE_MAX_BYTES, or None if LLM_CACHE_PATH is empty"""
+    path = os.getenv("LLM_CACHE_PATH", DEFAULT_PATH)
+    if not path:
+        return None
+    return LLMCache(path, int(os.getenv("LLM_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)))
@@ -0,0 +1,60 @@
+"""
+Name Lookup
+Resolve product and competitor names (or other columns) for many rows with one IN query per table
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from app.models.competitor import Competitor
+from app.models.product import Product
+
+# Stay well under SQLite's bound-parameter limit
+IN_CHUNK_SIZE = 500
+
+
+def _lookup(db: Session, model, ids: Iterable[Optional[int]], columns) -> Dict[int, Row]:
+    """id -> row of (id, columns...), one IN query per IN_CHUNK_SIZE ids"""
+    ids = sorted({id_ for id_ in ids if id_ is not None})
+    rows = {}
+    for offset in range(0, len(ids), IN_CHUNK_SIZE):
+        rows.update(
+            (row.id, row)
+            for row in db.query(model.id, *columns).filter(model.id.in_(ids[offset:offset + IN_CHUNK_SIZE]))
+        )
+    return rows
+
+
+def product_names(db: Session, ids: Iterable[Optional[int]]) -> Dict[int, str]:
+    """id -> name for the given product ids; unknown ids are left out"""
+    return {id_: row.name for id_, row in _lookup(db, Product, ids, (Product.name,)).items()}
+
+
+def competitor_names(db: Session, ids: Iterable[Optional[int]]) -> Dict[int, str]:
+    """id -> name for the given competitor ids; unknown ids are left out"""
+    return {id_: row.name for id_, row in _lookup(db, Competitor, ids, (Competitor.name,)).items()}
+
+
+def product_fields(db: Session, ids: Iterable[Optional[int]], *columns) -> Dict[int, Row]:
+    """
+    id -> row of id plus the given Product columns, e.g.
+    product_fields(db, ids, Product.name, Product.sku)[id].sku; unknown ids are left out
+    """
+    return _lookup(db, Product, ids, columns)
+
+
+def attach_names(db: Session, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Add `product_name` and `competitor_name` to row dicts in place
+
+    Rows need `product_id` and `competitor_id` keys. Costs one query per
+    table however many rows there are; unknown ids get None.
+    """
+    if not rows:
+        return rows
+    products = product_names(db, (row["product_id"] for row in rows))
+    competitors = competitor_names(db, (row["competitor_id"] for row in rows))
+    for row in rows:
+        row["product_name"] = products.get(row["product_id"])
+        row["competitor_name"] = competitors.get(row["competitor_id"])
+    return rows
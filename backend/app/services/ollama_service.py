@@ -1,15 +1,90 @@
 """
 Ollama API Service
 Integration with Ollama for AI-powered features
+
+Completions are cached by content (see llm_cache) and identical requests
+already in flight share one upstream call. Only answers the caller could
+use are cached: failed calls, and replies that don't parse where JSON was
+asked for, fall through to the local fallbacks without being stored.
+
+Upstream calls share one keep-alive client (HTTP/2 when `h2` is installed),
+at most OLLAMA_MAX_CONCURRENCY run at once, 429/5xx and transport errors
+are retried with jittered exponential backoff, and a circuit breaker sends
+callers straight to their fallback while the endpoint keeps failing.
 """
 
+import asyncio
+import json
+import logging
 import os
+import weakref
 import httpx
-from typing import Optional, Dict, List
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Dict, List
 from dotenv import load_dotenv
+from app.services.backoff import full_jitter
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.http_client import HTTP2_AVAILABLE
+from app.services.llm_cache import cache_from_env, completion_key
+from app.services import sentiment
 
 load_dotenv()
 
+logger = logging.getLogger("app.ollama")
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 8.0
+
+
+def parse_json_response(response: str) -> Optional[Dict]:
+    """JSON object from a model reply, tolerating ``` fences; None if it isn't one"""
+    json_str = response.strip()
+    if json_str.startswith("```"):
+        json_str = json_str.split("```")[1]
+        if json_str.startswith("json"):
+            json_str = json_str[4:]
+        json_str = json_str.strip()
+    try:
+        parsed = json.loads(json_str)
+    except ValueError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def completion_content(data: Any) -> str:
+    """
+    Reply text from an OpenAI-style chat completion (or Ollama's native `response`)
+
+    Raises ValueError, or a lookup/type error, for bodies without usable text.
+    """
+    if isinstance(data, dict) and "choices" not in data:
+        content = data.get("response")
+    else:
+        content = data["choices"][0]["message"]["content"]
+    if not isinstance(content, str) or not content:
+        raise ValueError("completion without content")
+    return content
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Full-jitter exponential backoff, or the server's Retry-After (seconds) when it sent one"""
+    if retry_after:
+        try:
+            return min(float(retry_after), RETRY_MAX_SECONDS)
+        except ValueError:
+            pass
+    return full_jitter(attempt, RETRY_BASE_SECONDS, RETRY_MAX_SECONDS)
+
+
+@dataclass
+class _LoopResources:
+    """Client, concurrency limit and in-flight calls; asyncio objects are bound to one event loop"""
+    client: httpx.AsyncClient
+    semaphore: asyncio.Semaphore
+    in_flight: Dict[str, asyncio.Future] = field(default_factory=dict)
+
+
 class OllamaService:
     """Service for interacting with Ollama API"""
     
@@ -25,6 +100,42 @@ class OllamaService:
             "https://api.ollama.ai/v1/chat/completions"
         )
         self.model = os.getenv("OLLAMA_MODEL", "llama3.2")
+        self.cache = cache_from_env()
+        self.max_concurrency = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "8"))
+        self.max_retries = int(os.getenv("OLLAMA_MAX_RETRIES", "2"))
+        self.timeout = httpx.Timeout(float(os.getenv("OLLAMA_TIMEOUT", "30")), connect=5.0)
+        self.http2 = HTTP2_AVAILABLE and os.getenv("OLLAMA_HTTP2", "1") != "0"
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("OLLAMA_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("OLLAMA_BREAKER_RESET_SECONDS", "30")),
+        )
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopResources]" = weakref.WeakKeyDictionary()
+        self.coalesced = 0
+        self.retries = 0
+        self.failures = 0
+    
+    def _resources(self) -> _LoopResources:
+        loop = asyncio.get_running_loop()
+        resources = self._loops.get(loop)
+        if resources is None:
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                http2=self.http2,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            resources = _LoopResources(client, asyncio.Semaphore(self.max_concurrency))
+            self._loops[loop] = resources
+        return resources
+    
+    async def aclose(self) -> None:
+        """Close the pooled client of the running event loop"""
+        resources = self._loops.pop(asyncio.get_running_loop(), None)
+        if resources is not None:
+            await resources.client.aclose()
     
     async def generate_response(
         self,
@@ -33,42 +144,159 @@ class OllamaService:
         temperature: float = 0.7,
         max_tokens: int = 1500
     ) -> Optional[str]:
-        """Generate response using Ollama"""
-        try:
-            messages = []
-            if system_prompt:
-                messages.append({
-                    "role": "system",
-                    "content": system_prompt
-                })
+        """Generate response using Ollama (cached, coalesced with identical in-flight calls)"""
+        return await self._cached_completion(prompt, system_prompt, temperature, max_tokens)
+    
+    async def _generate_json(
+        self,
+        prompt: str,
+        system_prompt: str,
+        temperature: float,
+        required: tuple = (),
+        max_tokens: int = 1500
+    ) -> Optional[Dict]:
+        """Completion parsed as a JSON object with the `required` keys; other replies are not cached"""
+        def parse(response: str) -> Optional[Dict]:
+            parsed = parse_json_response(response)
+            if parsed is None or any(key not in parsed for key in required):
+                return None
+            return parsed
+        
+        response = await self._cached_completion(prompt, system_prompt, temperature, max_tokens, validate=parse)
+        return parse(response) if response else None
+    
+    def cache_stats(self) -> Dict:
+        """LLM cache counters plus calls that joined an identical in-flight request"""
+        stats = self.cache.stats() if self.cache is not None else {"enabled": False}
+        return {**stats, "coalesced": self.coalesced, "in_flight": sum(len(resources.in_flight) for resources in list(self._loops.values()))}
+    
+    async def _cached_completion(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        validate: Optional[Callable[[str], Any]] = None
+    ) -> Optional[str]:
+        key = completion_key(self.model, system_prompt, prompt, temperature, max_tokens)
+        if self.cache is not None:
+            # The cache is a SQLite file; keep its I/O off the event loop
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                return cached
+        
+        calls = self._resources().in_flight
+        in_flight = calls.get(key)
+        if in_flight is None:
+            in_flight = asyncio.ensure_future(
+                self._complete_and_store(key, prompt, system_prompt, temperature, max_tokens, validate)
+            )
+            calls[key] = in_flight
+            in_flight.add_done_callback(lambda _: calls.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shielded so one caller giving up doesn't cancel the call for the others
+        return await asyncio.shield(in_flight)
+    
+    async def _complete_and_store(
+        self,
+        key: str,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        validate: Optional[Callable[[str], Any]]
+    ) -> Optional[str]:
+        response = await self._request_completion(prompt, system_prompt, temperature, max_tokens)
+        if self.cache is not None and response and (validate is None or validate(response) is not None):
+            await asyncio.to_thread(self.cache.put, key, self.model, response)
+        return response
+    
+    async def _request_completion(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int
+    ) -> Optional[str]:
+        """One upstream chat completion with retries; None on failure or while the breaker is open"""
+        if not self.breaker.allow():
+            return None
+        
+        messages = []
+        if system_prompt:
             messages.append({
-                "role": "user",
-                "content": prompt
+                "role": "system",
+                "content": system_prompt
             })
+        messages.append({
+            "role": "user",
+            "content": prompt
+        })
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        
+        try:
+            return await self._post_with_retries(payload)
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+    
+    async def _post_with_retries(self, payload: Dict) -> Optional[str]:
+        resources = self._resources()
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with resources.semaphore:
+                    response = await resources.client.post(self.api_url, json=payload)
+                if response.status_code in RETRY_STATUSES:
+                    retry_after = response.headers.get("Retry-After")
+                    error = f"HTTP {response.status_code}"
+                else:
+                    response.raise_for_status()
+                    content = completion_content(response.json())
+                    self.breaker.record_success()
+                    return content
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+            except (httpx.HTTPStatusError, ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+                # Other 4xx and malformed or empty bodies won't improve on retry
+                self._record_failure(f"{type(e).__name__}: {e}")
+                return None
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.api_url,
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {self.api_key}"
-                    },
-                    json={
-                        "model": self.model,
-                        "messages": messages,
-                        "temperature": temperature,
-                        "max_tokens": max_tokens
-                    }
-                )
-                response.raise_for_status()
-                data = response.json()
-                return data.get("choices", [{}])[0].get("message", {}).get("content") or data.get("response")
-        except Exception as e:
-            print(f"Ollama API error: {str(e)}")
-            return None
+            if attempt < self.max_retries:
+                self.retries += 1
+                delay = retry_delay(attempt, retry_after)
+                logger.info("Ollama call failed (%s), retry %d/%d in %.2fs", error, attempt + 1, self.max_retries, delay)
+                await asyncio.sleep(delay)
+        
+        self._record_failure(error)
+        return None
+    
+    def _record_failure(self, error: str) -> None:
+        self.failures += 1
+        self.breaker.record_failure()
+        logger.warning("Ollama call failed: %s (circuit %s)", error, self.breaker.state)
+    
+    def upstream_stats(self) -> Dict:
+        """Retry/failure counters and circuit breaker state"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "http2": self.http2,
+            "retries": self.retries,
+            "failures": self.failures,
+            "circuit": self.breaker.stats(),
+        }
     
     async def analyze_sentiment(self, text: str) -> Dict:
         """Analyze sentiment of text"""
+        if sentiment.DEFAULT_MODE == "offline":
+            return sentiment.offline_sentiment(text)._asdict()
+        
         prompt = f"""Analyze the sentiment of this review text and return JSON with:
 - sentiment: "positive", "negative", or "neutral"
 - score: number between -1 and 1
@@ -80,36 +308,39 @@ Return only valid JSON."""
         
         system_prompt = "You are a sentiment analysis expert. Return only valid JSON."
         
-        response = await self.generate_response(prompt, system_prompt, temperature=0.3)
+        response = await self._generate_json(prompt, system_prompt, temperature=0.3, required=("sentiment", "score"))
         
-        if response:
-            try:
-                import json
-                # Try to extract JSON from response
-                json_str = response.strip()
-                if json_str.startswith("```"):
-                    json_str = json_str.split("```")[1]
-                    if json_str.startswith("json"):
-                        json_str = json_str[4:]
-                    json_str = json_str.strip()
-                return json.loads(json_str)
-            except:
-                # Fallback sentiment analysis
-                text_lower = text.lower()
-                positive_words = ["good", "great", "excellent", "love", "amazing", "perfect", "best"]
-                negative_words = ["bad", "terrible", "awful", "hate", "worst", "poor", "disappointed"]
-                
-                pos_count = sum(1 for word in positive_words if word in text_lower)
-                neg_count = sum(1 for word in negative_words if word in text_lower)
-                
-                if pos_count > neg_count:
-                    return {"sentiment": "positive", "score": 0.5, "confidence": 0.7}
-                elif neg_count > pos_count:
-                    return {"sentiment": "negative", "score": -0.5, "confidence": 0.7}
-                else:
-                    return {"sentiment": "neutral", "score": 0.0, "confidence": 0.5}
+        if response is not None:
+            return response
         
-        return {"sentiment": "neutral", "score": 0.0, "confidence": 0.5}
+        # Fallback sentiment analysis
+        return sentiment.offline_sentiment(text)._asdict()
+    
+    async def analyze_sentiment_batch(self, texts: List[str]) -> Optional[List[Optional[Dict]]]:
+        """Score several texts in one request; one result (or None) per text, None if the call failed"""
+        items = json.dumps([{"id": index, "text": text} for index, text in enumerate(texts)], ensure_ascii=False)
+        prompt = f"""Analyze the sentiment of each review below. Return JSON of the form
+{{"results": [{{"id": <id>, "sentiment": "positive" | "negative" | "neutral", "score": <-1 to 1>, "confidence": <0 to 1>}}]}}
+with exactly one entry per review id.
+
+Reviews: {items}
+
+Return only valid JSON."""
+        
+        system_prompt = "You are a sentiment analysis expert. Return only valid JSON."
+        
+        response = await self._generate_json(
+            prompt, system_prompt, temperature=0.3, required=("results",),
+            max_tokens=40 * len(texts) + 50
+        )
+        
+        if response is None or not isinstance(response["results"], list):
+            return None
+        by_id = {}
+        for item in response["results"]:
+            if isinstance(item, dict) and isinstance(item.get("id"), int):
+                by_id.setdefault(item["id"], item)
+        return [by_id.get(index) for index in range(len(texts))]
     
     async def generate_pricing_recommendation(
         self,
@@ -139,20 +370,13 @@ Return only valid JSON."""
         
         system_prompt = "You are a pricing strategy expert. Return only valid JSON."
         
-        response = await self.generate_response(prompt, system_prompt, temperature=0.5)
+        response = await self._generate_json(
+            prompt, system_prompt, temperature=0.5,
+            required=("recommended_price", "strategy", "reasoning", "confidence")
+        )
         
-        if response:
-            try:
-                import json
-                json_str = response.strip()
-                if json_str.startswith("```"):
-                    json_str = json_str.split("```")[1]
-                    if json_str.startswith("json"):
-                        json_str = json_str[4:]
-                    json_str = json_str.strip()
-                return json.loads(json_str)
-            except:
-                pass
+        if response is not None:
+            return response
         
         # Fallback recommendation
         if current_price > avg_competitor * 1.1:
@@ -0,0 +1,294 @@
+"""
+Price History Export
+Columnar (Arrow / Parquet) export of price_history for offline analytics
+
+Rows are read from a server-side cursor and converted to Arrow record
+batches of `chunk_size` rows, so neither the export job nor the download
+endpoint ever holds the whole table. Incremental exports resume from a
+high-water mark on price_history.id: ids only grow, so backfilled rows
+with old timestamps are still picked up. On PostgreSQL ids are handed out
+before commit, so a run only goes up to the export horizon - the highest
+id once every insert in flight has committed - and a slow transaction's
+lower id is never passed over.
+"""
+
+import glob
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.models.competitor import Competitor
+from app.models.price_history import PriceHistory
+from app.models.product import Product
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pa_dataset
+except ImportError:  # optional dependency
+    pa = None
+    pa_dataset = None
+
+EXPORT_CHUNK_SIZE = 50000
+WATERMARK_FILE = "_watermark.json"
+FORMATS = ("parquet", "arrow")
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+PRICE_COLUMNS = (
+    PriceHistory.id,
+    PriceHistory.product_id,
+    PriceHistory.competitor_id,
+    PriceHistory.price,
+    PriceHistory.currency,
+    PriceHistory.availability,
+    PriceHistory.sale_price,
+    PriceHistory.discount_percentage,
+    PriceHistory.promotion_active,
+    PriceHistory.timestamp,
+)
+DIMENSION_COLUMNS = (
+    Product.name.label("product_name"),
+    Product.category.label("category"),
+    Product.brand.label("brand"),
+    Competitor.name.label("competitor_name"),
+)
+
+
+def require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("Columnar export needs pyarrow: pip install pyarrow")
+
+
+def export_schema(dimensions: bool = True) -> "pa.Schema":
+    require_pyarrow()
+    fields = [
+        ("id", pa.int64()),
+        ("product_id", pa.int32()),
+        ("competitor_id", pa.int32()),
+        ("price", pa.float64()),
+        ("currency", pa.string()),
+        ("availability", pa.int8()),
+        ("sale_price", pa.float64()),
+        ("discount_percentage", pa.float64()),
+        ("promotion_active", pa.int8()),
+        ("timestamp", pa.timestamp("us")),
+        ("date", pa.date32()),
+    ]
+    if dimensions:
+        fields += [
+            ("product_name", pa.string()),
+            ("category", pa.string()),
+            ("brand", pa.string()),
+            ("competitor_name", pa.string()),
+        ]
+    return pa.schema(fields)
+
+
+def export_query(
+    after_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    dimensions: bool = True,
+    through_id: Optional[int] = None,
+):
+    """price_history rows in id order, optionally joined with product/competitor dimensions"""
+    query = select(*PRICE_COLUMNS, *(DIMENSION_COLUMNS if dimensions else ()))
+    if dimensions:
+        query = query.select_from(PriceHistory).outerjoin(
+            Product, Product.id == PriceHistory.product_id
+        ).outerjoin(
+            Competitor, Competitor.id == PriceHistory.competitor_id
+        )
+    if after_id is not None:
+        query = query.where(PriceHistory.id > after_id)
+    if through_id is not None:
+        query = query.where(PriceHistory.id <= through_id)
+    if product_id is not None:
+        query = query.where(PriceHistory.product_id == product_id)
+    if since is not None:
+        query = query.where(PriceHistory.timestamp >= since)
+    return query.order_by(PriceHistory.id)
+
+
+def iter_record_batches(
+    db: Session,
+    query,
+    schema: "pa.Schema",
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator["pa.RecordBatch"]:
+    """Stream `query` as Arrow record batches of at most `chunk_size` rows"""
+    result = db.execute(query.execution_options(yield_per=chunk_size))
+    keys = list(result.keys())
+    for rows in result.partitions():
+        columns: Dict[str, List] = dict(zip(keys, map(list, zip(*rows))))
+        columns["date"] = [timestamp.date() for timestamp in columns["timestamp"]]
+        yield pa.RecordBatch.from_pydict({name: columns[name] for name in schema.names}, schema=schema)
+
+
+def export_horizon(db: Session) -> Optional[int]:
+    """
+    Highest price_history.id below which no new row can still appear, or None for no limit
+
+    SQLite holds the write lock from insert to commit, so rows become
+    visible in id order. PostgreSQL draws ids from a sequence at insert
+    time: a transaction that commits late lands below ids already visible.
+    Taking a SHARE lock waits for every open insert to commit or roll back
+    (new ones queue briefly behind it), so the max id read under it is
+    safe to advance a watermark to.
+    """
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    with bind.connect() as connection, connection.begin():
+        connection.execute(text("LOCK TABLE price_history IN SHARE MODE"))
+        return connection.execute(select(func.max(PriceHistory.id))).scalar() or 0
+
+
+def read_watermark(directory: str) -> Optional[int]:
+    path = os.path.join(directory, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)["last_id"]
+
+
+def write_watermark(directory: str, last_id: int) -> None:
+    path = os.path.join(directory, WATERMARK_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"last_id": last_id, "exported_at": datetime.utcnow().isoformat()}, f)
+    os.replace(path + ".tmp", path)
+
+
+def export_dataset(
+    db: Session,
+    directory: str,
+    format: str = "parquet",
+    incremental: bool = True,
+    dimensions: bool = True,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Dict:
+    """
+    Write price history under `directory` as a hive-partitioned dataset
+
+    Files land in date=YYYY-MM-DD/ (and category=.../ when dimensions are
+    joined). An incremental run writes part files named after the
+    watermark it resumes from, then advances the watermark; a failed run
+    is retried from the old mark and first deletes what the failed attempt
+    wrote, so no row is exported twice. A full run builds a new dataset in
+    a sibling staging directory and swaps it in once complete, so the old
+    export stays readable until then and no old part file survives.
+    """
+    require_pyarrow()
+    if format not in FORMATS:
+        raise ValueError(f"Unknown export format: {format}")
+    if not incremental:
+        return _export_full(db, directory, format, dimensions, chunk_size)
+    os.makedirs(directory, exist_ok=True)
+    after_id = read_watermark(directory)
+    prefix = f"part-{after_id or 0}-"
+    for path in glob.glob(os.path.join(glob.escape(directory), "**", prefix + "*"), recursive=True):
+        os.remove(path)
+    return _write_export(db, directory, format, dimensions, chunk_size, after_id, prefix)
+
+
+def _export_full(db: Session, directory: str, format: str, dimensions: bool, chunk_size: int) -> Dict:
+    directory = os.path.normpath(directory)
+    staging, retired = directory + ".staging", directory + ".old"
+    for leftover in (staging, retired):
+        shutil.rmtree(leftover, ignore_errors=True)
+    os.makedirs(staging)
+    try:
+        result = _write_export(db, staging, format, dimensions, chunk_size, None, "part-0-")
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    # Readers see the old dataset, then (between the renames) none, then the new one; never a mix
+    if os.path.exists(directory):
+        os.rename(directory, retired)
+    os.rename(staging, directory)
+    shutil.rmtree(retired, ignore_errors=True)
+    return dict(result, directory=directory)
+
+
+def _write_export(
+    db: Session,
+    directory: str,
+    format: str,
+    dimensions: bool,
+    chunk_size: int,
+    after_id: Optional[int],
+    prefix: str,
+) -> Dict:
+    schema = export_schema(dimensions)
+    stats = {"rows": 0, "last_id": after_id}
+    query = export_query(after_id, dimensions=dimensions, through_id=export_horizon(db))
+
+    def batches():
+        for batch in iter_record_batches(db, query, schema, chunk_size):
+            stats["rows"] += batch.num_rows
+            stats["last_id"] = batch.column("id")[-1].as_py()
+            yield batch
+
+    partition_fields = ["date", "category"] if dimensions else ["date"]
+    start = time.perf_counter()
+    pa_dataset.write_dataset(
+        batches(),
+        directory,
+        schema=schema,
+        format="parquet" if format == "parquet" else "ipc",
+        partitioning=pa_dataset.partitioning(
+            pa.schema([schema.field(name) for name in partition_fields]), flavor="hive"
+        ),
+        basename_template=f"{prefix}{{i}}.{'parquet' if format == 'parquet' else 'arrow'}",
+        existing_data_behavior="overwrite_or_ignore",
+        max_rows_per_group=chunk_size,
+    )
+    if stats["rows"]:
+        write_watermark(directory, stats["last_id"])
+    return {
+        "directory": directory,
+        "format": format,
+        "rows": stats["rows"],
+        "after_id": after_id,
+        "last_id": stats["last_id"],
+        "elapsed_seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+class _ChunkSink:
+    """File-like object collecting what the Arrow IPC writer emits, drained after each batch"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def arrow_stream(db: Session, query, schema: "pa.Schema", chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Arrow IPC stream bytes for `query`, one record batch at a time"""
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema)
+    yield sink.drain()
+    for batch in iter_record_batches(db, query, schema, chunk_size):
+        writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
@@ -0,0 +1,297 @@
+"""
+Bulk Price Ingestion
+Incremental NDJSON / CSV / JSON-array decoding and batched PriceHistory inserts
+"""
+
+import codecs
+import csv
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.orm import Session
+
+from app.models.competitor import Competitor
+from app.models.product import Product
+from app.services.price_store import PendingPriceMerge, insert_price_history
+from app.services.write_queue import run_write
+
+DEFAULT_BATCH_SIZE = 10000
+DEFAULT_MERGE_ROWS = 100000
+MAX_REPORTED_ERRORS = 1000
+
+
+class InvalidRecord(NamedTuple):
+    """A record the decoder could not turn into an object"""
+    message: str
+
+
+class NDJSONDecoder:
+    """One JSON object per line"""
+
+    def __init__(self):
+        self._buffer = b""
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        lines = (self._buffer + chunk).split(b"\n")
+        self._buffer = lines.pop()
+        return [self._decode(line) for line in lines if line.strip()]
+
+    def close(self) -> List[Any]:
+        rest, self._buffer = self._buffer, b""
+        return [self._decode(rest)] if rest.strip() else []
+
+    @staticmethod
+    def _decode(line: bytes) -> Any:
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            return InvalidRecord(f"Invalid JSON: {e}")
+
+
+class CSVDecoder:
+    """CSV with a header row; quoted fields may span lines and chunks"""
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        self._partial = ""
+        self._header: Optional[List[str]] = None
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        lines = (self._partial + self._text.decode(chunk)).splitlines(keepends=True)
+        # Only hand complete records to csv: stop at the last line break outside quotes
+        cut, quotes = 0, 0
+        for index, line in enumerate(lines):
+            quotes += line.count('"')
+            if quotes % 2 == 0 and line.endswith(("\n", "\r")):
+                cut = index + 1
+        self._partial = "".join(lines[cut:])
+        return self._rows(lines[:cut])
+
+    def close(self) -> List[Any]:
+        rest = self._partial + self._text.decode(b"", final=True)
+        self._partial = ""
+        return self._rows([rest]) if rest.strip() else []
+
+    def _rows(self, lines: List[str]) -> List[Any]:
+        records = []
+        for values in csv.reader(lines):
+            if not values:
+                continue
+            if self._header is None:
+                self._header = [name.strip() for name in values]
+                continue
+            if len(values) != len(self._header):
+                records.append(InvalidRecord(f"Expected {len(self._header)} columns, got {len(values)}"))
+                continue
+            # Empty cells mean "not given" so model defaults apply
+            records.append({name: value for name, value in zip(self._header, values) if value != ""})
+        return records
+
+
+class JSONArrayDecoder:
+    """A top-level JSON array of objects, decoded element by element as it arrives"""
+
+    _json = json.JSONDecoder()
+
+    def __init__(self):
+        self._bytes = codecs.getincrementaldecoder("utf-8-sig")()
+        self._text = ""
+        self._started = False
+        self._finished = False
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        self._text += self._bytes.decode(chunk)
+        return self._drain()
+
+    def close(self) -> List[Any]:
+        self._text += self._bytes.decode(b"", final=True)
+        records = self._drain()
+        if self._text.strip() or not self._finished:
+            records.append(InvalidRecord("Truncated or malformed JSON array"))
+        self._text = ""
+        return records
+
+    def _drain(self) -> List[Any]:
+        records = []
+        text, position = self._text, 0
+        while not self._finished:
+            while position < len(text) and text[position] in " \t\r\n,":
+                position += 1
+            if position >= len(text):
+                break
+            if not self._started:
+                if text[position] != "[":
+                    raise ValueError("Expected a JSON array")
+                self._started = True
+                position += 1
+                continue
+            if text[position] == "]":
+                self._finished = True
+                position += 1
+                break
+            try:
+                record, position = self._json.raw_decode(text, position)
+            except ValueError:
+                break  # element not complete yet
+            records.append(record)
+        self._text = text[position:]
+        return records
+
+
+DECODERS = {
+    "ndjson": NDJSONDecoder,
+    "csv": CSVDecoder,
+    "json": JSONArrayDecoder,
+}
+
+CONTENT_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json-seq": "ndjson",
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/json": "json",
+}
+
+
+def decoder_for(format: Optional[str] = None, content_type: Optional[str] = None):
+    """Pick a decoder from an explicit format name, else from the Content-Type header"""
+    if not format and content_type:
+        format = CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+    if format not in DECODERS:
+        raise ValueError("Unsupported format; use ndjson, csv or json (or set Content-Type)")
+    return DECODERS[format]()
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+class PriceIngestor:
+    """
+    Validates decoded records and inserts them in large transactions
+
+    Product and competitor ids are loaded once, so foreign keys are checked
+    in memory. Invalid rows are reported by 1-based record number and skipped;
+    they never abort the rest of the batch.
+
+    Latest prices and rollups are merged every `merge_rows` inserted rows
+    and on close() rather than per batch: a feed revisits the same pairs
+    and buckets in every batch, and merging once per window costs one
+    upsert per pair instead of one per batch (~2x the ingest rate). Until
+    then they trail the committed history by up to that many rows; callers
+    must call merge() if they stop before close(), and a crash in between
+    leaves them to manage.py rebuild-latest-prices / rebuild-rollups.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        decoder,
+        row_model: Type[BaseModel],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_errors: int = MAX_REPORTED_ERRORS,
+        merge_rows: int = DEFAULT_MERGE_ROWS,
+    ):
+        self.db = db
+        self.decoder = decoder
+        self.row_model = row_model
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.merge_rows = merge_rows
+        self.product_ids = {product_id for (product_id,) in db.query(Product.id)}
+        self.competitor_ids = {competitor_id for (competitor_id,) in db.query(Competitor.id)}
+        self.received = 0
+        self.inserted = 0
+        self.failed = 0
+        self.batches = 0
+        self.errors: List[Dict[str, Any]] = []
+        self._pending: List[Dict[str, Any]] = []
+        self._unmerged = PendingPriceMerge()
+        self._started = time.perf_counter()
+
+    def feed(self, chunk: bytes) -> None:
+        self.add_records(self.decoder.feed(chunk))
+
+    def close(self) -> Dict[str, Any]:
+        self.add_records(self.decoder.close())
+        self.flush()
+        self.merge()
+        return self.summary()
+
+    def add_records(self, records: List[Any]) -> None:
+        for record in records:
+            self.received += 1
+            row, error = self._validate(record)
+            if error is not None:
+                self._reject(error)
+                continue
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        rows = self._pending
+        ids = run_write(self.db, lambda session: insert_price_history(session, rows))
+        self._unmerged.add(ids, rows)
+        self.inserted += len(self._pending)
+        self.batches += 1
+        self._pending = []
+        if self._unmerged.rows >= self.merge_rows:
+            self.merge()
+
+    def merge(self) -> None:
+        """Bring latest prices and rollups up to date with every row inserted so far"""
+        unmerged = self._unmerged
+        if not unmerged.rows:
+            return
+        run_write(self.db, unmerged.apply)
+        self._unmerged = PendingPriceMerge()
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self._started
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "batches": self.batches,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.received / elapsed) if elapsed > 0 else None,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+    def _validate(self, record: Any):
+        if isinstance(record, InvalidRecord):
+            return None, record.message
+        if not isinstance(record, dict):
+            return None, "Expected an object"
+        try:
+            row = self.row_model.model_validate(record).model_dump()
+        except ValidationError as e:
+            return None, _validation_message(e)
+        if row["product_id"] not in self.product_ids:
+            return None, "Product not found"
+        if row["competitor_id"] not in self.competitor_ids:
+            return None, "Competitor not found"
+        timestamp = row.get("timestamp")
+        if timestamp is None:
+            row["timestamp"] = datetime.utcnow()
+        elif timestamp.tzinfo is not None:
+            # Stored timestamps are naive UTC
+            row["timestamp"] = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        return row, None
+
+    def _reject(self, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": self.received, "error": message})
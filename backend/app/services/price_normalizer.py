@@ -0,0 +1,332 @@
+"""
+Price Normalizer
+Turns scraped price text into amounts, currency and sale/list pairs with precompiled patterns
+
+A price string is scanned once for amounts: a number with an optional
+currency mark before or after it (a symbol, a "US$"-style prefix or an ISO
+code). Separators are resolved per number: when both "." and "," appear
+the last one is the decimal point, a lone separator followed by exactly
+three digits groups thousands ("1.299" is 1299, "12,99" is 12.99) unless
+the locale says it is a decimal point ("1,799 €/l" in de-DE), and
+zero-decimal currencies (JPY, KRW ...) never have decimals. Then:
+
+- two amounts joined by "-", "to", "bis" ... are a range; the low end is the price
+- "was/now", "RRP", "statt" ... or a bare "$249.99 $149.99" pair are a list
+  price and a sale price
+- "2 for $5" is a multi-buy; the price is per unit and the quantity is kept
+- "save $10", "$10 off", shipping charges and percentages are not prices
+
+A text that is one amount and nothing else ("$19.99", "1.299,00 €") is
+matched whole and skips the scan. `normalize_price` parses one string;
+`normalize_prices` returns a batch as NumPy columns. The parsing itself is
+regex work per string and is not vectorized; the batch gains only by
+parsing each distinct string once.
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Currency marks that are not ISO codes; longer marks win over their suffixes ("US$" over "$")
+CURRENCY_SYMBOLS = {
+    '$': 'USD', 'US$': 'USD', 'C$': 'CAD', 'CA$': 'CAD', 'A$': 'AUD', 'AU$': 'AUD', 'NZ$': 'NZD',
+    'HK$': 'HKD', 'S$': 'SGD', 'R$': 'BRL', 'MX$': 'MXN', 'NT$': 'TWD',
+    '€': 'EUR', '£': 'GBP', '¥': 'JPY', 'JP¥': 'JPY', 'CN¥': 'CNY', '元': 'CNY', '円': 'JPY',
+    '₹': 'INR', 'Rs.': 'INR', 'Rs': 'INR', '₩': 'KRW', '₽': 'RUB', '₺': 'TRY', '₪': 'ILS',
+    '₫': 'VND', '฿': 'THB', '₱': 'PHP', '₴': 'UAH', 'zł': 'PLN', 'Kč': 'CZK', 'Ft': 'HUF',
+    'lei': 'RON', 'Fr.': 'CHF',
+}
+# Symbols shared by several currencies: a currency from the page's metadata takes precedence
+AMBIGUOUS_SYMBOLS = frozenset({'$', '¥'})
+ISO_CODES = frozenset({
+    'USD', 'EUR', 'GBP', 'JPY', 'CNY', 'INR', 'KRW', 'RUB', 'TRY', 'ILS', 'VND', 'THB', 'PHP',
+    'UAH', 'PLN', 'CZK', 'HUF', 'RON', 'BGN', 'SEK', 'NOK', 'DKK', 'ISK', 'CHF', 'CAD', 'AUD',
+    'NZD', 'HKD', 'SGD', 'TWD', 'BRL', 'MXN', 'ARS', 'CLP', 'COP', 'ZAR', 'AED', 'SAR', 'IDR', 'MYR',
+})
+# Currencies quoted without minor units, so "¥1.299" and "₩12,000" are always grouped
+ZERO_DECIMAL = frozenset({'JPY', 'KRW', 'VND', 'CLP', 'ISK', 'HUF', 'IDR'})
+# Languages that write "1.234,56"; the rest of the world writes "1,234.56"
+COMMA_DECIMAL_LANGUAGES = frozenset({
+    'de', 'fr', 'es', 'it', 'pt', 'nl', 'da', 'sv', 'nb', 'no', 'fi', 'is', 'pl', 'cs', 'sk', 'sl',
+    'hr', 'sr', 'hu', 'ro', 'bg', 'ru', 'uk', 'be', 'lt', 'lv', 'et', 'el', 'tr', 'id', 'vi', 'az',
+})
+
+_ISO = "|".join(sorted(ISO_CODES))
+_SYMBOL = "|".join(
+    # Marks spelled with letters must not be part of a word ("Ft" in "Ft 12" but not "Soft 12")
+    rf"(?<![^\W\d_]){re.escape(symbol)}(?![^\W\d_])" if symbol[-1].isalpha() else re.escape(symbol)
+    for symbol in sorted(CURRENCY_SYMBOLS, key=len, reverse=True)
+)
+_MARK = rf"(?<![A-Za-z])(?:{_ISO})(?![A-Za-z])|{_SYMBOL}"
+_CURRENCY_MARK = re.compile(_MARK)
+# Digits grouped in lakhs ("1,29,999.00") or thousands ("1.299,00", "1 299,00", "1'299.00"), or a plain number
+_NUMBER = r"\d{1,2}(?:,\d{2})+,\d{3}(?:\.\d+)?|\d{1,3}(?:[.,'’\u00a0\u202f\u2009 ]\d{3})+(?:[.,]\d+)?|\d+(?:[.,]\d+)?"
+_AMOUNT = re.compile(
+    rf"(?:(?P<pre>{_MARK})\s?|(?<![\w.,]))"
+    rf"(?P<number>{_NUMBER})(?:[.,][-–])?"
+    # A trailing mark followed by another number is that number's prefix ("$249.99 $149.99",
+    # "Size 10 $29.99"), unless the number repeats it ("1.299,00 € 999,00 €")
+    rf"(?:\s?(?P<post>{_MARK})(?:(?!\s?\d)|(?(pre)(?!)|(?=\s?(?:{_NUMBER})(?:[.,][-–])?\s?(?P=post))))"
+    r"|(?![\w%]|\s?%))"
+)
+# One amount and nothing else; a mark on both sides ("$12 USD") goes through the scan
+_PLAIN = re.compile(rf"\s*(?:(?P<pre>{_MARK})\s?)?(?P<number>{_NUMBER})(?:[.,][-–])?(?:\s?(?P<post>{_MARK}))?\s*")
+_GROUPING = str.maketrans('', '', "'’\u00a0\u202f\u2009 ")
+
+# What the text just before an amount says about it, as one pattern anchored at the amount
+_PREFIX = re.compile(
+    r"(?:(?P<saving>\bsave|\bsaving|\byou\s+save|\bsparen(?:\s+sie)?|\bersparnis|\béconomisez|\bahorra)"
+    r"|(?P<list>\bwas|\breg(?:ular)?\.?(?:\s+price)?|\blist(?:\s+price)?|\borig(?:inal(?:ly)?)?\.?(?:\s+price)?|"
+    r"\bcompare\s+at|\brrp|\bmsrp|\bmrp|\buvp|\bstatt|\bvorher|\bavant|\bbefore|\binstead\s+of|\bantes|\bde|"
+    r"\bpreviously|通常(?:価格)?)"
+    r"|(?P<sale>\bnow|\bsale(?:\s+price)?|\bonly|\bour\s+price|\bspecial(?:\s+price)?|\bdeal|\bjetzt|\bnur|"
+    r"\bmaintenant|\bahora|\bpor|特価|セール(?:価格)?)"
+    r")[\s:]*$"
+    # "2 for $5", "2/$5", "3 für 10 €"
+    r"|(?<![\w.,])(?P<quantity>\d{1,3})\s*(?:for|für|pour|por|/)\s*$",
+    re.IGNORECASE,
+)
+# Read from the text just after an amount
+_NOT_A_PRICE = re.compile(r"\s*(?:off\b|discount\b|rabatt\b|shipping\b|delivery\b|versand\b)", re.IGNORECASE)
+# What may separate two amounts of a range, or of a bare list/sale pair
+_RANGE_GAP = re.compile(r"\s*(?:-|–|—|~|～|〜|to|bis|à|a|until)\s*", re.IGNORECASE)
+_PAIR_GAP = re.compile(r"[\s|→]*")
+
+
+class NormalizedPrice(NamedTuple):
+    """What a price text says; price is per unit, and the low end of a range"""
+    price: Optional[float] = None
+    sale_price: Optional[float] = None
+    currency: Optional[str] = None
+    price_max: Optional[float] = None  # high end of a range
+    quantity: int = 1  # "2 for $5" is quantity 2 at 2.50
+
+    @property
+    def discount_percentage(self) -> Optional[float]:
+        return discount_percentage(self.price, self.sale_price)
+
+
+class PriceColumns(NamedTuple):
+    """normalize_prices() output, one entry per input text; NaN where a value is missing"""
+    price: np.ndarray
+    sale_price: np.ndarray
+    price_max: np.ndarray
+    quantity: np.ndarray
+    discount_percentage: np.ndarray
+    currency: List[Optional[str]]
+
+
+class _Amount(NamedTuple):
+    value: float
+    currency: Optional[str]
+    marked: Optional[str]  # 'pre' or 'post' for an amount with a currency mark
+    start: int
+    end: int
+    quantity: int
+    label: Optional[str]  # 'list', 'sale' or None
+
+
+def discount_percentage(price: Optional[float], sale_price: Optional[float]) -> Optional[float]:
+    """Percent off the list price, rounded to 2 places; None without a lower sale price"""
+    if price is None or sale_price is None or not price or sale_price >= price:
+        return None
+    return round((price - sale_price) / price * 100, 2)
+
+
+def decimal_separator(locale: Optional[str]) -> Optional[str]:
+    """',' or '.' for a locale such as "de-DE" or "en_US"; None if unknown"""
+    if not locale:
+        return None
+    language = locale.replace('_', '-').split('-', 1)[0].lower()
+    return ',' if language in COMMA_DECIMAL_LANGUAGES else '.'
+
+
+def detect_currency(text: str, currency: Optional[str] = None) -> Optional[str]:
+    """ISO code for the first currency mark in text; `currency` settles shared symbols like '$'"""
+    match = _CURRENCY_MARK.search(text)
+    return _currency_for(match.group() if match else None, currency)
+
+
+def _currency_for(mark: Optional[str], currency: Optional[str]) -> Optional[str]:
+    if mark is None or (currency and mark in AMBIGUOUS_SYMBOLS):
+        return currency
+    return mark if mark in ISO_CODES else CURRENCY_SYMBOLS[mark]
+
+
+def parse_number(number: str, decimal: Optional[str] = None, zero_decimal: bool = False) -> float:
+    """
+    Float for a number as written ("1.299,00", "1,299.00", "1 299", "12,99")
+
+    `decimal` is the locale's decimal separator; it only decides the
+    ambiguous case of one separator followed by exactly three digits.
+    """
+    if number.isdigit():
+        return float(number)
+    digits = number.translate(_GROUPING)
+    dot, comma = digits.rfind('.'), digits.rfind(',')
+    if dot >= 0 and comma >= 0:
+        point = '.' if dot > comma else ','
+    elif dot < 0 and comma < 0:
+        return float(digits)
+    else:
+        separator = '.' if dot >= 0 else ','
+        position = max(dot, comma)
+        if digits.count(separator) > 1:
+            point = None
+        elif len(digits) - position - 1 != 3:
+            point = separator
+        elif zero_decimal:
+            point = None
+        elif decimal is not None:
+            point = separator if separator == decimal else None
+        else:
+            point = separator if digits[:position] == '0' else None
+    if point is None:
+        return float(digits.replace('.', '').replace(',', ''))
+    if point == '.':
+        return float(digits.replace(',', ''))
+    return float(digits.replace('.', '').replace(',', '.'))
+
+
+def normalize_price(text: Optional[str], currency: Optional[str] = None, locale: Optional[str] = None) -> NormalizedPrice:
+    """
+    Parse one scraped price text
+
+    Args:
+        text: Price text as shown on the page
+        currency: ISO code the page declares elsewhere (microdata, meta tags);
+            used when the text has no mark or only a shared symbol like '$'
+        locale: Page locale ("de-DE"); decides "1.299" / "1,299"
+
+    Returns:
+        NormalizedPrice; price is None when the text holds no amount
+    """
+    if not text:
+        return NormalizedPrice(currency=currency)
+    decimal = decimal_separator(locale)
+    plain = _PLAIN.fullmatch(text)
+    if plain and not (plain.group('pre') and plain.group('post')):
+        code = _currency_for(plain.group('pre') or plain.group('post'), currency)
+        return NormalizedPrice(parse_number(plain.group('number'), decimal, code in ZERO_DECIMAL), None, code)
+
+    amounts = _amounts(text, currency, decimal)
+    if not amounts:
+        return NormalizedPrice(currency=currency)
+
+    first = amounts[0]
+    if len(amounts) > 1:
+        second = amounts[1]
+        if _RANGE_GAP.fullmatch(text, first.end, second.start):
+            low, high = sorted((first, second), key=lambda amount: amount.value)
+            return NormalizedPrice(low.value, None, first.currency or second.currency, high.value, low.quantity)
+        if first.label == 'list' or second.label == 'sale':
+            return _pair(first, second)
+        if second.label == 'list' or first.label == 'sale':
+            return _pair(second, first)
+        if _PAIR_GAP.fullmatch(text, first.end, second.start):
+            listed, sale = (first, second) if first.value >= second.value else (second, first)
+            return _pair(listed, sale)
+    return NormalizedPrice(first.value, None, first.currency, None, first.quantity)
+
+
+def _pair(listed: _Amount, sale: _Amount) -> NormalizedPrice:
+    """List and sale price; a "sale" that isn't lower is just the current price"""
+    currency = listed.currency or sale.currency
+    if sale.value < listed.value:
+        return NormalizedPrice(listed.value, sale.value, currency, None, listed.quantity)
+    return NormalizedPrice(sale.value, None, currency, None, sale.quantity)
+
+
+def _amounts(text: str, currency: Optional[str], decimal: Optional[str]) -> List[_Amount]:
+    """Amounts in text order; bare numbers are dropped when any amount carries a currency mark"""
+    amounts: List[_Amount] = []
+    previous_end = 0
+    for match in _AMOUNT.finditer(text):
+        start, end = match.span()
+        if _NOT_A_PRICE.match(text, end):
+            previous_end = end
+            continue
+        # The quantity of "2 for $5" may itself have been read as a bare amount
+        bare = amounts[-1] if amounts and not amounts[-1].marked else None
+        prefix = _PREFIX.search(text, bare.start if bare else previous_end, start)
+        if prefix and prefix.group('saving'):
+            previous_end = end
+            continue
+        mark = match.group('pre') or match.group('post')
+        side = None if mark is None else 'pre' if match.group('pre') else 'post'
+        code = _currency_for(mark, currency)
+        value = parse_number(match.group('number'), decimal, code in ZERO_DECIMAL)
+        quantity, label = 1, None
+        if prefix and prefix.group('quantity'):
+            quantity = int(prefix.group('quantity')) or 1
+            value = round(value / quantity, 2)
+            if bare and bare.start == prefix.start('quantity'):
+                amounts.pop()
+        elif prefix:
+            label = 'list' if prefix.group('list') else 'sale'
+        amounts.append(_Amount(value, code, side, start, end, quantity, label))
+        previous_end = end
+
+    if any(amount.marked for amount in amounts):
+        # "19.99 - 29.99 EUR" and "$10-20": the bare end of a range shares its neighbour's mark
+        amounts = [
+            amount for i, amount in enumerate(amounts)
+            if amount.marked or _marked_range_end(text, amounts, i)
+        ]
+    return amounts
+
+
+def _marked_range_end(text: str, amounts: List[_Amount], i: int) -> bool:
+    """A bare amount joined by a range to a mark on its far side ("Pack of 6 - $12.99" is not a range)"""
+    after = amounts[i + 1] if i + 1 < len(amounts) else None
+    if after is not None and after.marked == 'post' and _RANGE_GAP.fullmatch(text, amounts[i].end, after.start):
+        return True
+    before = amounts[i - 1] if i > 0 else None
+    return before is not None and before.marked == 'pre' and bool(_RANGE_GAP.fullmatch(text, before.end, amounts[i].start))
+
+
+def normalize_prices(
+    texts: Sequence[Optional[str]],
+    currency: Optional[str] = None,
+    locale: Optional[str] = None,
+) -> PriceColumns:
+    """
+    Parse a batch of price texts into columns; same results as normalize_price per text
+
+    Each distinct text goes through normalize_price once (the same "$19.99"
+    on many pages is parsed once); only the discount column is computed
+    with array operations.
+    """
+    unique: Dict[Optional[str], int] = {}
+    index = np.fromiter((unique.setdefault(text, len(unique)) for text in texts), dtype=np.int64, count=len(texts))
+
+    size = len(unique)
+    price = np.full(size, np.nan)
+    sale_price = np.full(size, np.nan)
+    price_max = np.full(size, np.nan)
+    quantity = np.ones(size, dtype=np.int64)
+    currencies: List[Optional[str]] = [currency] * size
+
+    for row, text in enumerate(unique):
+        parsed = normalize_price(text, currency, locale)
+        if parsed.price is not None:
+            price[row] = parsed.price
+            quantity[row] = parsed.quantity
+        if parsed.sale_price is not None:
+            sale_price[row] = parsed.sale_price
+        if parsed.price_max is not None:
+            price_max[row] = parsed.price_max
+        currencies[row] = parsed.currency
+
+    discounted = sale_price < price
+    discount = np.full(size, np.nan)
+    discount[discounted] = np.round((price[discounted] - sale_price[discounted]) / price[discounted] * 100, 2)
+    return PriceColumns(
+        price=price[index],
+        sale_price=sale_price[index],
+        price_max=price_max[index],
+        quantity=quantity[index],
+        discount_percentage=discount[index],
+        currency=[currencies[row] for row in index.tolist()],
+    )
@@ -0,0 +1,222 @@
+"""
+Price Store
+Single place where observed prices are turned into PriceHistory rows
+
+Every write also upserts the pair's LatestPrice row and its hourly/daily
+rollup buckets in the same transaction, so "current price" and long-range
+reads never have to scan history, and invalidates the pair's cached
+responses once the transaction commits. Bulk ingestion is the exception:
+it accumulates those upserts in a PendingPriceMerge and applies them once
+per merge window (see PriceIngestor).
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.orm import Session
+from app.database import executemany_rows, upsert_insert
+from app.models.latest_price import LatestPrice
+from app.models.price_history import PriceHistory
+from app.services.price_normalizer import discount_percentage
+from app.services.response_cache import invalidate_on_commit, price_write_tags
+from app.services.rollups import apply_rollups, merge_buckets, summarize
+from app.services.scraper import ScrapedPage
+
+# Columns copied from the newest PriceHistory row into latest_prices
+LATEST_COLUMNS = (
+    "price", "currency", "availability", "sale_price",
+    "discount_percentage", "promotion_active", "timestamp",
+)
+
+
+def price_history_from_page(page: ScrapedPage, product_id: int, competitor_id: int) -> PriceHistory:
+    """Build a PriceHistory row from every field the scrape extracted"""
+    return PriceHistory(
+        product_id=product_id,
+        competitor_id=competitor_id,
+        price=page.price,
+        currency=page.currency or "USD",
+        availability=1 if page.availability is None else page.availability,
+        sale_price=page.sale_price,
+        discount_percentage=discount_percentage(page.price, page.sale_price),
+        promotion_active=1 if page.sale_price is not None else 0,
+        timestamp=datetime.utcnow()
+    )
+
+
+def already_recorded(db: Session, page: ScrapedPage, product_id: int, competitor_id: int) -> bool:
+    """A 304 means the price is unchanged; skip the insert if this pair already has a row"""
+    if not page.unchanged:
+        return False
+    return db.get(LatestPrice, (product_id, competitor_id)) is not None
+
+
+def latest_recorded_price(db: Session, product_id: int, competitor_id: int) -> Optional[float]:
+    """Most recent stored price for a pair, or None"""
+    return db.query(LatestPrice.price).filter(
+        LatestPrice.product_id == product_id,
+        LatestPrice.competitor_id == competitor_id
+    ).scalar()
+
+
+def upsert_latest_prices(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    Point each pair's latest_prices row at the given PriceHistory rows (caller commits)
+    
+    Rows need id, product_id, competitor_id and LATEST_COLUMNS. An older
+    observation (e.g. a backfill) never replaces a newer one.
+    """
+    if not rows:
+        return
+    table = LatestPrice.__table__
+    statement = upsert_insert(db)(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.product_id, table.c.competitor_id],
+        set_={
+            "price_history_id": statement.excluded.price_history_id,
+            **{column: statement.excluded[column] for column in LATEST_COLUMNS},
+        },
+        where=statement.excluded.timestamp >= table.c.timestamp,
+    )
+    executemany_rows(db.connection(), statement, [
+        {
+            "product_id": row["product_id"],
+            "competitor_id": row["competitor_id"],
+            "price_history_id": row["id"],
+            **{column: row[column] for column in LATEST_COLUMNS},
+        }
+        for row in rows
+    ])
+
+
+def record_price(db: Session, price_history: PriceHistory) -> PriceHistory:
+    """Insert one PriceHistory row and update its pair's latest price and rollups (caller commits)"""
+    if price_history.timestamp is None:
+        price_history.timestamp = datetime.utcnow()
+    db.add(price_history)
+    db.flush()
+    row = {
+        "id": price_history.id,
+        "product_id": price_history.product_id,
+        "competitor_id": price_history.competitor_id,
+        **{column: getattr(price_history, column) for column in LATEST_COLUMNS},
+    }
+    upsert_latest_prices(db, [row])
+    apply_rollups(db, [row])
+    invalidate_on_commit(db, price_write_tags([(row["product_id"], row["competitor_id"])]))
+    return price_history
+
+
+def record_scraped_page(db: Session, page: ScrapedPage, product_id: int, competitor_id: int) -> Optional[PriceHistory]:
+    """
+    Add a PriceHistory row for a successful scrape (caller commits)
+    
+    Returns None when there is no price or the page was unchanged and already stored.
+    """
+    if page.price is None or already_recorded(db, page, product_id, competitor_id):
+        return None
+    return record_price(db, price_history_from_page(page, product_id, competitor_id))
+
+
+def _insert_returning_ids(db: Session, rows: List[Dict[str, Any]]) -> List[int]:
+    """Insert PriceHistory rows with one executemany; returns their ids in row order"""
+    table = PriceHistory.__table__
+    connection = db.connection()
+    if connection.dialect.name == "sqlite":
+        # SQLite holds the write lock for the whole transaction and assigns
+        # rowid = max(rowid) + 1, so the batch gets a contiguous id range.
+        # Plain executemany is ~2x faster than INSERT ... RETURNING here.
+        executemany_rows(connection, insert(table), rows)
+        last_id = connection.execute(text("SELECT last_insert_rowid()")).scalar()
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+    return connection.execute(
+        insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+
+
+class PendingPriceMerge:
+    """
+    Latest prices and rollup buckets owed by inserted PriceHistory rows
+
+    insert_price_history() leaves latest_prices and price_rollups alone; add()
+    folds each batch into one row per pair and one partial bucket per
+    rollup key, and apply() merges them in a single upsert each. Deferring
+    apply() across batches means a pair seen in every batch costs one upsert
+    instead of one per batch. apply() does not clear the pending state, so a
+    write replayed after a rollback merges the same rows again.
+    """
+
+    def __init__(self):
+        self.latest: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        self.buckets: Dict[Tuple, Dict[str, Any]] = {}
+        self.rows = 0
+
+    def add(self, ids: List[int], rows: List[Dict[str, Any]]) -> None:
+        latest = self.latest
+        for row_id, row in zip(ids, rows):
+            key = (row["product_id"], row["competitor_id"])
+            current = latest.get(key)
+            if current is None or row["timestamp"] >= current["timestamp"]:
+                latest[key] = dict(row, id=row_id)
+        summarize(rows, self.buckets)
+        self.rows += len(rows)
+
+    def apply(self, db: Session) -> None:
+        """Upsert the pending latest prices and rollup buckets (caller commits)"""
+        if not self.rows:
+            return
+        upsert_latest_prices(db, list(self.latest.values()))
+        merge_buckets(db, list(self.buckets.values()))
+        invalidate_on_commit(db, price_write_tags(self.latest))
+
+
+def insert_price_history(db: Session, rows: List[Dict[str, Any]]) -> List[int]:
+    """
+    Insert many validated price rows, leaving latest prices and rollups to a PendingPriceMerge (caller commits)
+    
+    Every row must carry every PriceHistory column but id, including
+    timestamp. Goes through the Core table rather than the ORM bulk path,
+    which costs ~2x per row. Returns the new ids in row order.
+    """
+    if not rows:
+        return []
+    ids = _insert_returning_ids(db, rows)
+    invalidate_on_commit(db, price_write_tags({(row["product_id"], row["competitor_id"]) for row in rows}))
+    return ids
+
+
+def insert_price_rows(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """Insert many validated price rows and update latest prices and rollups in the same transaction (caller commits)"""
+    merge = PendingPriceMerge()
+    merge.add(insert_price_history(db, rows), rows)
+    merge.apply(db)
+    return len(rows)
+
+
+def rebuild_latest_prices(db: Session) -> int:
+    """Recompute latest_prices from the full price history (caller commits); returns the row count"""
+    newest_first = func.row_number().over(
+        partition_by=(PriceHistory.product_id, PriceHistory.competitor_id),
+        order_by=(PriceHistory.timestamp.desc(), PriceHistory.id.desc()),
+    ).label("position")
+    ranked = select(
+        PriceHistory.product_id,
+        PriceHistory.competitor_id,
+        PriceHistory.id,
+        *[getattr(PriceHistory, column) for column in LATEST_COLUMNS],
+        newest_first,
+    ).subquery()
+
+    db.execute(delete(LatestPrice))
+    db.execute(
+        insert(LatestPrice).from_select(
+            ["product_id", "competitor_id", "price_history_id", *LATEST_COLUMNS],
+            select(
+                ranked.c.product_id,
+                ranked.c.competitor_id,
+                ranked.c.id,
+                *[ranked.c[column] for column in LATEST_COLUMNS],
+            ).where(ranked.c.position == 1)
+        )
+    )
+    return db.query(func.count()).select_from(LatestPrice).scalar()
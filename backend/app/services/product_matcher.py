@@ -0,0 +1,480 @@
+"""
+Product Matcher
+Links scraped listing titles to catalog products: MinHash/LSH candidate lookup, then weighted token scoring
+
+Titles are reduced to normalized tokens (lowercased, accents folded,
+"128 GB" joined to "128gb", codes like "WH-1000XM5" also kept whole as
+"wh1000xm5"), and each product gets a MinHash signature over the character
+trigrams of its tokens, so word order, casing and small typos barely move
+it (listings are signed on the tokens the catalog uses, so marketing words
+don't dilute them). Signatures are cut into LSH bands with one sorted bucket table per
+band; a listing's candidates are the products sharing a bucket with it,
+found by binary search, so a lookup reads a few buckets instead of the
+whole catalog. Tokens found in only a few products (model numbers) add
+their products through an inverted index, and a catalog SKU or GTIN
+appearing in the listing matches outright.
+
+Candidates are scored by IDF-weighted Dice overlap of tokens. Tokens with
+digits (model numbers, capacities) weigh DIGIT_WEIGHT times more, so
+"128gb" vs "256gb" separates sibling products, and a candidate loses
+BRAND_CONFLICT_PENALTY when the listing names a different catalog brand.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.database import ReadSessionLocal
+from app.models.product import Product
+from app.services.names import product_fields
+
+logger = logging.getLogger("app.product_matcher")
+
+NUM_PERM = 64
+# 16 bands of 4 rows: titles sharing about half their trigrams almost always
+# meet in some bucket, unrelated ones rarely do
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Scored per listing: the candidates sharing the most buckets with it
+MAX_CANDIDATES = 50
+# Tokens in at most this many products (model numbers, rare words) also fetch
+# candidates through the token index
+MAX_POSTINGS = 100
+MIN_SCORE = 0.3
+DIGIT_WEIGHT = 2.0
+BRAND_CONFLICT_PENALTY = 0.5
+BUILD_CHUNK = 4096
+# How often the shared index checks whether the catalog changed
+MATCH_INDEX_CHECK_SECONDS = float(os.getenv("MATCH_INDEX_CHECK_SECONDS", "30"))
+
+STOPWORDS = frozenset("a an and the with for of to by on or new free shipping genuine original".split())
+UNITS = frozenset("gb tb mb mah w kw v mm cm m inch hz khz l ml kg g oz lb mp pcs pack".split())
+UNIT_ALIASES = {"in": "inch", "inches": "inch", "pc": "pcs", "pieces": "pcs"}
+GTIN_LENGTHS = (8, 12, 13, 14)
+
+_TOKEN = re.compile(r"[^\W_]+")
+# Codes written with separators, e.g. "WH-1000XM5", "SM.X710", "USB-C"
+_CODE = re.compile(r"[^\W_]+(?:[-./][^\W_]+)+")
+_NON_ALNUM = re.compile(r"[\W_]+")
+_NUMBER_UNIT = re.compile(r"(\d+)([a-z]+)$")
+
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.RandomState(7)
+_A = _rng.randint(1, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+_BAND_MIX = _rng.randint(1, (1 << 63) - 1, size=ROWS, dtype=np.uint64) | np.uint64(1)
+
+
+class Candidate(NamedTuple):
+    product_id: int
+    score: float  # 0 .. 1
+    matched_on: str  # "sku", "gtin" or "title"
+
+
+def fold(text: str) -> str:
+    """Lowercase with accents stripped ("Kärcher" -> "karcher")"""
+    text = text.lower()
+    if text.isascii():
+        return text
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def _unit(word: str) -> Optional[str]:
+    unit = UNIT_ALIASES.get(word, word)
+    return unit if unit in UNITS else None
+
+
+def title_tokens(title: str) -> List[str]:
+    """Normalized tokens of a title, in order and without repeats"""
+    text = fold(title)
+    words = _TOKEN.findall(text)
+    tokens = []
+    skip = False
+    for index, word in enumerate(words):
+        if skip:
+            skip = False
+            continue
+        if word.isdigit() and index + 1 < len(words) and _unit(words[index + 1]):
+            word += _unit(words[index + 1])
+            skip = True
+        else:
+            number = _NUMBER_UNIT.match(word)
+            if number and _unit(number.group(2)):
+                word = number.group(1) + _unit(number.group(2))
+        if word not in STOPWORDS:
+            tokens.append(word)
+    tokens.extend(_NON_ALNUM.sub("", code) for code in _CODE.findall(text))
+    return list(dict.fromkeys(tokens))
+
+
+def is_gtin(digits: str) -> bool:
+    """True for an 8/12/13/14-digit string with a valid GS1 check digit"""
+    if len(digits) not in GTIN_LENGTHS or not digits.isdigit():
+        return False
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) for i, d in enumerate(reversed(digits[:-1])))
+    return (10 - total % 10) % 10 == int(digits[-1])
+
+
+def identifier_key(code: str) -> Optional[str]:
+    """
+    Comparable form of a SKU/GTIN: folded, separators dropped, GTINs
+    zero-padded to 14 digits. None for codes too generic to trust (under
+    four characters or without a digit)
+    """
+    key = _NON_ALNUM.sub("", fold(code))
+    if len(key) < 4 or not any(c.isdigit() for c in key):
+        return None
+    return key.zfill(14) if is_gtin(key) else key
+
+
+def _shingle_hashes(tokens: Sequence[str]) -> np.ndarray:
+    # Trigrams of each token padded with spaces, so word order doesn't matter
+    grams = {f" {token} "[i:i + 3] for token in tokens for i in range(len(token))}
+    return np.fromiter((zlib.crc32(gram.encode()) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def signatures(token_lists: Sequence[Sequence[str]]) -> np.ndarray:
+    """(titles, NUM_PERM) MinHash signatures; titles without tokens get all _MAX_HASH"""
+    hashes = [_shingle_hashes(tokens) for tokens in token_lists]
+    lengths = np.array([len(values) for values in hashes], dtype=np.int64)
+    result = np.full((len(hashes), NUM_PERM), _MAX_HASH, dtype=np.uint64)
+    nonempty = np.flatnonzero(lengths)
+    if len(nonempty):
+        values = np.concatenate([hashes[i] for i in nonempty])
+        # Universal hashing (a*x + b) mod p; uint64 products wrap, as in datasketch
+        permuted = ((values[:, None] * _A + _B) % _PRIME) & _MAX_HASH
+        starts = np.concatenate(([0], np.cumsum(lengths[nonempty])[:-1]))
+        result[nonempty] = np.minimum.reduceat(permuted, starts, axis=0)
+    return result
+
+
+def band_keys(signature_rows: np.ndarray) -> np.ndarray:
+    """(titles, BANDS) bucket keys: each band's ROWS signature values mixed into 32 bits"""
+    mixed = (signature_rows.reshape(len(signature_rows), BANDS, ROWS) * _BAND_MIX).sum(axis=2, dtype=np.uint64)
+    return (mixed >> np.uint64(32)).astype(np.uint32)
+
+
+class ProductMatcher:
+    """
+    Match index over a snapshot of the catalog
+
+    Holds arrays rather than per-product objects: token ids in CSR layout,
+    a sorted (bucket key, product) table per LSH band and hashed
+    identifiers, plus the token and brand vocabularies.
+    """
+
+    def __init__(self, products: Iterable[Tuple[int, Optional[str], Optional[str], Optional[str]]]):
+        """Index (id, name, brand, sku) rows"""
+        start = time.perf_counter()
+        self.vocabulary: Dict[str, int] = {}
+        brands: Dict[Tuple[str, ...], int] = {}
+        ids, brand_ids, offsets, token_ids = [], [], [0], []
+        identifier_hashes, identifier_positions = [], []
+        keys, chunk = [], []
+        for product_id, name, brand, sku in products:
+            brand_tokens = tuple(title_tokens(brand)) if brand else ()
+            tokens = title_tokens(name or "")
+            tokens += [token for token in brand_tokens if token not in tokens]
+            key = identifier_key(sku) if sku else None
+            if key:
+                # str hashes differ between processes, which is fine for an in-memory index
+                identifier_hashes.append(hash(key))
+                identifier_positions.append(len(ids))
+            ids.append(product_id)
+            brand_ids.append(brands.setdefault(brand_tokens, len(brands)) if brand_tokens else -1)
+            token_ids.extend(self.vocabulary.setdefault(token, len(self.vocabulary)) for token in tokens)
+            offsets.append(len(token_ids))
+            chunk.append(tokens)
+            if len(chunk) == BUILD_CHUNK:
+                keys.append(band_keys(signatures(chunk)))
+                chunk = []
+        if chunk:
+            keys.append(band_keys(signatures(chunk)))
+
+        self.ids = np.array(ids, dtype=np.int64)
+        self.brand_ids = np.array(brand_ids, dtype=np.int32)
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.token_ids = np.array(token_ids, dtype=np.int32)
+        lengths = np.diff(self.offsets)
+
+        # Inverse document frequency, boosted for tokens with digits
+        document_frequency = np.bincount(self.token_ids, minlength=len(self.vocabulary))
+        self.idf = np.log1p(len(ids) / np.maximum(document_frequency, 1))
+        self.idf[[index for token, index in self.vocabulary.items() if any(c.isdigit() for c in token)]] *= DIGIT_WEIGHT
+        self.weights = np.bincount(
+            np.repeat(np.arange(len(ids)), lengths), weights=self.idf[self.token_ids], minlength=len(ids)
+        )
+
+        # Inverted index (token id -> product positions) for rare tokens
+        self.document_frequency = document_frequency
+        self._postings = np.repeat(np.arange(len(ids)), lengths)[np.argsort(self.token_ids, kind="stable")]
+        self._postings_offsets = np.concatenate(([0], np.cumsum(document_frequency)))
+
+        # Per band: bucket keys sorted, and the product positions in that order
+        indexed = np.flatnonzero(lengths)
+        all_keys = np.concatenate(keys) if keys else np.empty((0, BANDS), dtype=np.uint32)
+        self._band_keys, self._band_positions = [], []
+        for band in range(BANDS):
+            column = all_keys[indexed, band]
+            order = np.argsort(column, kind="stable")
+            self._band_keys.append(column[order])
+            self._band_positions.append(indexed[order])
+
+        identifier_order = np.argsort(np.array(identifier_hashes, dtype=np.int64), kind="stable")
+        self._identifier_hashes = np.array(identifier_hashes, dtype=np.int64)[identifier_order]
+        self._identifier_positions = np.array(identifier_positions, dtype=np.int64)[identifier_order]
+
+        self._brands_by_token: Dict[str, List[Tuple[Tuple[str, ...], int]]] = {}
+        for brand_tokens, brand_id in brands.items():
+            self._brands_by_token.setdefault(brand_tokens[0], []).append((brand_tokens, brand_id))
+
+        self.build_seconds = time.perf_counter() - start
+        self._counts = {"listings": 0, "candidates": 0, "identifier_matches": 0}
+
+    @classmethod
+    def from_db(cls, db: Session) -> "ProductMatcher":
+        """Index every product in the database"""
+        return cls(db.execute(select(Product.id, Product.name, Product.brand, Product.sku).order_by(Product.id)))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def candidates(self, token_lists: Sequence[Sequence[str]]) -> List[np.ndarray]:
+        """
+        Product positions sharing an LSH bucket or a rare token with each
+        title, most shared buckets and tokens first, at most MAX_CANDIDATES
+        per title
+
+        The rare-token postings catch short listings ("Sony WH-1000XM5")
+        whose trigram overlap with a longer catalog name is too low for the
+        bands to be reliable.
+        """
+        keys = band_keys(signatures(token_lists))
+        hits: List[List[np.ndarray]] = [[] for _ in token_lists]
+        for row, tokens in enumerate(token_lists):
+            for token in tokens:
+                token_id = self.vocabulary.get(token)
+                if token_id is not None and self.document_frequency[token_id] <= MAX_POSTINGS:
+                    hits[row].append(self._postings[self._postings_offsets[token_id]:self._postings_offsets[token_id + 1]])
+        for band in range(BANDS):
+            sorted_keys = self._band_keys[band]
+            left = np.searchsorted(sorted_keys, keys[:, band], "left")
+            right = np.searchsorted(sorted_keys, keys[:, band], "right")
+            positions = self._band_positions[band]
+            for row in np.flatnonzero(right > left):
+                hits[row].append(positions[left[row]:right[row]])
+        result = []
+        for tokens, found in zip(token_lists, hits):
+            if not tokens or not found:
+                result.append(np.empty(0, dtype=np.int64))
+                continue
+            positions, shared = np.unique(np.concatenate(found), return_counts=True)
+            if len(positions) > MAX_CANDIDATES:
+                positions = positions[np.argsort(-shared, kind="stable")[:MAX_CANDIDATES]]
+            result.append(positions)
+        return result
+
+    def _identifier_matches(self, tokens: Sequence[str]) -> Dict[int, str]:
+        matches = {}
+        for token in tokens:
+            key = identifier_key(token)
+            if key is None:
+                continue
+            left = np.searchsorted(self._identifier_hashes, hash(key), "left")
+            right = np.searchsorted(self._identifier_hashes, hash(key), "right")
+            for position in self._identifier_positions[left:right].tolist():
+                matches[position] = "gtin" if key.isdigit() and is_gtin(key) else "sku"
+        return matches
+
+    def _listing_brands(self, token_set: frozenset) -> List[int]:
+        return [
+            brand_id
+            for token in token_set
+            for brand_tokens, brand_id in self._brands_by_token.get(token, ())
+            if token_set.issuperset(brand_tokens)
+        ]
+
+    def score(self, tokens: Sequence[str], positions: np.ndarray) -> np.ndarray:
+        """IDF-weighted Dice similarity (0 .. 1) of a title's tokens to each product position"""
+        token_set = frozenset(tokens)
+        listing_ids = np.array([self.vocabulary[t] for t in token_set if t in self.vocabulary], dtype=np.int32)
+        if not len(listing_ids) or not len(positions):
+            return np.zeros(len(positions))
+        # Gather every candidate's token ids in one go
+        starts = self.offsets[positions]
+        lengths = self.offsets[positions + 1] - starts
+        ends = np.cumsum(lengths)
+        gathered = self.token_ids[np.arange(ends[-1] if len(ends) else 0) - np.repeat(ends - lengths - starts, lengths)]
+        shared = np.bincount(
+            np.repeat(np.arange(len(positions)), lengths),
+            weights=np.where(np.isin(gathered, listing_ids), self.idf[gathered], 0.0),
+            minlength=len(positions),
+        )
+        scores = 2 * shared / (self.idf[listing_ids].sum() + self.weights[positions])
+        listing_brands = self._listing_brands(token_set)
+        if listing_brands:
+            brand_ids = self.brand_ids[positions]
+            scores[(brand_ids >= 0) & ~np.isin(brand_ids, listing_brands)] *= BRAND_CONFLICT_PENALTY
+        return scores
+
+    def _rank(self, tokens: Sequence[str], positions: np.ndarray, limit: int, min_score: float) -> List[Candidate]:
+        identifiers = self._identifier_matches(tokens)
+        scores = self.score(tokens, positions)
+        ranked = {position: (score, "title") for position, score in zip(positions.tolist(), scores.tolist())}
+        ranked.update((position, (1.0, kind)) for position, kind in identifiers.items())
+        self._counts["listings"] += 1
+        self._counts["candidates"] += len(positions)
+        self._counts["identifier_matches"] += bool(identifiers)
+        best = sorted(
+            ((score, kind, position) for position, (score, kind) in ranked.items() if score >= min_score),
+            key=lambda item: (-item[0], item[2]),
+        )[:limit]
+        return [Candidate(int(self.ids[position]), round(score, 4), kind) for score, kind, position in best]
+
+    def match_many(
+        self, titles: Sequence[Optional[str]], limit: int = 5, min_score: float = MIN_SCORE
+    ) -> List[List[Candidate]]:
+        """Best `limit` candidates (score >= min_score) per title; signatures and bucket lookups run as one batch"""
+        token_lists = [title_tokens(title or "") for title in titles]
+        # Words no product uses ("free shipping", "official store") can't
+        # point at a product; signing only known tokens keeps them from
+        # diluting the listing's trigrams
+        known = [[token for token in tokens if token in self.vocabulary] for tokens in token_lists]
+        return [
+            self._rank(tokens, positions, limit, min_score)
+            for tokens, positions in zip(token_lists, self.candidates(known))
+        ]
+
+    def match(self, title: Optional[str], limit: int = 5, min_score: float = MIN_SCORE) -> List[Candidate]:
+        """Best `limit` candidates for one title"""
+        return self.match_many([title], limit, min_score)[0]
+
+    def match_exhaustive(self, title: str, limit: int = 5, min_score: float = MIN_SCORE) -> List[Candidate]:
+        """Scores every product instead of LSH candidates; the reference for measuring recall"""
+        tokens = title_tokens(title)
+        return self._rank(tokens, np.arange(len(self.ids)), limit, min_score)
+
+    def stats(self) -> Dict:
+        """Index size and build time, plus match counters since it was built"""
+        listings = self._counts["listings"]
+        return {
+            "products": len(self.ids),
+            "vocabulary": len(self.vocabulary),
+            "build_seconds": round(self.build_seconds, 3),
+            **self._counts,
+            "candidates_per_listing": round(self._counts["candidates"] / listings, 1) if listings else 0.0,
+        }
+
+
+def catalog_fingerprint(db: Session) -> tuple:
+    """Changes whenever a product is added, deleted or updated"""
+    return tuple(db.query(func.count(Product.id), func.max(Product.id), func.max(Product.updated_at)).one())
+
+
+class MatcherCache:
+    """
+    One ProductMatcher per process, rebuilt in the background when the catalog changes
+
+    The catalog fingerprint is checked at most every
+    MATCH_INDEX_CHECK_SECONDS (or on the next call after invalidate()).
+    A rebuild (about two minutes at a million products) runs on its own
+    thread and session, and is swapped in when done; until then callers
+    keep matching against the previous index. Only a call with no index
+    yet waits for the build, so the API warms it at startup (warm()).
+    """
+
+    def __init__(self, session_factory=ReadSessionLocal):
+        self.session_factory = session_factory
+        self._lock = threading.Lock()
+        self._matcher: Optional[ProductMatcher] = None
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self._build: Optional[threading.Thread] = None
+
+    def get(self, db: Session) -> ProductMatcher:
+        with self._lock:
+            matcher, fingerprint = self._matcher, self._fingerprint
+            now = time.monotonic()
+            if matcher is not None and now - self._checked_at < MATCH_INDEX_CHECK_SECONDS:
+                return matcher
+            self._checked_at = now
+        if matcher is not None and catalog_fingerprint(db) == fingerprint:
+            return matcher
+        build = self.warm()
+        if matcher is not None:
+            return matcher
+        build.join()
+        with self._lock:
+            if self._matcher is None:
+                raise RuntimeError("Building the product match index failed")
+            return self._matcher
+
+    def warm(self) -> threading.Thread:
+        """Start rebuilding the index in the background unless a build is running; returns its thread"""
+        with self._lock:
+            if self._build is None or not self._build.is_alive():
+                self._build = threading.Thread(target=self._rebuild, name="match-index-build", daemon=True)
+                self._build.start()
+            return self._build
+
+    def invalidate(self) -> None:
+        """Check the catalog on the next get(), e.g. right after a product write"""
+        with self._lock:
+            self._checked_at = 0.0
+
+    def _rebuild(self) -> None:
+        db = self.session_factory()
+        try:
+            # Read first: a product written during the build changes it, so the next check rebuilds
+            fingerprint = catalog_fingerprint(db)
+            matcher = ProductMatcher.from_db(db)
+        except Exception:
+            logger.exception("Building the product match index failed")
+            return
+        finally:
+            db.close()
+        with self._lock:
+            self._matcher, self._fingerprint = matcher, fingerprint
+
+
+matcher_cache = MatcherCache()
+
+
+def match_titles(
+    db: Session, titles: Sequence[Optional[str]], limit: int = 5, min_score: float = MIN_SCORE
+) -> List[List[Dict]]:
+    """
+    Candidates per title as dicts (product_id, name, brand, sku, score,
+    matched_on), from the shared index; product fields come from one IN
+    query per IN_CHUNK_SIZE products (names.product_fields)
+    """
+    results = matcher_cache.get(db).match_many(titles, limit, min_score)
+    products = product_fields(
+        db,
+        (candidate.product_id for candidates in results for candidate in candidates),
+        Product.name, Product.brand, Product.sku,
+    )
+    return [
+        [
+            {
+                "product_id": candidate.product_id,
+                "name": products[candidate.product_id].name,
+                "brand": products[candidate.product_id].brand,
+                "sku": products[candidate.product_id].sku,
+                "score": candidate.score,
+                "matched_on": candidate.matched_on,
+            }
+            for candidate in candidates
+            if candidate.product_id in products  # deleted since the index was built
+        ]
+        for candidates in results
+    ]
@@ -0,0 +1,224 @@
+"""
+Product Search
+Ranked full-text search over product name, brand, description and sku
+
+Backed by the SQLite FTS5 table or the PostgreSQL tsvector column defined
+with the Product model, so a search is an index lookup rather than a
+`LIKE '%x%'` scan of every product. Every query word matches as a prefix
+("sams gal" finds "Samsung Galaxy"); results come back best match first,
+with the matched terms highlighted in the name and a description snippet.
+Name and sku matches outrank brand matches, which outrank description.
+
+Every match is ranked, so ranking cost grows with the number of matches: on
+a million products a term in most of the catalog ("black") takes ~0.2s and
+a common description word ~0.6s, against a few ms for specific queries.
+Setting SEARCH_RANK_CANDIDATES to N > 0 opts in to ranking only the newest
+N matches, which bounds that cost but can miss the best match of a common
+term; queries matching fewer products than N are still ranked exactly.
+"""
+
+import os
+import re
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+from sqlalchemy import bindparam, false, literal_column, select, text
+from sqlalchemy.orm import Session
+from app.models.product import Product, SEARCH_TABLE, SEARCH_VECTOR_COLUMN
+
+HIGHLIGHT_OPEN = "<mark>"
+HIGHLIGHT_CLOSE = "</mark>"
+SNIPPET_WORDS = 12
+MAX_TERMS = 8
+SEARCH_RANK_CANDIDATES = int(os.getenv("SEARCH_RANK_CANDIDATES", "0"))  # 0 = rank every match
+# bm25 column weights, in FTS5 column order: name, brand, description, sku
+SQLITE_WEIGHTS = (10.0, 5.0, 1.0, 10.0)
+
+# Same token boundaries as FTS5's unicode61 tokenizer: runs of letters and digits
+_TERM = re.compile(r"[^\W_]+")
+
+
+def search_terms(query: str) -> List[List[str]]:
+    """
+    Lowercased letter/digit runs of a user query (at most MAX_TERMS),
+    grouped by whitespace-separated word: "SKU-00123 usb" gives
+    [["sku", "00123"], ["usb"]]
+    """
+    terms, count = [], 0
+    for word in query.lower().split():
+        group = _TERM.findall(word)[:MAX_TERMS - count]
+        if group:
+            terms.append(group)
+            count += len(group)
+    return terms
+
+
+def _prefix(group: List[str]) -> bool:
+    # A 1-character prefix matches most of the catalog, so those match exactly
+    return len(group[-1]) > 1
+
+
+def _fts5_query(terms: List[List[str]]) -> str:
+    # Quoted, so terms are never read as FTS5 syntax (AND, NEAR, column:).
+    # A word with several runs ("SKU-00123", "usb-c") is a phrase: it's what
+    # was typed, and a phrase doesn't read the doclist of a token in every
+    # row (like "sku") to rank it.
+    return " ".join('"' + " ".join(group) + '"' + ("*" if _prefix(group) else "") for group in terms)
+
+
+def _tsquery(terms: List[List[str]]) -> str:
+    return " & ".join(" <-> ".join(group) + (":*" if _prefix(group) else "") for group in terms)
+
+
+def search_filter(db: Session, query: str):
+    """WHERE clause keeping products that match `query` (for filtering other product queries)"""
+    terms = search_terms(query)
+    if not terms:
+        return false()
+    if db.get_bind().dialect.name == "postgresql":
+        return literal_column(f"products.{SEARCH_VECTOR_COLUMN}").op("@@")(
+            text("to_tsquery('simple', :search_query)").bindparams(search_query=_tsquery(terms))
+        )
+    return Product.id.in_(
+        text(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :search_query")
+        .bindparams(search_query=_fts5_query(terms))
+        .columns(rowid=Product.id.type)
+    )
+
+
+# bm25 over every match, kept by SQLite's top-N sorter (faster here than
+# FTS5's own `ORDER BY rank`, which resolves the rank function per row).
+# With {candidates} set, FTS5 returns matches newest first straight from
+# the index, so bm25 only runs for the rows the inner LIMIT lets through.
+_SQLITE_RANK = f"""
+    SELECT rowid AS id, -rank AS score FROM (
+        SELECT {SEARCH_TABLE}.rowid AS rowid, bm25({SEARCH_TABLE}, {', '.join(map(str, SQLITE_WEIGHTS))}) AS rank
+        FROM {SEARCH_TABLE} JOIN products ON products.id = {SEARCH_TABLE}.rowid
+        WHERE {SEARCH_TABLE} MATCH :search_query {{filters}}
+        {{candidates}}
+    )
+    ORDER BY rank LIMIT :limit
+"""
+_SQLITE_CANDIDATES = f"ORDER BY {SEARCH_TABLE}.rowid DESC LIMIT :candidates"
+
+# Highlights for the ranked rows in a single pass over the matches: FTS5
+# applies the rowid range itself, and SQLite checks `+rowid IN` before
+# computing highlights. Joining on rowid instead would re-run the MATCH
+# once per row, which for a common prefix means re-reading its whole doclist.
+_SQLITE_HIGHLIGHT = f"""
+    SELECT rowid AS id,
+           highlight({SEARCH_TABLE}, 0, :open, :close) AS name_highlight,
+           snippet({SEARCH_TABLE}, 2, :open, :close, '…', :words) AS snippet
+    FROM {SEARCH_TABLE}
+    WHERE {SEARCH_TABLE} MATCH :search_query AND rowid BETWEEN :first AND :last AND +rowid IN :ids
+"""
+
+_POSTGRES_SEARCH = f"""
+    SELECT ranked.id, ranked.score,
+           ts_headline('simple', ranked.name, ranked.query, :name_options) AS name_highlight,
+           ts_headline('simple', coalesce(ranked.description, ''), ranked.query, :snippet_options) AS snippet
+    FROM (
+        SELECT candidates.*, ts_rank_cd(candidates.{SEARCH_VECTOR_COLUMN}, candidates.query) AS score
+        FROM (
+            SELECT products.id, products.name, products.description, products.{SEARCH_VECTOR_COLUMN}, query
+            FROM products, to_tsquery('simple', :search_query) AS query
+            WHERE products.{SEARCH_VECTOR_COLUMN} @@ query {{filters}}
+            {{candidates}}
+        ) AS candidates
+        ORDER BY score DESC, candidates.id LIMIT :limit
+    ) AS ranked
+    ORDER BY ranked.score DESC, ranked.id
+"""
+_POSTGRES_CANDIDATES = "ORDER BY products.id DESC LIMIT :candidates"
+
+
+def _sqlite_matches(db: Session, search_query: str, filters: str, params: Dict[str, Any]) -> List[Any]:
+    query = _SQLITE_RANK.format(filters=filters, candidates=_SQLITE_CANDIDATES if "candidates" in params else "")
+    ranked = db.execute(text(query), {**params, "search_query": search_query}).all()
+    if not ranked:
+        return []
+    ids = [match.id for match in ranked]
+    highlights = {
+        row.id: row
+        for row in db.execute(
+            text(_SQLITE_HIGHLIGHT).bindparams(bindparam("ids", expanding=True)),
+            {
+                "search_query": search_query, "first": min(ids), "last": max(ids), "ids": ids,
+                "open": HIGHLIGHT_OPEN, "close": HIGHLIGHT_CLOSE, "words": SNIPPET_WORDS,
+            },
+        )
+    }
+    return [
+        SimpleNamespace(
+            id=match.id, score=match.score,
+            name_highlight=highlights[match.id].name_highlight, snippet=highlights[match.id].snippet,
+        )
+        for match in ranked if match.id in highlights
+    ]
+
+
+def search_products(
+    db: Session,
+    query: str,
+    limit: int = 20,
+    category: Optional[str] = None,
+    brand: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Best `limit` matches for `query` as dicts: the product's columns plus
+    score (higher is better), name_highlight and snippet
+
+    Only the top `limit` rows get highlights and snippets, computed after
+    ranking (over every match, or the newest SEARCH_RANK_CANDIDATES if set).
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    filters, params = "", {"limit": limit}
+    if SEARCH_RANK_CANDIDATES > 0:
+        params["candidates"] = max(SEARCH_RANK_CANDIDATES, limit)
+    if category:
+        filters += " AND products.category = :category"
+        params["category"] = category
+    if brand:
+        filters += " AND products.brand = :brand"
+        params["brand"] = brand
+
+    if db.get_bind().dialect.name == "postgresql":
+        marks = f'StartSel="{HIGHLIGHT_OPEN}", StopSel="{HIGHLIGHT_CLOSE}"'
+        params.update(
+            search_query=_tsquery(terms),
+            name_options=f"{marks}, HighlightAll=true",
+            snippet_options=f"{marks}, MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}",
+        )
+        candidates = _POSTGRES_CANDIDATES if "candidates" in params else ""
+        matches = db.execute(text(_POSTGRES_SEARCH.format(filters=filters, candidates=candidates)), params).all()
+    else:
+        matches = _sqlite_matches(db, _fts5_query(terms), filters, params)
+    if not matches:
+        return []
+
+    products = {
+        product.id: product
+        for product in db.execute(select(Product).where(Product.id.in_([match.id for match in matches]))).scalars()
+    }
+    results = []
+    for match in matches:
+        product = products.get(match.id)
+        if product is None:  # deleted since the index was read
+            continue
+        row = {column.name: getattr(product, column.name) for column in Product.__table__.columns}
+        row.update(score=match.score, name_highlight=match.name_highlight, snippet=match.snippet or None)
+        results.append(row)
+    return results
+
+
+def rebuild_search_index(db: Session) -> int:
+    """
+    Re-index every product from the products table (caller commits); returns the product count
+
+    Only needed for SQLite, e.g. after writes with the triggers disabled;
+    PostgreSQL's generated column can't drift.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        db.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+    return db.query(Product).count()
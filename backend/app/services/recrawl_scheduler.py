@@ -0,0 +1,179 @@
+"""
+Adaptive Recrawl Scheduler
+Assigns each (product, competitor) schedule a refresh interval from its observed price volatility
+
+Each listing's price changes are modelled as a Poisson process with rate
+lambda (changes/day), estimated from PriceHistory with a Gamma prior so
+listings with little history start near PRIOR_CHANGES / PRIOR_DAYS.
+
+Polling a listing f times/day detects f * (1 - exp(-lambda / f)) changes/day.
+Maximising the total under a fixed budget sum(f) = B gives every listing the
+same expected changes per visit, i.e. f proportional to lambda. Intervals are
+clamped to [MIN_INTERVAL, MAX_INTERVAL], then the proportionality constant is
+found by bisection so the budget is spent exactly.
+"""
+
+import math
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+import numpy as np
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+from app.models.price_history import PriceHistory
+from app.models.scrape_job import ScrapeJob, JobStatus
+from app.models.scrape_schedule import ScrapeSchedule
+
+SECONDS_PER_DAY = 86400
+MIN_INTERVAL_SECONDS = 15 * 60
+MAX_INTERVAL_SECONDS = 30 * SECONDS_PER_DAY
+PRIOR_CHANGES = 1.0
+PRIOR_DAYS = 30.0
+HISTORY_WINDOW_DAYS = 90
+
+
+def estimate_change_rates(db: Session, window_days: int = HISTORY_WINDOW_DAYS) -> Dict[Tuple[int, int], float]:
+    """Posterior mean price changes/day per (product_id, competitor_id), from one grouped query"""
+    now = datetime.utcnow()
+    since = now - timedelta(days=window_days)
+    previous_price = func.lag(PriceHistory.price).over(
+        partition_by=(PriceHistory.product_id, PriceHistory.competitor_id),
+        order_by=(PriceHistory.timestamp, PriceHistory.id),
+    )
+    observations = select(
+        PriceHistory.product_id,
+        PriceHistory.competitor_id,
+        PriceHistory.timestamp,
+        PriceHistory.price,
+        previous_price.label("previous_price"),
+    ).where(PriceHistory.timestamp >= since).subquery()
+
+    rows = db.execute(
+        select(
+            observations.c.product_id,
+            observations.c.competitor_id,
+            func.sum(case((observations.c.previous_price != observations.c.price, 1), else_=0)),
+            func.min(observations.c.timestamp),
+        ).group_by(observations.c.product_id, observations.c.competitor_id)
+    ).all()
+
+    rates = {}
+    for product_id, competitor_id, changes, first_seen in rows:
+        observed_days = max((now - first_seen).total_seconds() / SECONDS_PER_DAY, 1.0)
+        rates[(product_id, competitor_id)] = (changes + PRIOR_CHANGES) / (observed_days + PRIOR_DAYS)
+    return rates
+
+
+def allocate_frequencies(
+    rates: np.ndarray,
+    budget_per_day: float,
+    min_per_day: float = SECONDS_PER_DAY / MAX_INTERVAL_SECONDS,
+    max_per_day: float = SECONDS_PER_DAY / MIN_INTERVAL_SECONDS,
+) -> np.ndarray:
+    """
+    Fetches/day per listing maximising expected detected changes under the budget
+
+    f_i = clip(rates_i / x, min, max), with x chosen so sum(f) == budget.
+    If even the minimum frequencies exceed the budget, everything gets the minimum.
+    """
+    rates = np.maximum(np.asarray(rates, dtype=float), 1e-9)
+    if len(rates) == 0:
+        return rates
+    if min_per_day * len(rates) >= budget_per_day:
+        return np.full(len(rates), min_per_day)
+    if max_per_day * len(rates) <= budget_per_day:
+        return np.full(len(rates), max_per_day)
+
+    # sum(clip(rates / x)) decreases in x; bisect on log(x)
+    low, high = math.log(rates.min() / max_per_day), math.log(rates.max() / min_per_day)
+    for _ in range(100):
+        mid = (low + high) / 2
+        spent = np.clip(rates / math.exp(mid), min_per_day, max_per_day).sum()
+        if spent > budget_per_day:
+            low = mid
+        else:
+            high = mid
+    return np.clip(rates / math.exp(high), min_per_day, max_per_day)
+
+
+def expected_detections(rates: np.ndarray, frequencies: np.ndarray) -> np.ndarray:
+    """Expected changes detected per day: f * (1 - exp(-lambda / f))"""
+    return frequencies * -np.expm1(-rates / frequencies)
+
+
+def expected_freshness(rates: np.ndarray, frequencies: np.ndarray) -> np.ndarray:
+    """Time-averaged probability the stored price is current: (f / lambda) * (1 - exp(-lambda / f))"""
+    rates = np.maximum(rates, 1e-9)
+    return frequencies / rates * -np.expm1(-rates / frequencies)
+
+
+def rebalance(db: Session, budget_per_day: float) -> Dict:
+    """Re-estimate change rates and rewrite the interval of every active adaptive schedule"""
+    schedules = db.query(ScrapeSchedule).filter(
+        ScrapeSchedule.is_active == 1,
+        ScrapeSchedule.is_adaptive == 1
+    ).order_by(ScrapeSchedule.id).all()
+    if not schedules:
+        return schedule_metrics(db, budget_per_day)
+
+    estimated = estimate_change_rates(db)
+    default_rate = PRIOR_CHANGES / PRIOR_DAYS
+    rates = np.array([
+        estimated.get((s.product_id, s.competitor_id), default_rate) for s in schedules
+    ])
+    # Fixed (non-adaptive) schedules spend part of the budget first
+    fixed_spend = sum(
+        SECONDS_PER_DAY / s.interval_seconds
+        for s in db.query(ScrapeSchedule).filter(
+            ScrapeSchedule.is_active == 1,
+            ScrapeSchedule.is_adaptive == 0
+        )
+    )
+    frequencies = allocate_frequencies(rates, max(budget_per_day - fixed_spend, 0.0))
+
+    now = datetime.utcnow()
+    for schedule, rate, frequency in zip(schedules, rates, frequencies):
+        interval = int(round(SECONDS_PER_DAY / frequency))
+        schedule.change_rate = float(rate)
+        schedule.interval_seconds = interval
+        # Pull the next run forward if the new interval is shorter
+        earliest = now + timedelta(seconds=interval)
+        if schedule.next_run_at is None or schedule.next_run_at > earliest:
+            schedule.next_run_at = earliest
+    db.commit()
+    return schedule_metrics(db, budget_per_day)
+
+
+def schedule_metrics(db: Session, budget_per_day: Optional[float] = None) -> Dict:
+    """Planned spend and expected freshness/detections, alongside what the worker actually did in the last 24h"""
+    schedules = db.query(
+        ScrapeSchedule.interval_seconds,
+        ScrapeSchedule.change_rate
+    ).filter(ScrapeSchedule.is_active == 1).all()
+
+    default_rate = PRIOR_CHANGES / PRIOR_DAYS
+    rates = np.array([rate if rate is not None else default_rate for _, rate in schedules], dtype=float)
+    frequencies = np.array([SECONDS_PER_DAY / interval for interval, _ in schedules], dtype=float)
+
+    since = datetime.utcnow() - timedelta(days=1)
+    fetched, changed = db.query(
+        func.count(ScrapeJob.id),
+        func.coalesce(func.sum(ScrapeJob.price_changed), 0)
+    ).filter(
+        ScrapeJob.schedule_id.isnot(None),
+        ScrapeJob.status == JobStatus.SUCCEEDED,
+        ScrapeJob.finished_at >= since
+    ).one()
+
+    has_schedules = len(schedules) > 0
+    return {
+        "schedules": len(schedules),
+        "budget_per_day": budget_per_day,
+        "planned_requests_per_day": round(float(frequencies.sum()), 2),
+        "expected_changes_detected_per_day": round(float(expected_detections(rates, frequencies).sum()), 2) if has_schedules else 0.0,
+        "expected_changes_per_day": round(float(rates.sum()), 2),
+        "expected_freshness": round(float(expected_freshness(rates, frequencies).mean()), 4) if has_schedules else None,
+        "requests_last_24h": fetched,
+        "changes_detected_last_24h": int(changed),
+        "changes_per_request_last_24h": round(changed / fetched, 4) if fetched else None,
+    }
+
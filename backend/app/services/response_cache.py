@@ -0,0 +1,300 @@
+"""
+Response Cache
+Serialized read-endpoint responses keyed by endpoint parameters, invalidated by tags on writes
+
+Entries carry tags such as "product:12", "competitor:3" or "prices". Code
+that writes price data calls `invalidate_on_commit(db, tags)`; the tags are
+collected on the session and dropped from the cache only once the
+transaction commits, so a rolled-back write never evicts anything and a
+reader can never re-cache data the writer has not committed yet.
+
+Every tag also has a version that invalidation bumps. A response computed
+while one of its tags was invalidated is not stored, which closes the race
+between a slow read and a concurrent write.
+
+The in-process backend (LRU + TTL) only sees writes made by this process;
+set REDIS_URL to share the cache, and its invalidations, with the scrape
+workers and other API processes. The TTL also bounds how stale
+"last N days" windows can get.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+try:
+    import redis
+except ImportError:  # optional dependency
+    redis = None
+
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_MAX_ENTRIES = 1024
+PENDING_TAGS_KEY = "response_cache_tags"
+
+# Tags shared by every price write and by product/competitor edits
+PRICES_TAG = "prices"
+PRODUCTS_TAG = "products"
+
+
+def product_tag(product_id: int) -> str:
+    return f"product:{product_id}"
+
+
+def competitor_tag(competitor_id: int) -> str:
+    return f"competitor:{competitor_id}"
+
+
+def price_write_tags(pairs: Iterable) -> Set[str]:
+    """Tags touched by new prices for (product_id, competitor_id) pairs"""
+    tags = {PRICES_TAG}
+    for product_id, competitor_id in pairs:
+        tags.add(product_tag(product_id))
+        tags.add(competitor_tag(competitor_id))
+    return tags
+
+
+def cache_key(name: str, params: Dict) -> str:
+    """Stable key for an endpoint and its parsed parameters"""
+    return f"{name}?{json.dumps(params, sort_keys=True, default=str)}"
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def make_entry(body: bytes) -> CachedResponse:
+    return CachedResponse(body, '"' + hashlib.sha1(body).hexdigest() + '"')
+
+
+class CacheStats:
+    FIELDS = ("hits", "misses", "stores", "stale_skips", "evictions", "expirations", "invalidations")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, field: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counts[field] += amount
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+
+class MemoryBackend:
+    """Thread-safe LRU with per-entry TTL and a tag -> keys index"""
+    name = "memory"
+
+    def __init__(self, stats: CacheStats, ttl: float, max_entries: int):
+        self.stats = stats
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (entry, expires_at, tags)
+        self._tags: Dict[str, Set[str]] = {}
+        self._versions: Dict[str, int] = {}
+
+    def _drop(self, key: str) -> None:
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[1] <= time.monotonic():
+                self._drop(key)
+                self.stats.add("expirations")
+                return None
+            self._entries.move_to_end(key)
+            return item[0]
+
+    def versions(self, tags: List[str]) -> List[int]:
+        with self._lock:
+            return [self._versions.get(tag, 0) for tag in tags]
+
+    def set(self, key: str, entry: CachedResponse, tags: List[str], versions: List[int]) -> bool:
+        with self._lock:
+            if [self._versions.get(tag, 0) for tag in tags] != versions:
+                return False
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (entry, time.monotonic() + self.ttl, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.stats.add("evictions")
+            return True
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        dropped = 0
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+                for key in list(self._tags.get(tag, ())):
+                    self._drop(key)
+                    dropped += 1
+        return dropped
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisBackend:
+    """
+    Shared cache in Redis: entries expire via TTL, eviction is Redis' own
+    (configure maxmemory-policy), tag sets and versions live next to them
+    """
+    name = "redis"
+
+    def __init__(self, stats: CacheStats, ttl: float, url: str, prefix: str = "pricing:cache:"):
+        self.stats = stats
+        self.ttl = max(int(ttl), 1)
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+
+    def _entry_key(self, key: str) -> str:
+        return self.prefix + "entry:" + key
+
+    def _tag_key(self, tag: str) -> str:
+        return self.prefix + "tag:" + tag
+
+    def _version_key(self, tag: str) -> str:
+        return self.prefix + "version:" + tag
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        values = self.client.hmget(self._entry_key(key), "body", "etag")
+        if values[0] is None:
+            return None
+        return CachedResponse(values[0], values[1].decode())
+
+    def versions(self, tags: List[str]) -> List[int]:
+        if not tags:
+            return []
+        return [int(value or 0) for value in self.client.mget([self._version_key(tag) for tag in tags])]
+
+    def set(self, key: str, entry: CachedResponse, tags: List[str], versions: List[int]) -> bool:
+        entry_key = self._entry_key(key)
+        version_keys = [self._version_key(tag) for tag in tags]
+        with self.client.pipeline() as pipe:
+            try:
+                # Optimistic check: abort if any tag is invalidated before EXEC
+                if version_keys:
+                    pipe.watch(*version_keys)
+                    if [int(value or 0) for value in pipe.mget(version_keys)] != versions:
+                        return False
+                pipe.multi()
+                pipe.hset(entry_key, mapping={"body": entry.body, "etag": entry.etag})
+                pipe.expire(entry_key, self.ttl)
+                for tag in tags:
+                    pipe.sadd(self._tag_key(tag), entry_key)
+                    pipe.expire(self._tag_key(tag), self.ttl)
+                pipe.execute()
+                return True
+            except redis.WatchError:
+                return False
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        dropped = 0
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            with self.client.pipeline() as pipe:
+                pipe.incr(self._version_key(tag))
+                pipe.smembers(tag_key)
+                pipe.delete(tag_key)
+                _, keys, _ = pipe.execute()
+            if keys:
+                dropped += self.client.delete(*keys)
+        return dropped
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def size(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "entry:*"))
+
+
+class ResponseCache:
+    def __init__(self, ttl: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES, redis_url: Optional[str] = None):
+        self.enabled = ttl > 0
+        self.stats = CacheStats()
+        if redis_url and redis is not None:
+            self.backend = RedisBackend(self.stats, ttl, redis_url)
+        else:
+            self.backend = MemoryBackend(self.stats, ttl, max_entries)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self.backend.get(key) if self.enabled else None
+        self.stats.add("hits" if entry is not None else "misses")
+        return entry
+
+    def versions(self, tags: List[str]) -> List[int]:
+        return self.backend.versions(tags) if self.enabled else []
+
+    def set(self, key: str, body: bytes, tags: List[str], versions: List[int]) -> CachedResponse:
+        """Store `body` unless one of `tags` was invalidated since `versions` was read"""
+        entry = make_entry(body)
+        if self.enabled:
+            self.stats.add("stores" if self.backend.set(key, entry, tags, versions) else "stale_skips")
+        return entry
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        if self.enabled:
+            self.stats.add("invalidations", self.backend.invalidate(tags))
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def info(self) -> Dict:
+        return {
+            "backend": self.backend.name,
+            "enabled": self.enabled,
+            "entries": self.backend.size() if self.enabled else 0,
+            **self.stats.snapshot(),
+        }
+
+
+cache = ResponseCache(
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    redis_url=os.getenv("REDIS_URL"),
+)
+
+
+def invalidate_on_commit(db: Session, tags: Iterable[str]) -> None:
+    """Drop entries carrying any of `tags` once `db` commits"""
+    db.info.setdefault(PENDING_TAGS_KEY, set()).update(tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    tags = session.info.pop(PENDING_TAGS_KEY, None)
+    if tags:
+        cache.invalidate(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(PENDING_TAGS_KEY, None)
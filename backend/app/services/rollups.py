@@ -0,0 +1,136 @@
+"""
+Price Rollups
+Hourly and daily OHLC buckets kept up to date as prices are recorded
+
+Each batch of new observations is first reduced in Python to one partial
+bucket per (resolution, product, competitor, bucket_start), then merged
+into price_rollups with a single INSERT ... ON CONFLICT DO UPDATE. Merging
+keeps high/low/sum/counts exact, and open/close follow the observation
+timestamps so late or backfilled rows land correctly.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import case, delete, select
+from sqlalchemy.orm import Session
+from app.database import executemany_rows, upsert_insert
+from app.models.price_history import PriceHistory
+from app.models.price_rollup import PriceRollup
+
+RESOLUTIONS = ("hour", "day")
+REBUILD_CHUNK_SIZE = 50000
+
+
+def bucket_start(timestamp: datetime, resolution: str) -> datetime:
+    """Start of the hour/day bucket containing `timestamp`"""
+    if resolution == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if resolution == "day":
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown resolution: {resolution}")
+
+
+def summarize(
+    rows: Iterable[Dict[str, Any]],
+    buckets: Optional[Dict[Tuple, Dict[str, Any]]] = None,
+) -> Dict[Tuple, Dict[str, Any]]:
+    """
+    Reduce observations to one partial bucket per resolution and key
+
+    Rows need product_id, competitor_id, price, timestamp, availability
+    and promotion_active. Folds into `buckets` when given, so partial
+    buckets can be accumulated over several batches and merged once.
+    """
+    if buckets is None:
+        buckets = {}
+    for row in rows:
+        price, timestamp = row["price"], row["timestamp"]
+        promo = 1 if row.get("promotion_active") else 0
+        out_of_stock = 1 if row.get("availability") == 0 else 0
+        hour = timestamp.replace(minute=0, second=0, microsecond=0)
+        for key in (
+            ("hour", row["product_id"], row["competitor_id"], hour),
+            ("day", row["product_id"], row["competitor_id"], hour.replace(hour=0)),
+        ):
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = {
+                    "resolution": key[0],
+                    "product_id": key[1],
+                    "competitor_id": key[2],
+                    "bucket_start": key[3],
+                    "open_price": price,
+                    "high_price": price,
+                    "low_price": price,
+                    "close_price": price,
+                    "opened_at": timestamp,
+                    "closed_at": timestamp,
+                    "price_sum": price,
+                    "price_count": 1,
+                    "promo_count": promo,
+                    "out_of_stock_count": out_of_stock,
+                }
+                continue
+            if price > bucket["high_price"]:
+                bucket["high_price"] = price
+            if price < bucket["low_price"]:
+                bucket["low_price"] = price
+            if timestamp < bucket["opened_at"]:
+                bucket["open_price"], bucket["opened_at"] = price, timestamp
+            if timestamp >= bucket["closed_at"]:
+                bucket["close_price"], bucket["closed_at"] = price, timestamp
+            bucket["price_sum"] += price
+            bucket["price_count"] += 1
+            bucket["promo_count"] += promo
+            bucket["out_of_stock_count"] += out_of_stock
+    return buckets
+
+
+def apply_rollups(db: Session, rows: Iterable[Dict[str, Any]]) -> int:
+    """Merge new observations into price_rollups (caller commits); returns buckets touched"""
+    return merge_buckets(db, list(summarize(rows).values()))
+
+
+def merge_buckets(db: Session, buckets: List[Dict[str, Any]]) -> int:
+    """Merge partial buckets from summarize() into price_rollups (caller commits); returns buckets touched"""
+    if not buckets:
+        return 0
+    table = PriceRollup.__table__
+    statement = upsert_insert(db)(table)
+    new, old = statement.excluded, table.c
+    statement = statement.on_conflict_do_update(
+        index_elements=[old.resolution, old.product_id, old.competitor_id, old.bucket_start],
+        set_={
+            "high_price": case((new.high_price > old.high_price, new.high_price), else_=old.high_price),
+            "low_price": case((new.low_price < old.low_price, new.low_price), else_=old.low_price),
+            "open_price": case((new.opened_at < old.opened_at, new.open_price), else_=old.open_price),
+            "opened_at": case((new.opened_at < old.opened_at, new.opened_at), else_=old.opened_at),
+            "close_price": case((new.closed_at >= old.closed_at, new.close_price), else_=old.close_price),
+            "closed_at": case((new.closed_at >= old.closed_at, new.closed_at), else_=old.closed_at),
+            "price_sum": old.price_sum + new.price_sum,
+            "price_count": old.price_count + new.price_count,
+            "promo_count": old.promo_count + new.promo_count,
+            "out_of_stock_count": old.out_of_stock_count + new.out_of_stock_count,
+        },
+    )
+    executemany_rows(db.connection(), statement, buckets)
+    return len(buckets)
+
+
+def rebuild_rollups(db: Session) -> int:
+    """Recompute price_rollups from the full price history (caller commits); returns bucket count"""
+    db.execute(delete(PriceRollup))
+    columns = (
+        PriceHistory.product_id,
+        PriceHistory.competitor_id,
+        PriceHistory.price,
+        PriceHistory.timestamp,
+        PriceHistory.availability,
+        PriceHistory.promotion_active,
+    )
+    result = db.execute(
+        select(*columns).order_by(PriceHistory.id).execution_options(yield_per=REBUILD_CHUNK_SIZE)
+    )
+    for chunk in result.mappings().partitions():
+        apply_rollups(db, chunk)
+    return db.query(PriceRollup).count()
@@ -4,21 +4,161 @@ Basic foundation for price scraping
 """
 
 import requests
-from bs4 import BeautifulSoup
-from typing import Optional, Dict, List
-import time
-import random
+from typing import Optional, Dict, List, Tuple
+from dataclasses import dataclass, asdict, replace
+import asyncio
 from urllib.parse import urljoin, urlparse
+from app.services.html_parser import ExtractionPlan, FieldMatch, get_backend
+from app.services.http_client import HostSessionPool, ValidatorCache
+from app.services.price_normalizer import normalize_price
+
+# Default selectors per field, tried in order
+PRICE_SELECTORS = [
+    '[data-price]',
+    '.price',
+    '.product-price',
+    '[class*="price"]',
+    '[itemprop="price"]',
+]
+SALE_PRICE_SELECTORS = ['.sale-price', '.price-sale', '.special-price', '[data-sale-price]']
+TITLE_SELECTORS = ['h1', '[itemprop="name"]', '.product-title', 'title']
+IMAGE_SELECTORS = ['[itemprop="image"]', '.product-image img', 'img[src*="product"]']
+CURRENCY_SELECTORS = ['[itemprop="priceCurrency"]', 'meta[property="product:price:currency"]']
+AVAILABILITY_SELECTORS = ['[itemprop="availability"]', '.availability', '.stock', '[class*="stock"]']
+# Page language; decides whether "1.299" is 1299 or 1.299
+LOCALE_SELECTORS = ['html[lang]', 'meta[property="og:locale"]', 'meta[http-equiv="content-language"]']
+
+FIELD_SELECTORS = {
+    'price': PRICE_SELECTORS,
+    'sale_price': SALE_PRICE_SELECTORS,
+    'currency': CURRENCY_SELECTORS,
+    'availability': AVAILABILITY_SELECTORS,
+    'title': TITLE_SELECTORS,
+    'image': IMAGE_SELECTORS,
+    'locale': LOCALE_SELECTORS,
+}
+# Fields read from attributes alone; their text is never extracted
+ATTRIBUTE_FIELDS = ('locale',)
+# What parse_price needs: the price plus the currency and locale that decide how it reads
+PRICE_FIELDS = ('price', 'currency', 'locale')
+
+OUT_OF_STOCK_MARKERS = ('outofstock', 'out of stock', 'sold out', 'unavailable', 'soldout')
+
+
+@dataclass
+class ScrapedPage:
+    """All fields extracted from one product page"""
+    url: str
+    price: Optional[float] = None
+    sale_price: Optional[float] = None
+    currency: Optional[str] = None
+    availability: Optional[int] = None  # 1 = in stock, 0 = out of stock
+    title: Optional[str] = None
+    image: Optional[str] = None
+    unchanged: bool = False  # server answered 304; fields are from the previous scrape
+    error: Optional[str] = None  # fetch error, if the page could not be downloaded
+
+    def product_info(self) -> Dict:
+        """Legacy get_product_info() shape"""
+        return {
+            'title': self.title or 'Unknown Product',
+            'image': self.image,
+            'url': self.url
+        }
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
 
 class PriceScraper:
     """Basic web scraper for price extraction"""
     
-    def __init__(self):
+    def __init__(self, parser: Optional[str] = None):
+        # Fastest installed HTML parser unless one is named (or set via SCRAPER_PARSER)
+        self.backend = get_backend(parser)
+        self._plans: Dict[tuple, ExtractionPlan] = {}
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
         }
+        # Keep-alive pool per competitor host, and ETag/Last-Modified per URL
+        self.sessions = HostSessionPool(self.headers)
+        self.validators = ValidatorCache()
+    
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """GET a page over the host's pooled session, raising on HTTP errors (304 is not an error)"""
+        response = self.sessions.session_for(url).get(url, headers=headers, timeout=10)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+    
+    def scrape_page(self, url: str, selectors: Optional[Dict[str, str]] = None) -> ScrapedPage:
+        """
+        Fetch a URL once and extract every field from a single parse
+        
+        Sends If-None-Match / If-Modified-Since when the URL was scraped before
+        with the same selectors; on 304 the previous result is returned with
+        `unchanged=True`.
+        
+        Args:
+            url: URL to scrape
+            selectors: Optional dict with CSS selectors for price extraction
+        
+        Returns:
+            ScrapedPage; fields that could not be extracted are None
+        """
+        key = self.plan_key(selectors)
+        try:
+            response = self.fetch(url, self.validators.conditional_headers(url, key))
+            if response.status_code == 304:
+                cached = self.validators.get(url, key)
+                if cached is not None and cached.page is not None:
+                    # Nothing changed upstream: skip download and parsing entirely
+                    return replace(cached.page, unchanged=True)
+                response = self.fetch(url)
+        except Exception as e:
+            print(f"Error scraping {url}: {str(e)}")
+            return ScrapedPage(url=url, error=str(e))
+        page = self.extract_page(response.content, url, selectors)
+        self.validators.store(url, response.headers, page, key)
+        return page
+    
+    def extract_page(self, content, url: str, selectors: Optional[Dict[str, str]] = None) -> ScrapedPage:
+        """Parse already downloaded HTML once and run all field extractors over it"""
+        matches = self.plan_for(selectors).run(content)
+        page = ScrapedPage(url=url)
+        
+        currency, locale = self._price_context(matches)
+        price_match = matches.get('price')
+        if price_match and price_match.text:
+            # "Was $249.99 Now $149.99" in one element fills both prices
+            parsed = normalize_price(price_match.text, currency, locale)
+            page.price, page.sale_price = parsed.price, parsed.sale_price
+            currency = currency or parsed.currency
+        
+        sale_match = matches.get('sale_price')
+        if sale_match:
+            parsed = normalize_price(sale_match.attrs.get('data-sale-price') or sale_match.text, currency, locale)
+            sale_price = parsed.price if parsed.sale_price is None else parsed.sale_price
+            if sale_price is not None and (page.price is None or sale_price < page.price):
+                page.sale_price = sale_price
+            currency = currency or parsed.currency
+        
+        page.currency = currency
+        page.availability = self._extract_availability(matches.get('availability'))
+        
+        title_match = matches.get('title')
+        if title_match:
+            page.title = title_match.text
+        
+        image_match = matches.get('image')
+        if image_match:
+            image = image_match.attrs.get('src') or image_match.attrs.get('data-src')
+            if image:
+                page.image = urljoin(url, image)
+        
+        return page
     
     def scrape_price(self, url: str, selectors: Optional[Dict[str, str]] = None) -> Optional[float]:
         """
@@ -31,113 +171,111 @@ class PriceScraper:
         Returns:
             Price as float or None
         """
-        try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Try common price selectors if not provided
-            if not selectors:
-                selectors = [
-                    '[data-price]',
-                    '.price',
-                    '.product-price',
-                    '[class*="price"]',
-                    '[itemprop="price"]',
-                ]
-            
-            # Try to find price
-            price_text = None
-            if isinstance(selectors, dict):
-                for selector_type, selector in selectors.items():
-                    element = soup.select_one(selector)
-                    if element:
-                        price_text = element.get_text(strip=True)
-                        break
-            else:
-                for selector in selectors:
-                    element = soup.select_one(selector)
-                    if element:
-                        price_text = element.get_text(strip=True)
-                        break
-            
-            if price_text:
-                # Extract numeric value
-                price = self._extract_price(price_text)
-                return price
-            
+        return self.scrape_page(url, selectors).price
+    
+    def parse_price(self, content, selectors: Optional[Dict[str, str]] = None) -> Optional[float]:
+        """
+        Extract only the price from an already downloaded page
+        
+        Reads the page's currency and locale as well, so "1,799 €" on a
+        de-DE page comes out as 1.799 here too. Uses early-exit streaming
+        where the backend supports it: tokenizing stops as soon as the
+        top-priority selector of each of those fields has matched.
+        
+        Args:
+            content: Raw HTML (bytes or str)
+            selectors: Optional dict with CSS selectors for price extraction
+        
+        Returns:
+            Price as float or None
+        """
+        matches = self.plan_for(selectors, fields=PRICE_FIELDS).run(content, early_exit=True)
+        match = matches.get('price')
+        if match and match.text:
+            return self._extract_price(match.text, *self._price_context(matches))
+        return None
+    
+    def plan_for(self, selectors=None, fields: Optional[tuple] = None) -> ExtractionPlan:
+        """
+        Compiled extraction plan for a competitor's price selectors (dict or list)
+        
+        Plans are cached per selector list, so each competitor's selectors are
+        compiled once for the life of the scraper.
+        """
+        key = self.plan_key(selectors, fields)
+        plan = self._plans.get(key)
+        if plan is None:
+            field_selectors = dict(FIELD_SELECTORS, price=key[0])
+            if fields:
+                field_selectors = {name: field_selectors[name] for name in fields}
+            plan = ExtractionPlan(self.backend, field_selectors, ATTRIBUTE_FIELDS)
+            self._plans[key] = plan
+        return plan
+    
+    def plan_key(self, selectors=None, fields: Optional[tuple] = None) -> tuple:
+        """Hashable identity of an extraction plan: price selectors plus the fields extracted"""
+        return tuple(self._price_selectors(selectors)), fields
+    
+    def _price_selectors(self, selectors) -> List[str]:
+        """Normalize caller selectors (dict or list) to an ordered list"""
+        if not selectors:
+            return PRICE_SELECTORS
+        if isinstance(selectors, dict):
+            return list(selectors.values())
+        return list(selectors)
+    
+    def _price_context(self, matches: Dict[str, FieldMatch]) -> Tuple[Optional[str], Optional[str]]:
+        """(currency, locale) the page declares; currency from microdata/meta tags wins over the symbol in the price text"""
+        return self._extract_currency(matches.get('currency')), self._extract_locale(matches.get('locale'))
+    
+    def _extract_currency(self, match: Optional[FieldMatch]) -> Optional[str]:
+        """ISO code from microdata/meta tags, if the page declares one"""
+        if match:
+            code = (match.attrs.get('content') or match.text).strip().upper()
+            if len(code) == 3 and code.isalpha():
+                return code
+        return None
+    
+    def _extract_locale(self, match: Optional[FieldMatch]) -> Optional[str]:
+        """Locale such as "de-DE" or "de_DE" from <html lang> or meta tags, if the page declares one"""
+        if match:
+            value = match.attrs.get('lang') or match.attrs.get('content') or ''
+            # Content-Language may list several: "de, en"
+            return value.split(',', 1)[0].strip() or None
+        return None
+    
+    def _extract_availability(self, match: Optional[FieldMatch]) -> Optional[int]:
+        """1 if in stock, 0 if out of stock, None if the page doesn't say"""
+        if not match:
             return None
-            
-        except Exception as e:
-            print(f"Error scraping {url}: {str(e)}")
+        marker = ' '.join(filter(None, [
+            match.attrs.get('href'),
+            match.attrs.get('content'),
+            match.text,
+        ])).lower()
+        if not marker:
             return None
+        return 0 if any(m in marker for m in OUT_OF_STOCK_MARKERS) else 1
     
-    def _extract_price(self, text: str) -> Optional[float]:
-        """Extract numeric price from text"""
-        import re
-        # Remove currency symbols and extract numbers
-        price_match = re.search(r'[\d,]+\.?\d*', text.replace(',', ''))
-        if price_match:
-            try:
-                return float(price_match.group().replace(',', ''))
-            except ValueError:
-                return None
-        return None
+    def _extract_price(self, text: str, currency: Optional[str] = None, locale: Optional[str] = None) -> Optional[float]:
+        """Extract numeric price from text (see price_normalizer for separators, ranges and multi-buys)"""
+        return normalize_price(text, currency, locale).price
     
     def scrape_multiple_urls(self, urls: List[str], delay: float = 1.0) -> List[Dict]:
-        """Scrape multiple URLs with delay"""
-        results = []
-        for url in urls:
-            price = self.scrape_price(url)
-            results.append({
-                'url': url,
-                'price': price,
-                'timestamp': time.time()
-            })
-            time.sleep(delay + random.uniform(0, 0.5))  # Random delay
-        return results
+        """
+        Scrape multiple URLs concurrently, rate-limited per host
+        
+        Thin blocking wrapper around AsyncCrawler; results are returned in
+        input order. Must not be called from inside a running event loop -
+        use AsyncCrawler.crawl() there to stream results instead.
+        """
+        from app.services.crawler import AsyncCrawler
+        
+        crawler = AsyncCrawler(scraper=self, per_host_delay=delay)
+        results = asyncio.run(crawler.crawl_all(urls))
+        order = {url: i for i, url in enumerate(urls)}
+        return sorted(results, key=lambda r: order[r['url']])
     
     def get_product_info(self, url: str) -> Dict:
         """Get basic product information from URL"""
-        try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Try to extract title
-            title = None
-            title_selectors = ['h1', '[itemprop="name"]', '.product-title', 'title']
-            for selector in title_selectors:
-                element = soup.select_one(selector)
-                if element:
-                    title = element.get_text(strip=True)
-                    break
-            
-            # Try to extract image
-            image = None
-            img_selectors = ['[itemprop="image"]', '.product-image img', 'img[src*="product"]']
-            for selector in img_selectors:
-                element = soup.select_one(selector)
-                if element:
-                    image = element.get('src') or element.get('data-src')
-                    if image:
-                        image = urljoin(url, image)
-                    break
-            
-            return {
-                'title': title or 'Unknown Product',
-                'image': image,
-                'url': url
-            }
-        except Exception as e:
-            print(f"Error getting product info: {str(e)}")
-            return {
-                'title': 'Unknown Product',
-                'image': None,
-                'url': url
-            }
-
-
-
+        return self.scrape_page(url).product_info()
@@ -0,0 +1,195 @@
+"""
+Review Sentiment
+Offline sentiment scoring and the batch pipeline that fills Review.sentiment / sentiment_score
+
+The pipeline walks unscored reviews in id order, de-duplicates identical
+texts, and either scores them locally or packs `batch_size` texts into each
+LLM request (several requests in flight at once). Items the model leaves
+out or answers badly are scored offline, so every review read gets a score.
+Scores are written back with one bulk UPDATE per chunk.
+
+Offline scoring uses the lexicon engine in sentiment_lexicon. Set
+SENTIMENT_MODE=offline to make it the primary scorer and leave the model
+out of sentiment altogether.
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app.models.review import Review, SentimentType
+from app.services.sentiment_lexicon import lexicon_score, lexicon_scores
+
+MODES = ("llm", "offline")
+DEFAULT_MODE = os.getenv("SENTIMENT_MODE", "llm")
+DEFAULT_BATCH_SIZE = 25
+DEFAULT_CONCURRENCY = 4
+CHUNK_SIZE = 1000
+# Longer reviews are cut before being sent to the model
+MAX_TEXT_CHARS = 1500
+# |score| below this is neutral
+NEUTRAL_THRESHOLD = 0.05
+
+
+class SentimentScore(NamedTuple):
+    sentiment: str  # "positive", "negative" or "neutral"
+    score: float  # -1 .. 1
+    confidence: float
+
+
+def label_for(score: float) -> str:
+    if score >= NEUTRAL_THRESHOLD:
+        return "positive"
+    if score <= -NEUTRAL_THRESHOLD:
+        return "negative"
+    return "neutral"
+
+
+def _from_lexicon(score: float, matched: int) -> SentimentScore:
+    # No lexicon words at all says little about the text
+    confidence = min(0.5 + abs(score) / 2, 0.95) if matched else 0.3
+    return SentimentScore(label_for(score), float(score), confidence)
+
+
+def offline_sentiment(text: str) -> SentimentScore:
+    """Local score for one text"""
+    return _from_lexicon(*lexicon_score(text))
+
+
+def offline_sentiments(texts: Sequence[str]) -> List[SentimentScore]:
+    """Local scores for many texts in one vectorized pass"""
+    scores, matched = lexicon_scores(texts)
+    return [_from_lexicon(score, count) for score, count in zip(scores.tolist(), matched.tolist())]
+
+
+def rating_sentiment(rating: Optional[float]) -> SentimentScore:
+    """Reviews without text: map a 1-5 star rating onto -1 .. 1"""
+    if rating is None:
+        return SentimentScore("neutral", 0.0, 0.0)
+    score = max(-1.0, min(1.0, (rating - 3) / 2))
+    return SentimentScore(label_for(score), score, 0.5)
+
+
+def coerce_llm_item(item) -> Optional[SentimentScore]:
+    """Validate one per-item result from the model; None if unusable"""
+    if not isinstance(item, dict):
+        return None
+    try:
+        score = max(-1.0, min(1.0, float(item["score"])))
+    except (KeyError, TypeError, ValueError):
+        return None
+    sentiment = item.get("sentiment")
+    if sentiment not in ("positive", "negative", "neutral"):
+        sentiment = label_for(score)
+    try:
+        confidence = max(0.0, min(1.0, float(item.get("confidence", 0.8))))
+    except (TypeError, ValueError):
+        confidence = 0.8
+    return SentimentScore(sentiment, score, confidence)
+
+
+def unscored_reviews(db: Session, after_id: int, limit: int) -> List[Tuple[int, Optional[str], Optional[float]]]:
+    return db.execute(
+        select(Review.id, Review.content, Review.rating)
+        .where(Review.sentiment_score.is_(None), Review.id > after_id)
+        .order_by(Review.id)
+        .limit(limit)
+    ).all()
+
+
+def write_scores(db: Session, scores: Dict[int, SentimentScore]) -> None:
+    """Bulk UPDATE by primary key (caller commits)"""
+    if not scores:
+        return
+    db.execute(
+        update(Review),
+        [
+            {"id": review_id, "sentiment": SentimentType(result.sentiment), "sentiment_score": result.score}
+            for review_id, result in scores.items()
+        ],
+    )
+
+
+async def _score_texts_llm(ollama, texts: List[str], batch_size: int, concurrency: int, stats: Dict) -> List[Optional[SentimentScore]]:
+    """Score unique texts with the model, `batch_size` per request; None where the model gave nothing usable"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_batch(batch: List[str]) -> List[Optional[SentimentScore]]:
+        async with semaphore:
+            items = await ollama.analyze_sentiment_batch(batch)
+        stats["llm_batches"] += 1
+        if items is None:
+            stats["failed_batches"] += 1
+            return [None] * len(batch)
+        return [coerce_llm_item(item) for item in items]
+
+    batches = [texts[offset:offset + batch_size] for offset in range(0, len(texts), batch_size)]
+    results = await asyncio.gather(*[run_batch(batch) for batch in batches])
+    return [score for batch in results for score in batch]
+
+
+async def score_reviews(
+    db: Session,
+    ollama=None,
+    mode: str = DEFAULT_MODE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    limit: Optional[int] = None,
+) -> Dict:
+    """
+    Score every review without a sentiment_score (up to `limit`), committing per chunk
+
+    mode "llm" needs an OllamaService; "offline" never calls the model.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown sentiment mode: {mode}")
+    if mode == "llm" and ollama is None:
+        raise ValueError("LLM mode needs an OllamaService")
+
+    stats = {"reviews": 0, "llm_scored": 0, "offline_scored": 0, "rating_only": 0, "llm_batches": 0, "failed_batches": 0}
+    start = time.perf_counter()
+    after_id = 0
+    while limit is None or stats["reviews"] < limit:
+        chunk_size = CHUNK_SIZE if limit is None else min(CHUNK_SIZE, limit - stats["reviews"])
+        rows = unscored_reviews(db, after_id, chunk_size)
+        if not rows:
+            break
+        after_id = rows[-1][0]
+
+        scores: Dict[int, SentimentScore] = {}
+        by_text: Dict[str, List[int]] = {}
+        for review_id, content, rating in rows:
+            text = (content or "").strip()
+            if text:
+                by_text.setdefault(text[:MAX_TEXT_CHARS], []).append(review_id)
+            else:
+                scores[review_id] = rating_sentiment(rating)
+                stats["rating_only"] += 1
+
+        texts = list(by_text)
+        if mode == "llm":
+            results = await _score_texts_llm(ollama, texts, batch_size, concurrency, stats)
+        else:
+            results = [None] * len(texts)
+        missing = [text for text, result in zip(texts, results) if result is None]
+        offline = dict(zip(missing, offline_sentiments(missing)))
+        for text, result in zip(texts, results):
+            ids = by_text[text]
+            if result is None:
+                result = offline[text]
+                stats["offline_scored"] += len(ids)
+            else:
+                stats["llm_scored"] += len(ids)
+            for review_id in ids:
+                scores[review_id] = result
+
+        write_scores(db, scores)
+        db.commit()
+        stats["reviews"] += len(rows)
+
+    elapsed = time.perf_counter() - start
+    stats["elapsed_seconds"] = round(elapsed, 3)
+    stats["reviews_per_second"] = round(stats["reviews"] / elapsed, 1) if elapsed > 0 else None
+    return stats
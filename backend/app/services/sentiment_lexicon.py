@@ -0,0 +1,208 @@
+"""
+Lexicon Sentiment
+Local review scorer: one regex tokenization, one dict lookup per token, graded -1 .. 1 output
+
+Each word in LEXICON carries a valence (-4 .. 4). A word's valence is
+raised by intensifiers ("very", "extremely") and lowered by dampeners
+("slightly") among the three tokens before it, flipped and shrunk when a
+negation ("not", "never", "don't") is among them, and weighted toward the
+clause after the first contrast word ("but", "however"). Exclamation marks
+push the total further from zero. The sum is squashed onto -1 .. 1 with
+s / sqrt(s^2 + ALPHA).
+
+Tokenizing is a byte-level translate + split (ASCII letters lowercased,
+apostrophes dropped so "don't" is "dont", other ASCII characters separate
+words, non-ASCII bytes stay inside words) and each token costs one dict
+lookup. `lexicon_score` scores one text in plain Python; `lexicon_scores`
+scores a batch with NumPy over just the tokens that carry a role, and
+gives the same numbers.
+"""
+
+import math
+from itertools import chain, repeat
+from typing import List, NamedTuple, Sequence
+
+import numpy as np
+
+# Normalization constant for s / sqrt(s^2 + ALPHA)
+ALPHA = 15.0
+NEGATION_SCALAR = -0.74
+BOOST = 0.293
+WINDOW = 3
+# Intensifiers further from the word count for less
+WINDOW_DECAY = (1.0, 0.95, 0.9)
+BEFORE_BUT = 0.5
+AFTER_BUT = 1.5
+EXCLAMATION_BOOST = 0.292
+MAX_EXCLAMATIONS = 4
+
+LEXICON = {
+    # positive
+    "good": 1.9, "great": 3.1, "excellent": 3.2, "amazing": 2.8, "awesome": 3.1, "fantastic": 2.9,
+    "perfect": 2.7, "perfectly": 2.5, "best": 3.2, "better": 1.9, "love": 3.2, "loved": 2.9, "loves": 2.7,
+    "like": 1.5, "liked": 1.8, "likes": 1.5, "nice": 1.8, "happy": 2.7, "pleased": 1.9, "satisfied": 1.8,
+    "glad": 2.0, "recommend": 1.5, "recommended": 1.6, "worth": 0.9, "value": 0.8, "bargain": 1.2,
+    "quality": 0.6, "sturdy": 1.4, "solid": 1.3, "durable": 1.5, "reliable": 1.8, "comfortable": 1.9,
+    "comfy": 1.6, "easy": 1.9, "easily": 1.4, "simple": 0.8, "fast": 1.1, "quick": 1.0, "quickly": 0.9,
+    "smooth": 1.2, "beautiful": 2.9, "pretty": 1.5, "gorgeous": 3.0, "lovely": 2.8, "cute": 2.0,
+    "stylish": 1.6, "elegant": 2.1, "impressive": 2.4, "impressed": 2.2, "superb": 3.1, "outstanding": 3.0,
+    "wonderful": 2.7, "brilliant": 2.8, "incredible": 2.6, "fabulous": 2.4, "terrific": 2.7, "fine": 0.8,
+    "decent": 1.0, "okay": 0.9, "ok": 0.9, "helpful": 1.7, "friendly": 2.2, "clean": 1.7, "fresh": 1.3,
+    "delicious": 2.7, "tasty": 2.0, "accurate": 1.2, "effective": 1.9, "works": 0.6, "worked": 0.6,
+    "fits": 0.7, "favorite": 2.0, "favourite": 2.0, "enjoy": 2.2, "enjoyed": 2.3, "fun": 2.3,
+    "affordable": 1.3, "cheapest": 0.4, "exceeded": 1.5, "flawless": 2.6, "handy": 1.4, "convenient": 1.6,
+    "premium": 1.0, "thanks": 1.9, "thank": 1.5, "win": 2.8, "yes": 1.7, "wow": 2.8, "positive": 2.3,
+    "pleasant": 2.3, "well": 1.1, "safe": 1.9, "secure": 1.4, "strong": 2.3, "successful": 2.7,
+    "useful": 1.9, "valuable": 2.1, "powerful": 1.8, "responsive": 1.3, "intuitive": 1.5,
+    # negative
+    "bad": -2.5, "worse": -2.1, "worst": -3.1, "terrible": -2.1, "awful": -2.0, "horrible": -2.5,
+    "poor": -2.1, "poorly": -1.9, "hate": -2.7, "hated": -3.2, "disappointed": -1.9, "disappointing": -2.2,
+    "disappointment": -2.3, "broken": -2.1, "broke": -1.8, "breaks": -1.6, "defective": -1.9,
+    "faulty": -1.8, "damaged": -2.2, "useless": -1.8, "waste": -1.8, "wasted": -2.2, "junk": -1.4,
+    "garbage": -1.8, "trash": -1.9, "rubbish": -1.8, "cheap": -0.6, "cheaply": -1.0, "flimsy": -1.6,
+    "fragile": -0.7, "overpriced": -1.6, "expensive": -0.9, "slow": -1.0, "slowly": -0.8, "late": -0.9,
+    "delayed": -1.1, "missing": -1.2, "wrong": -2.1, "problem": -1.7, "problems": -1.7, "issue": -1.0,
+    "issues": -1.2, "fail": -2.5, "failed": -2.3, "fails": -1.8, "failure": -2.3, "refund": -0.8,
+    "return": -0.4, "returned": -1.0, "returning": -0.9, "uncomfortable": -1.6, "difficult": -1.5,
+    "hard": -0.4, "annoying": -1.7, "annoyed": -1.6, "frustrating": -1.9, "frustrated": -2.0,
+    "ugly": -2.3, "smells": -0.9, "smell": -0.4, "noisy": -1.1, "loud": -0.6, "leaks": -1.5,
+    "leaking": -1.5, "stopped": -0.9, "unreliable": -1.9, "scam": -2.5, "fake": -2.1, "rude": -2.0,
+    "unhappy": -1.8, "sad": -2.1, "angry": -2.3, "avoid": -1.2, "regret": -1.9, "mediocre": -1.0,
+    "meh": -0.7, "dirty": -1.9, "stale": -1.3, "inaccurate": -1.3, "confusing": -1.3,
+    "weak": -1.9, "dead": -3.3, "dies": -2.0, "died": -2.6, "crap": -1.6, "crappy": -2.5, "sucks": -1.5,
+    "painful": -1.9, "hurts": -1.4, "dangerous": -2.1, "unsafe": -2.2, "negative": -2.7,
+    "complaint": -1.5, "complain": -1.2, "lousy": -2.5, "pathetic": -2.2, "ridiculous": -1.5,
+    "unusable": -2.0, "scratched": -1.1, "tore": -0.9, "torn": -1.2, "ripped": -1.1, "unfortunately": -1.5,
+}
+
+INTENSIFIERS = {
+    "very": BOOST, "really": BOOST, "extremely": BOOST, "so": BOOST, "super": BOOST, "totally": BOOST,
+    "absolutely": BOOST, "completely": BOOST, "incredibly": BOOST, "highly": BOOST, "truly": BOOST,
+    "utterly": BOOST, "most": BOOST, "more": BOOST, "especially": BOOST, "quite": BOOST,
+    "too": BOOST, "exceptionally": BOOST, "remarkably": BOOST,
+    "slightly": -BOOST, "somewhat": -BOOST, "barely": -BOOST, "hardly": -BOOST, "kinda": -BOOST,
+    "marginally": -BOOST, "almost": -BOOST, "partly": -BOOST, "little": -BOOST, "less": -BOOST,
+}
+
+NEGATIONS = {
+    "not", "no", "never", "none", "nothing", "nowhere", "neither", "nor", "without", "cannot",
+    "isnt", "arent", "wasnt", "werent", "dont", "doesnt", "didnt", "cant", "couldnt", "wont",
+    "wouldnt", "shouldnt", "hasnt", "havent", "aint",
+}
+
+CONTRASTS = {"but", "however", "although", "though"}
+
+_WORD_BYTES = bytes(range(ord("a"), ord("z") + 1))
+_TRANSLATE = bytes(
+    byte if byte >= 0x80 or byte in _WORD_BYTES else byte + 32 if 0x41 <= byte <= 0x5A else 0x20
+    for byte in range(256)
+)
+
+# Every token with a role gets a small integer id; unknown tokens are 0
+_ROLES = sorted(set(LEXICON) | set(INTENSIFIERS) | NEGATIONS | CONTRASTS)
+_TOKEN_IDS = {token.encode(): index for index, token in enumerate(_ROLES, start=1)}
+_VALENCE = np.array([0.0] + [LEXICON.get(token, 0.0) for token in _ROLES])
+_BOOST = np.array([0.0] + [INTENSIFIERS.get(token, 0.0) for token in _ROLES])
+_IS_NEGATION = np.array([False] + [token in NEGATIONS for token in _ROLES])
+_IS_CONTRAST = np.array([False] + [token in CONTRASTS for token in _ROLES])
+# Plain-list copies for the per-token loop in lexicon_score
+_VALENCES, _BOOSTS = _VALENCE.tolist(), _BOOST.tolist()
+_NEGATION_IDS = frozenset(np.flatnonzero(_IS_NEGATION).tolist())
+_CONTRAST_IDS = frozenset(np.flatnonzero(_IS_CONTRAST).tolist())
+# Intensifier weight by distance (index 0 and beyond the window are unused/zero)
+_DECAY = np.array((0.0,) + WINDOW_DECAY + (0.0,))
+
+
+class LexiconScore(NamedTuple):
+    score: float  # -1 .. 1
+    matched: int  # lexicon words found
+
+
+def tokenize(text: str) -> List[bytes]:
+    return text.replace("\u2019", "'").encode("utf-8").translate(_TRANSLATE, b"'").split()
+
+
+def normalize(total: float) -> float:
+    return total / math.sqrt(total * total + ALPHA)
+
+
+def _exclamation_boost(total: float, text: str) -> float:
+    if not total:
+        return total
+    return total + math.copysign(min(text.count("!"), MAX_EXCLAMATIONS) * EXCLAMATION_BOOST, total)
+
+
+def lexicon_score(text: str) -> LexiconScore:
+    """Score one text (reference implementation of lexicon_scores)"""
+    ids = [_TOKEN_IDS.get(token, 0) for token in tokenize(text)]
+    contrast_at = next((i for i, index in enumerate(ids) if index in _CONTRAST_IDS), None)
+    total = 0.0
+    matched = 0
+    for i, index in enumerate(ids):
+        valence = _VALENCES[index]
+        if not valence:
+            continue
+        matched += 1
+        boost = 0.0
+        negated = False
+        for distance in range(1, min(WINDOW, i) + 1):
+            previous = ids[i - distance]
+            boost += _BOOSTS[previous] * WINDOW_DECAY[distance - 1]
+            negated = negated or previous in _NEGATION_IDS
+        valence += boost if valence > 0 else -boost
+        if negated:
+            valence *= NEGATION_SCALAR
+        if contrast_at is not None:
+            valence *= BEFORE_BUT if i < contrast_at else AFTER_BUT
+        total += valence
+    return LexiconScore(normalize(_exclamation_boost(total, text)), matched)
+
+
+def lexicon_scores(texts: Sequence[str]) -> tuple:
+    """
+    Score many texts at once; returns (scores, matched) arrays aligned with `texts`
+
+    Token ids are looked up once over the flattened token stream, then only
+    the tokens with a role are kept, with their positions. The window of
+    WINDOW tokens before a word can hold at most WINDOW role tokens, so
+    looking back WINDOW role tokens and checking the position gap finds
+    every intensifier and negation the reference implementation does.
+    """
+    count = len(texts)
+    if count == 0:
+        return np.zeros(0), np.zeros(0, dtype=np.int64)
+    token_lists = [tokenize(text) for text in texts]
+    ends = np.cumsum(np.fromiter(map(len, token_lists), dtype=np.int64, count=count))
+    ids = np.fromiter(
+        map(_TOKEN_IDS.get, chain.from_iterable(token_lists), repeat(0)), dtype=np.int32, count=int(ends[-1])
+    )
+
+    position = np.flatnonzero(ids)
+    ids = ids[position]
+    doc = np.searchsorted(ends, position, side="right")
+
+    valence = _VALENCE[ids]
+    boost = np.zeros(len(ids))
+    negated = np.zeros(len(ids), dtype=bool)
+    for back in range(1, WINDOW + 1):
+        gap = position[back:] - position[:-back]
+        in_window = (gap <= WINDOW) & (doc[back:] == doc[:-back])
+        previous = ids[:-back]
+        boost[back:] += np.where(in_window, _BOOST[previous] * _DECAY[np.minimum(gap, WINDOW + 1)], 0.0)
+        negated[back:] |= in_window & _IS_NEGATION[previous]
+    valence = valence + boost * np.sign(valence)
+    valence = np.where(negated, valence * NEGATION_SCALAR, valence)
+
+    # Weight the clauses around each text's first contrast word
+    contrasts = np.flatnonzero(_IS_CONTRAST[ids])
+    first_contrast = np.full(count, np.iinfo(np.int64).max)
+    np.minimum.at(first_contrast, doc[contrasts], position[contrasts])
+    has_contrast = first_contrast[doc] != np.iinfo(np.int64).max
+    weight = np.where(position < first_contrast[doc], BEFORE_BUT, AFTER_BUT)
+    valence = np.where(has_contrast, valence * weight, valence)
+
+    total = np.bincount(doc, weights=valence, minlength=count)
+    matched = np.bincount(doc, weights=_VALENCE[ids] != 0, minlength=count).astype(np.int64)
+    exclamations = np.minimum(np.fromiter(map(str.count, texts, repeat("!")), dtype=np.float64, count=count), MAX_EXCLAMATIONS)
+    total = total + np.sign(total) * exclamations * EXCLAMATION_BOOST
+    return total / np.sqrt(total * total + ALPHA), matched
@@ -0,0 +1,210 @@
+"""
+Write Queue
+One writer thread that applies queued writes and commits them in groups
+
+SQLite allows one writer at a time and, without the production profile's
+relaxed sync, pays an fsync per commit. Under the SQLite production
+profile, price writes from every API path are handed to a single thread
+with its own session instead of committing on the request's connection.
+The thread takes everything queued at that moment (up to `max_group`),
+runs each write and commits once, so N concurrent writers cost one commit
+and never contend for the write lock. The writer's connections run with
+synchronous=FULL (the rest of the profile uses NORMAL), and callers block
+until their write has committed, so an acknowledged write survives a
+crash or power loss; the fsync is paid once per group. Callers wait at
+most WRITE_TIMEOUT seconds; a write still queued by then is cancelled.
+
+If the writer thread dies (e.g. it cannot open a session), the writes
+queued behind it and every later submission fail instead of waiting for
+a thread that is gone.
+
+If any write in a group fails, the group is rolled back and each write is
+replayed in its own transaction, so one bad write only fails its caller.
+Writes must therefore be safe to run again after a rollback, and must
+return plain data (not ORM objects bound to the writer's session).
+"""
+
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+from sqlalchemy.orm import Session
+from app.database import SQLITE_PRODUCTION, WriteSessionLocal
+
+logger = logging.getLogger("app.write_queue")
+
+T = TypeVar("T")
+Write = Callable[[Session], Any]
+DEFAULT_MAX_GROUP = 256
+WRITE_TIMEOUT = float(os.getenv("WRITE_TIMEOUT", "60"))  # seconds
+_STOP = object()
+
+
+def _writer_stopped(failure: BaseException) -> RuntimeError:
+    error = RuntimeError("Group-commit writer has stopped")
+    error.__cause__ = failure
+    return error
+
+
+class GroupCommitWriter:
+    def __init__(self, session_factory=WriteSessionLocal, max_group: int = DEFAULT_MAX_GROUP):
+        self.session_factory = session_factory
+        self.max_group = max_group
+        self.commits = 0
+        self.writes = 0
+        self.largest_group = 0
+        self.replayed_groups = 0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Set when the thread died; later submissions fail with it
+        self._failure: Optional[BaseException] = None
+        self._group: List[Tuple[Write, Future]] = []
+
+    def submit(self, write: Callable[[Session], T]) -> "Future[T]":
+        """Queue `write(session)`; the future resolves once it has committed"""
+        future: Future = Future()
+        with self._lock:
+            if self._failure is not None:
+                future.set_exception(_writer_stopped(self._failure))
+                return future
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="group-commit-writer", daemon=True)
+                self._thread.start()
+            self._queue.put((write, future))
+        return future
+
+    def run(self, write: Callable[[Session], T], timeout: Optional[float] = WRITE_TIMEOUT) -> T:
+        """
+        Queue `write(session)` and wait for its commit; exceptions propagate to the caller
+
+        Raises TimeoutError after `timeout` seconds. A write still waiting in
+        the queue is then cancelled; one already running may still commit.
+        """
+        future = self.submit(write)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Finish queued writes and stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "commits": self.commits,
+            "writes": self.writes,
+            "writes_per_commit": round(self.writes / self.commits, 2) if self.commits else None,
+            "largest_group": self.largest_group,
+            "replayed_groups": self.replayed_groups,
+            "queued": self._queue.qsize(),
+        }
+
+    def _next_group(self) -> Tuple[List[Tuple[Write, Future]], bool]:
+        group = []
+        item = self._queue.get()
+        while item is not _STOP:
+            write, future = item
+            if future.set_running_or_notify_cancel():
+                group.append(item)
+            if len(group) >= self.max_group:
+                break
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return group, False
+        return group, item is _STOP
+
+    def _run(self) -> None:
+        try:
+            db = self.session_factory()
+            try:
+                stopping = False
+                while not stopping:
+                    group, stopping = self._next_group()
+                    if group:
+                        self._group = group
+                        self._commit_group(db, group)
+                        self._group = []
+            finally:
+                db.close()
+        except BaseException as e:
+            logger.exception("Group-commit writer stopped")
+            self._fail_pending(e)
+
+    def _fail_pending(self, failure: BaseException) -> None:
+        """Fail the group in flight, everything still queued and all later submissions"""
+        with self._lock:
+            self._failure = failure
+            self._thread = None
+        pending = [future for _, future in self._group]
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                pending.append(item[1])
+        for future in pending:
+            if not future.done() and (future.running() or future.set_running_or_notify_cancel()):
+                future.set_exception(_writer_stopped(failure))
+
+    def _commit_group(self, db: Session, group: List[Tuple[Write, Future]]) -> None:
+        try:
+            results = [write(db) for write, _ in group]
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.replayed_groups += 1
+            logger.info("Write group of %d failed; replaying writes one by one", len(group))
+            for write, future in group:
+                self._commit_one(db, write, future)
+            return
+        self.commits += 1
+        self.writes += len(group)
+        self.largest_group = max(self.largest_group, len(group))
+        for (_, future), result in zip(group, results):
+            future.set_result(result)
+
+    def _commit_one(self, db: Session, write: Write, future: Future) -> None:
+        try:
+            result = write(db)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            future.set_exception(e)
+            return
+        self.commits += 1
+        self.writes += 1
+        future.set_result(result)
+
+
+writer = GroupCommitWriter() if SQLITE_PRODUCTION else None
+
+
+def run_write(db: Session, write: Callable[[Session], T]) -> T:
+    """
+    Run `write(session)` and commit, returning its result
+
+    Goes through the group-commit writer under the SQLite production
+    profile (raising TimeoutError after WRITE_TIMEOUT seconds); otherwise
+    runs in `db` and commits it.
+    """
+    if writer is not None:
+        return writer.run(write)
+    try:
+        result = write(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return result
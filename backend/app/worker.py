@@ -0,0 +1,144 @@
+"""
+Scrape Worker
+Runs queued scrape jobs on a thread pool, outside the API process
+
+Usage (from backend/):
+    python -m app.worker --threads 8
+
+Start several processes to scale out; job claiming is atomic.
+"""
+
+import argparse
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from app.database import SessionLocal
+# Import every model so foreign keys resolve when flushing
+from app.models import product, competitor, price_history, latest_price, price_rollup, scrape_schedule  # noqa: F401
+from app.models.scrape_job import ScrapeJob
+from app.services import job_queue, recrawl_scheduler
+from app.services.price_store import latest_recorded_price, record_scraped_page
+from app.services.scraper import PriceScraper
+
+logger = logging.getLogger("app.worker")
+
+
+class ScrapeWorker:
+    """Pool of threads that claim and execute jobs, plus a scheduler loop"""
+
+    def __init__(
+        self,
+        threads: int = 4,
+        poll_interval: float = 1.0,
+        stale_after: int = 600,
+        budget_per_day: Optional[float] = None,
+        rebalance_every: float = 3600,
+    ):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        # Adaptive scheduling is on when a crawl budget is configured
+        self.budget_per_day = budget_per_day
+        self.rebalance_every = rebalance_every
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        # One scraper shared by all threads: pooled sessions, compiled plans and ETags are reused
+        self.scraper = PriceScraper()
+        self._stop = threading.Event()
+
+    def run_job(self, db, job: ScrapeJob) -> None:
+        try:
+            page = self.scraper.scrape_page(job.url)
+            if page.error:
+                raise RuntimeError(page.error)
+            if page.price is None:
+                raise ValueError("Could not extract price from URL")
+            price_changed = False
+            if job.product_id and job.competitor_id:
+                previous = latest_recorded_price(db, job.product_id, job.competitor_id)
+                price_changed = not page.unchanged and previous is not None and previous != page.price
+                record_scraped_page(db, page, job.product_id, job.competitor_id)
+            job_queue.complete(db, job, page, price_changed)
+        except Exception as e:
+            db.rollback()
+            job = db.get(ScrapeJob, job.id)
+            job_queue.fail(db, job, str(e))
+            logger.warning("Job %s failed (attempt %s/%s): %s", job.id, job.attempts, job.max_attempts, e)
+        db.commit()
+
+    def _work_loop(self, index: int) -> None:
+        thread_id = f"{self.worker_id}/{index}"
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                job = job_queue.claim_next(db, thread_id)
+                if job is None:
+                    self._stop.wait(self.poll_interval)
+                    continue
+                self.run_job(db, job)
+            except Exception:
+                logger.exception("Worker loop error")
+                self._stop.wait(self.poll_interval)
+            finally:
+                db.close()
+
+    def _schedule_loop(self) -> None:
+        last_rebalance = 0.0
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                if self.budget_per_day and time.monotonic() - last_rebalance >= self.rebalance_every:
+                    metrics = recrawl_scheduler.rebalance(db, self.budget_per_day)
+                    last_rebalance = time.monotonic()
+                    logger.info("Rebalanced schedules: %s", metrics)
+                jobs = job_queue.enqueue_due_schedules(db)
+                stale = job_queue.requeue_stale(db, self.stale_after)
+                if jobs or stale:
+                    logger.info("Enqueued %d scheduled jobs, requeued %d stale jobs", len(jobs), stale)
+            except Exception:
+                logger.exception("Scheduler loop error")
+            finally:
+                db.close()
+            self._stop.wait(self.poll_interval)
+
+    def run(self) -> None:
+        logger.info("Worker %s starting with %d threads", self.worker_id, self.threads)
+        with ThreadPoolExecutor(max_workers=self.threads + 1) as pool:
+            pool.submit(self._schedule_loop)
+            for index in range(self.threads):
+                pool.submit(self._work_loop, index)
+            try:
+                while not self._stop.is_set():
+                    time.sleep(0.5)
+            except KeyboardInterrupt:
+                logger.info("Shutting down")
+                self.stop()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the scrape job worker")
+    parser.add_argument("--threads", type=int, default=int(os.getenv("SCRAPE_WORKER_THREADS", "4")))
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--stale-after", type=int, default=600, help="seconds before a running job is requeued")
+    parser.add_argument(
+        "--budget-per-day", type=float,
+        default=float(os.getenv("CRAWL_BUDGET_PER_DAY", "0")) or None,
+        help="total scheduled fetches/day; enables adaptive intervals",
+    )
+    parser.add_argument("--rebalance-every", type=float, default=3600, help="seconds between adaptive rebalances")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    ScrapeWorker(
+        args.threads, args.poll_interval, args.stale_after, args.budget_per_day, args.rebalance_every
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
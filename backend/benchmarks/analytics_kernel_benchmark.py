@@ -0,0 +1,209 @@
+"""
+Analytics Kernel Benchmark
+Compares the old per-product Python loop behind /api/analytics/insights with the
+vectorized analytics kernel on synthetic price series held in memory
+
+The old loop computes only average/min/max, the half-split trend and the
+competitor count; the kernel additionally computes quartiles, regression
+trend, volatility, EWMA and a moving average. A per-series NumPy loop
+computing those same extra metrics is timed as the like-for-like baseline.
+Database time is excluded (the old endpoint also ran one query per product).
+With --database the rows are also written to a throwaway SQLite database
+and load_series is timed against the loader it replaced (ORDER BY in SQL,
+every row fetched as a Row at once), with peak Python memory of each.
+
+Usage (from backend/):
+    python -m benchmarks.analytics_kernel_benchmark --products 5000 --competitors 5 --points 60 --database
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models.competitor import Competitor  # noqa: F401 (registers the table price_history references)
+from app.models.price_history import PriceHistory
+from app.models.product import Product  # noqa: F401
+from app.services import analytics_kernel as kernel
+
+
+def per_product_loop(rows_by_product):
+    """The original insights loop, minus the per-product query"""
+    insights = []
+    for product_id, rows in rows_by_product.items():
+        price_list = [price for _, price in rows]
+        avg_price = sum(price_list) / len(price_list)
+        min_price = min(price_list)
+        max_price = max(price_list)
+        if len(price_list) > 10:
+            first_half = price_list[:len(price_list) // 2]
+            second_half = price_list[len(price_list) // 2:]
+            first_avg = sum(first_half) / len(first_half)
+            second_avg = sum(second_half) / len(second_half)
+            if second_avg > first_avg * 1.05:
+                trend = "increasing"
+            elif second_avg < first_avg * 0.95:
+                trend = "decreasing"
+            else:
+                trend = "stable"
+        else:
+            trend = "stable"
+        competitor_ids = set([competitor_id for competitor_id, _ in rows])
+        insights.append((product_id, avg_price, min_price, max_price, trend, len(competitor_ids)))
+    return insights
+
+
+def per_series_numpy_loop(series):
+    """Same metrics as the kernel, one series at a time with NumPy per series"""
+    alpha = 2.0 / (kernel.EWMA_SPAN + 1.0)
+    results = []
+    for start, length in zip(series.starts.tolist(), series.lengths.tolist()):
+        prices = series.prices[start:start + length]
+        times = series.times[start:start + length]
+        smoothed = prices[0]
+        for price in prices[1:].tolist():
+            smoothed = alpha * price + (1 - alpha) * smoothed
+        results.append((
+            np.percentile(prices, [25, 50, 75]),
+            np.polyfit(times, prices, 1)[0] if length > 1 else 0.0,
+            np.std(np.diff(np.log(prices)), ddof=1) if length > 2 else 0.0,
+            smoothed,
+            prices[-kernel.MOVING_AVERAGE_WINDOW:].mean(),
+        ))
+    return results
+
+
+def fetch_all_series(db, since):
+    """The raw load_series before streaming: sorted in SQL, all rows as Rows, then columns"""
+    query = select(
+        PriceHistory.product_id,
+        PriceHistory.competitor_id,
+        PriceHistory.timestamp,
+        PriceHistory.price,
+    ).where(PriceHistory.timestamp >= since).order_by(
+        PriceHistory.product_id, PriceHistory.competitor_id, PriceHistory.timestamp, PriceHistory.id
+    )
+    columns = list(zip(*db.execute(query).all())) or [()] * 4
+    product_ids, competitor_ids, timestamps, prices = columns
+    micros = np.array(timestamps, dtype="datetime64[us]").astype(np.int64)
+    return kernel.PriceSeries.from_arrays(
+        product_ids, competitor_ids, micros / (kernel.SECONDS_PER_DAY * 1e6), prices, assume_sorted=True
+    )
+
+
+def timed_load(load, db, since):
+    start = time.perf_counter()
+    series = load(db, since)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    load(db, since)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return series, seconds, peak
+
+
+def database_load(product_ids, competitor_ids, times, prices):
+    engine = create_engine(f"sqlite:///{tempfile.mkdtemp()}/analytics_benchmark.db")
+    Base.metadata.create_all(engine, tables=[PriceHistory.__table__])
+    start_day = datetime(2026, 9, 1)
+    # Inserted in time order, as scrapes arrive
+    order = np.lexsort((competitor_ids, product_ids, times))
+    rows = [
+        (product_id, competitor_id, price, "USD", 1, 0, (start_day + timedelta(days=day)).isoformat(" ", "microseconds"))
+        for product_id, competitor_id, day, price in zip(
+            product_ids[order].tolist(), competitor_ids[order].tolist(), times[order].tolist(), prices[order].tolist()
+        )
+    ]
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO price_history (product_id, competitor_id, price, currency, availability, promotion_active, timestamp)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        connection.exec_driver_sql("ANALYZE")
+    del rows
+
+    with Session(engine) as db:
+        old, old_seconds, old_peak = timed_load(fetch_all_series, db, start_day)
+        new, new_seconds, new_peak = timed_load(kernel.load_series, db, start_day)
+    for field in ("product_ids", "competitor_ids", "prices", "lengths"):
+        assert np.array_equal(getattr(old, field), getattr(new, field)), f"loaders disagree on {field}"
+    assert np.allclose(old.times, new.times, atol=1e-6), "loaders disagree on times"
+
+    print(f"\n{'loading ' + str(len(new)) + ' rows from SQLite':<34}{'seconds':>10}{'peak MB':>10}")
+    print(f"{'  ORDER BY, all rows as Rows':<34}{old_seconds:>10.2f}{old_peak / 1e6:>10.0f}")
+    print(f"{'  load_series (streamed)':<34}{new_seconds:>10.2f}{new_peak / 1e6:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--competitors", type=int, default=5)
+    parser.add_argument("--points", type=int, default=60, help="observations per (product, competitor)")
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--database", action="store_true", help="also time loading the rows from SQLite")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    series_count = args.products * args.competitors
+    product_ids = np.repeat(np.arange(args.products), args.competitors * args.points)
+    competitor_ids = np.tile(np.repeat(np.arange(args.competitors), args.points), args.products)
+    times = np.tile(np.arange(args.points) / 2.0, series_count)
+    levels = np.repeat(rng.lognormal(4, 1, series_count), args.points)
+    drift = np.repeat(rng.normal(0, 0.003, series_count), args.points)
+    prices = levels * np.exp(drift * times + rng.normal(0, 0.01, len(times)))
+    print(f"{args.products} products x {args.competitors} competitors x {args.points} points = {len(prices)} rows\n")
+
+    # The loop saw rows per product in time order, as the ORM query returned them
+    time_order = np.lexsort((competitor_ids, times, product_ids))
+    rows_by_product = {}
+    for product_id, competitor_id, price in zip(
+        product_ids[time_order].tolist(), competitor_ids[time_order].tolist(), prices[time_order].tolist()
+    ):
+        rows_by_product.setdefault(product_id, []).append((competitor_id, price))
+
+    start = time.perf_counter()
+    loop = per_product_loop(rows_by_product)
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    series = kernel.PriceSeries.from_arrays(product_ids, competitor_ids, times, prices, assume_sorted=True)
+    metrics = kernel.product_metrics(series)
+    trends = [
+        kernel.classify_change(change, count)
+        for change, count in zip(metrics["trend_change"].tolist(), metrics["observations"].tolist())
+    ]
+    kernel_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    per_series_numpy_loop(series)
+    numpy_loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    kernel.price_index(series, series.series_products % args.categories)
+    index_seconds = time.perf_counter() - start
+
+    expected = np.array([(avg, low, high, competitors) for _, avg, low, high, _, competitors in loop])
+    actual = np.column_stack([metrics["average_price"], metrics["min_price"], metrics["max_price"], metrics["competitor_count"]])
+    assert np.allclose(expected, actual), "kernel and loop disagree on average/min/max/competitors"
+    agreement = np.mean([trend == row[4] for trend, row in zip(trends, loop)])
+
+    print(f"{'per-product loop (4 metrics)':<34}{loop_seconds * 1000:>10.1f} ms")
+    print(f"{'per-series NumPy loop (all)':<34}{numpy_loop_seconds * 1000:>10.1f} ms")
+    print(f"{'kernel (all metrics)':<34}{kernel_seconds * 1000:>10.1f} ms")
+    print(f"{'category price index':<34}{index_seconds * 1000:>10.1f} ms")
+    print(f"\ntrend labels agree on {agreement:.1%} of products (half-split vs regression)")
+
+    if args.database:
+        database_load(product_ids + 1, competitor_ids + 1, times, prices)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+API Load Benchmark
+Seeds a throwaway SQLite database, starts the API under uvicorn and drives it with
+concurrent clients: a mix of product, price stats and (uncached) market insight
+requests, plus a fixed-rate /health probe. Reports throughput and latency
+percentiles per endpoint, which shows whether slow queries stall unrelated requests
+
+Usage (from backend/):
+    python -m benchmarks.api_load_benchmark --concurrency 32 --duration 15
+    # Same load against another checkout, e.g. to compare before/after a change
+    python -m benchmarks.api_load_benchmark --app-dir /path/to/other/backend
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# (label, weight, path template); {product} is a random product id
+WORKLOAD = [
+    ("product", 6, "/api/products/{product}"),
+    ("price stats", 3, "/api/prices/stats/{product}"),
+    ("insights", 1, "/api/analytics/insights?days=30"),
+]
+PROBE_INTERVAL = 0.05
+
+
+def seed(database_url: str, products: int, competitors: int, points: int) -> None:
+    os.environ["DATABASE_URL"] = database_url
+    # Imported after DATABASE_URL is set so the engine points at the throwaway database
+    from app.database import Base, SessionLocal, engine
+    from app.models.competitor import Competitor
+    from app.models.product import Product
+    from app.services.price_store import insert_price_rows
+
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(5)
+    now = datetime.utcnow()
+    db = SessionLocal()
+    db.add_all(Competitor(id=i, name=f"Competitor {i}", website=f"https://c{i}.example") for i in range(1, competitors + 1))
+    db.add_all(
+        Product(id=i, name=f"Product {i}", category=f"Category {i % 20}", base_price=rng.uniform(10, 500))
+        for i in range(1, products + 1)
+    )
+    db.flush()
+    bases = [rng.uniform(10, 500) for _ in range(products)]
+    insert_price_rows(db, [
+        {
+            "product_id": product_id, "competitor_id": competitor_id,
+            "price": round(bases[product_id - 1] * rng.uniform(0.8, 1.2), 2), "currency": "USD", "availability": 1,
+            "sale_price": None, "discount_percentage": None, "promotion_active": 0,
+            "timestamp": now - timedelta(days=point * 29 / points),
+        }
+        for point in range(points) for product_id in range(1, products + 1) for competitor_id in range(1, competitors + 1)
+    ])
+    db.commit()
+    db.close()
+
+
+def percentile(ordered, fraction: float) -> float:
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+async def drive(base_url: str, concurrency: int, duration: float, products: int):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    deadline = time.perf_counter() + duration
+    labels = [label for label, _, _ in WORKLOAD]
+    weights = [weight for _, weight, _ in WORKLOAD]
+    paths = {label: path for label, _, path in WORKLOAD}
+
+    async def timed_get(client, label: str, path: str):
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors[label] += 1
+        except httpx.HTTPError:
+            errors[label] += 1
+        latencies[label].append(time.perf_counter() - start)
+
+    async def worker(client, rng):
+        while time.perf_counter() < deadline:
+            label = rng.choices(labels, weights)[0]
+            await timed_get(client, label, paths[label].format(product=rng.randint(1, products)))
+
+    async def probe(client):
+        while time.perf_counter() < deadline:
+            await timed_get(client, "/health probe", "/health")
+            await asyncio.sleep(PROBE_INTERVAL)
+
+    limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        await asyncio.gather(probe(client), *[worker(client, random.Random(i)) for i in range(concurrency)])
+    return latencies, errors
+
+
+def report(latencies, errors, concurrency: int, duration: float) -> None:
+    total = sum(len(samples) for label, samples in latencies.items() if label != "/health probe")
+    print(f"{concurrency} concurrent clients for {duration:.0f}s: {total / duration:.0f} req/s\n")
+    print(f"{'':<16}{'requests':>9}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'errors':>8}")
+    for label in [label for label, _, _ in WORKLOAD] + ["/health probe"]:
+        ordered = sorted(latencies[label])
+        if not ordered:
+            continue
+        print(
+            f"{label:<16}{len(ordered):>9}{len(ordered) / duration:>8.1f}"
+            f"{percentile(ordered, 0.5) * 1000:>9.1f}{percentile(ordered, 0.95) * 1000:>9.1f}"
+            f"{percentile(ordered, 0.99) * 1000:>9.1f}{ordered[-1] * 1000:>9.1f}{errors[label]:>8}"
+        )
+
+
+def wait_until_up(base_url: str, process, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            httpx.get(base_url + "/health", timeout=1).raise_for_status()
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError("API did not come up")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--competitors", type=int, default=5)
+    parser.add_argument("--points", type=int, default=20, help="prices per product and competitor")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds of load")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--app-dir", default=BACKEND_DIR, help="backend checkout to serve")
+    args = parser.parse_args()
+
+    database_url = f"sqlite:///{tempfile.mkdtemp()}/load_benchmark.db"
+    start = time.perf_counter()
+    seed(database_url, args.products, args.competitors, args.points)
+    rows = args.products * args.competitors * args.points
+    print(f"seeded {rows} prices in {time.perf_counter() - start:.1f}s; serving {args.app_dir}")
+
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "RESPONSE_CACHE_TTL": "0",  # every insights request hits the database
+        "LLM_CACHE_PATH": "",
+        "OLLAMA_API_KEY": os.environ.get("OLLAMA_API_KEY", "benchmark"),
+        "PYTHONPATH": args.app_dir,
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=args.app_dir, env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_until_up(base_url, server)
+        latencies, errors = asyncio.run(drive(base_url, args.concurrency, args.duration, args.products))
+        report(latencies, errors, args.concurrency, args.duration)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Bulk Price Ingestion Benchmark
+Streams synthetic NDJSON / CSV / JSON feeds into POST /api/prices/bulk and compares
+with one POST /api/prices/ per row, against a throwaway SQLite database
+
+Usage (from backend/):
+    python -m benchmarks.bulk_ingest_benchmark --rows 200000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+CHUNK_SIZE = 64 * 1024
+
+
+def ndjson_feed(rows):
+    return b"".join(json.dumps(row).encode() + b"\n" for row in rows)
+
+
+def csv_feed(rows):
+    lines = ["product_id,competitor_id,price,currency,sale_price"]
+    lines += [
+        f"{row['product_id']},{row['competitor_id']},{row['price']},USD,{row.get('sale_price') or ''}"
+        for row in rows
+    ]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def json_feed(rows):
+    return json.dumps(rows).encode()
+
+
+def chunked(body: bytes):
+    for offset in range(0, len(body), CHUNK_SIZE):
+        yield body[offset:offset + CHUNK_SIZE]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--single-rows", type=int, default=2000, help="rows sent through the one-at-a-time endpoint")
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--competitors", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bulk_benchmark.db"
+
+    # Imported after DATABASE_URL is set so the engine points at the throwaway database
+    from fastapi.testclient import TestClient
+    from app.database import Base, SessionLocal, engine
+    from app.main import app
+    from app.models.competitor import Competitor
+    from app.models.product import Product
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    db.add_all(Product(name=f"Product {i}", sku=f"SKU-{i}") for i in range(args.products))
+    db.add_all(Competitor(name=f"Competitor {i}", website=f"https://c{i}.example") for i in range(args.competitors))
+    db.commit()
+    db.close()
+
+    rng = random.Random(7)
+    rows = []
+    for i in range(args.rows):
+        row = {
+            "product_id": rng.randint(1, args.products),
+            "competitor_id": rng.randint(1, args.competitors),
+            "price": round(rng.uniform(5, 500), 2),
+        }
+        if i % 5 == 0:
+            row["sale_price"] = round(row["price"] * 0.9, 2)
+        if i % 1000 == 999:
+            row["product_id"] = args.products + 1  # unknown id: reported, not inserted
+        rows.append(row)
+
+    client = TestClient(app)
+
+    start = time.perf_counter()
+    for row in rows[:args.single_rows]:
+        client.post("/api/prices/", json=row)
+    single = args.single_rows / (time.perf_counter() - start)
+    print(f"POST /api/prices/ one row per request: {single:10,.0f} rows/s ({args.single_rows} rows)")
+
+    feeds = [
+        ("ndjson", "application/x-ndjson", ndjson_feed),
+        ("csv", "text/csv", csv_feed),
+        ("json", "application/json", json_feed),
+    ]
+    for name, content_type, build in feeds:
+        body = build(rows)
+        start = time.perf_counter()
+        response = client.post(
+            f"/api/prices/bulk?batch_size={args.batch_size}",
+            content=chunked(body),
+            headers={"Content-Type": content_type},
+        )
+        elapsed = time.perf_counter() - start
+        summary = response.json()
+        print(
+            f"POST /api/prices/bulk {name:6s}:            {summary['received'] / elapsed:10,.0f} rows/s "
+            f"(inserted {summary['inserted']}, rejected {summary['failed']}, {len(body) / 1e6:.1f} MB)"
+        )
+
+
+if __name__ == "__main__":
+    main()
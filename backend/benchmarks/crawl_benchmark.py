@@ -0,0 +1,69 @@
+"""
+Crawl Engine Benchmark
+Measures AsyncCrawler URLs/sec against local stub servers at several concurrency levels
+
+Usage (from backend/):
+    python -m benchmarks.crawl_benchmark --urls 2000 --hosts 20 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.services.crawler import AsyncCrawler
+from app.services.scraper import PriceScraper
+from benchmarks.stub_server import StubServers
+
+
+async def run_crawl(crawler: AsyncCrawler, urls):
+    found = unchanged = 0
+    async for result in crawler.crawl(urls):
+        if result['price'] is not None:
+            found += 1
+        if result['unchanged']:
+            unchanged += 1
+    return found, unchanged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls", type=int, default=2000)
+    parser.add_argument("--hosts", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated server latency in seconds")
+    parser.add_argument("--per-host-concurrency", type=int, default=8)
+    parser.add_argument("--per-host-delay", type=float, default=0.0)
+    parser.add_argument("--levels", default="1,8,32,128")
+    parser.add_argument("--serial-sample", type=int, default=50, help="URLs for the serial baseline")
+    args = parser.parse_args()
+
+    with StubServers(args.hosts, args.latency) as stubs:
+        bases = stubs.base_urls
+        urls = [f"{bases[i % len(bases)]}/product/{i}" for i in range(args.urls)]
+
+        # Serial baseline: the old one-request-at-a-time loop, without its sleep
+        scraper = PriceScraper()
+        sample = urls[:args.serial_sample]
+        start = time.perf_counter()
+        for url in sample:
+            scraper.scrape_price(url)
+        elapsed = time.perf_counter() - start
+        print(f"{'serial':>12} {len(sample):>7} urls {elapsed:8.2f}s {len(sample) / elapsed:10.1f} urls/sec")
+
+        for level in (int(x) for x in args.levels.split(",")):
+            crawler = AsyncCrawler(
+                max_concurrency=level,
+                per_host_concurrency=args.per_host_concurrency,
+                per_host_delay=args.per_host_delay,
+                jitter=0.0,
+            )
+            # First pass downloads everything; the re-crawl only gets 304s
+            for label in ("c=%d" % level, "recrawl"):
+                start = time.perf_counter()
+                found, unchanged = asyncio.run(run_crawl(crawler, urls))
+                elapsed = time.perf_counter() - start
+                print(f"{label:>12} {len(urls):>7} urls {elapsed:8.2f}s {len(urls) / elapsed:10.1f} urls/sec "
+                      f"({found} prices, {unchanged} unchanged)")
+
+
+if __name__ == "__main__":
+    main()
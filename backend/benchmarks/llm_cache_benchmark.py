@@ -0,0 +1,111 @@
+"""
+LLM Cache Benchmark
+Measures GET /api/analytics/recommendation latency against a stub chat-completions
+server with a fixed delay, cold (every call goes upstream) and warm (answered from the
+LLM cache), then fires identical concurrent prompts to show request coalescing
+
+Usage (from backend/):
+    python -m benchmarks.llm_cache_benchmark --products 20 --latency 1.0
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+from benchmarks.stub_server import ChatCompletionStubHandler, StubServers
+
+
+def upstream_calls(base_url: str) -> int:
+    with urllib.request.urlopen(base_url) as response:
+        return json.load(response)["calls"]
+
+
+def timed_get(client, url: str) -> float:
+    start = time.perf_counter()
+    client.get(url).raise_for_status()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=1.0, help="stub model latency in seconds")
+    parser.add_argument("--warm-rounds", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    with StubServers(1, args.latency, ChatCompletionStubHandler) as stub:
+        base_url = stub.base_urls[0]
+        workdir = tempfile.mkdtemp()
+        os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/llm_benchmark.db"
+        os.environ["LLM_CACHE_PATH"] = f"{workdir}/llm_cache.db"
+        os.environ["OLLAMA_API_URL"] = base_url + "/v1/chat/completions"
+        os.environ.setdefault("OLLAMA_API_KEY", "benchmark")
+
+        # Imported after the environment is set so the app points at the stub and throwaway files
+        from fastapi.testclient import TestClient
+        from app.api.analytics import ollama_service
+        from app.database import Base, SessionLocal, engine
+        from app.main import app
+        from app.models.competitor import Competitor
+        from app.models.product import Product
+        from app.services.price_store import insert_price_rows
+
+        Base.metadata.create_all(bind=engine)
+        now = datetime.utcnow()
+        db = SessionLocal()
+        db.add_all(Competitor(id=i, name=f"Competitor {i}", website=f"https://c{i}.example") for i in range(1, 4))
+        db.add_all(Product(id=i, name=f"Product {i}", base_price=100.0 + i) for i in range(1, args.products + 1))
+        db.flush()
+        insert_price_rows(db, [
+            {
+                "product_id": product_id, "competitor_id": competitor_id, "price": 90.0 + product_id + competitor_id,
+                "currency": "USD", "availability": 1, "sale_price": None, "discount_percentage": None,
+                "promotion_active": 0, "timestamp": now,
+            }
+            for product_id in range(1, args.products + 1) for competitor_id in range(1, 4)
+        ])
+        db.commit()
+        db.close()
+
+        client = TestClient(app)
+        urls = [f"/api/analytics/recommendation/{i}" for i in range(1, args.products + 1)]
+        cold = [timed_get(client, url) for url in urls]
+        cold_calls = upstream_calls(base_url)
+        warm = [timed_get(client, url) for _ in range(args.warm_rounds) for url in urls]
+        warm_calls = upstream_calls(base_url) - cold_calls
+
+        print(f"stub model latency {args.latency:.2f}s, {args.products} products\n")
+        print(f"{'':<8}{'requests':>10}{'upstream':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for label, samples, calls in (("cold", cold, cold_calls), ("warm", warm, warm_calls)):
+            ordered = sorted(samples)
+            print(
+                f"{label:<8}{len(samples):>10}{calls:>10}"
+                f"{statistics.median(ordered) * 1000:>10.1f}{ordered[int(len(ordered) * 0.95)] * 1000:>10.1f}"
+            )
+
+        async def burst():
+            return await asyncio.gather(*[
+                ollama_service.generate_pricing_recommendation("Burst product", 10.0, [9.0, 11.0])
+                for _ in range(args.concurrency)
+            ])
+
+        before = upstream_calls(base_url)
+        start = time.perf_counter()
+        asyncio.run(burst())
+        elapsed = time.perf_counter() - start
+        print(
+            f"\n{args.concurrency} identical concurrent prompts: {upstream_calls(base_url) - before} upstream call(s), "
+            f"{elapsed:.2f}s"
+        )
+        print(json.dumps(ollama_service.cache_stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+LLM Client Load Benchmark
+Drives OllamaService against local stub chat-completions servers at increasing
+concurrency and compares the pooled, bounded client with the old client-per-call code
+
+Also shows retries against a stub failing 30% of calls with 503, and the circuit
+breaker against an endpoint that refuses connections. The LLM cache is disabled
+so every prompt goes upstream.
+
+Usage (from backend/):
+    python -m benchmarks.llm_load_benchmark --requests 400 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import time
+
+import httpx
+
+os.environ["LLM_CACHE_PATH"] = ""
+os.environ.setdefault("OLLAMA_API_KEY", "benchmark")
+
+from app.services.ollama_service import OllamaService  # noqa: E402
+from benchmarks.stub_server import (  # noqa: E402
+    ChatCompletionStubHandler,
+    FlakyChatCompletionStubHandler,
+    StubServers,
+)
+
+CONCURRENCY_LEVELS = (1, 4, 16, 64)
+
+
+async def client_per_call(api_url: str, prompt: str):
+    """The previous OllamaService.generate_response transport: a fresh client, no limit, no retry"""
+    try:
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.post(api_url, json={"model": "stub", "messages": [{"role": "user", "content": prompt}]})
+            response.raise_for_status()
+            return response.json()["choices"][0]["message"]["content"]
+    except Exception:
+        return None
+
+
+async def run(call, requests: int, concurrency: int):
+    """Issue `requests` unique prompts with `concurrency` callers; returns (seconds, successes)"""
+    queue = iter(range(requests))
+    successes = 0
+
+    async def caller():
+        nonlocal successes
+        for number in queue:
+            if await call(f"prompt {number}") is not None:
+                successes += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[caller() for _ in range(concurrency)])
+    return time.perf_counter() - start, successes
+
+
+def service(api_url: str, **env) -> OllamaService:
+    for name, value in env.items():
+        os.environ[name] = str(value)
+    os.environ["OLLAMA_API_URL"] = api_url
+    return OllamaService()
+
+
+def closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def main_async(args):
+    with StubServers(1, args.latency, ChatCompletionStubHandler) as stub:
+        api_url = stub.base_urls[0] + "/v1/chat/completions"
+        print(f"{args.requests} unique prompts, stub latency {args.latency * 1000:.0f} ms\n")
+        print(f"{'callers':>8}{'client/call req/s':>20}{'pooled req/s':>16}{'pooled ok':>12}")
+        for concurrency in CONCURRENCY_LEVELS:
+            old_seconds, _ = await run(lambda prompt: client_per_call(api_url, prompt), args.requests, concurrency)
+            pooled = service(api_url, OLLAMA_MAX_CONCURRENCY=concurrency)
+            seconds, ok = await run(pooled.generate_response, args.requests, concurrency)
+            await pooled.aclose()
+            print(f"{concurrency:>8}{args.requests / old_seconds:>20.0f}{args.requests / seconds:>16.0f}{ok:>12}")
+
+        capped = service(api_url, OLLAMA_MAX_CONCURRENCY=8)
+        seconds, ok = await run(capped.generate_response, args.requests, 64)
+        await capped.aclose()
+        print(f"\n64 callers through an 8-connection cap: {args.requests / seconds:.0f} req/s, {ok} ok")
+
+    with StubServers(1, args.latency, FlakyChatCompletionStubHandler) as stub:
+        api_url = stub.base_urls[0] + "/v1/chat/completions"
+        for retries in (0, 2):
+            flaky = service(api_url, OLLAMA_MAX_CONCURRENCY=16, OLLAMA_MAX_RETRIES=retries, OLLAMA_BREAKER_FAILURES=10**9)
+            seconds, ok = await run(flaky.generate_response, args.requests, 16)
+            await flaky.aclose()
+            print(f"30% 503s, {retries} retries: {ok}/{args.requests} succeeded in {seconds:.2f}s ({flaky.retries} retries sent)")
+
+    down_url = f"http://127.0.0.1:{closed_port()}/v1/chat/completions"
+    for threshold in (10**9, 5):
+        down = service(down_url, OLLAMA_MAX_CONCURRENCY=16, OLLAMA_MAX_RETRIES=2, OLLAMA_BREAKER_FAILURES=threshold)
+        seconds, _ = await run(down.generate_response, 100, 4)
+        await down.aclose()
+        label = "breaker off" if threshold > 100 else f"breaker after {threshold}"
+        print(
+            f"upstream down, {label}: 100 calls fell back in {seconds:.2f}s "
+            f"({down.breaker.short_circuited} short-circuited)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    # Failed calls log a warning each; the summary lines are what matter here
+    logging.getLogger("app.ollama").setLevel(logging.ERROR)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
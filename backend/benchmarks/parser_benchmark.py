@@ -0,0 +1,47 @@
+"""
+HTML Parser Benchmark
+Pages/sec per parser backend over the saved HTML fixtures in benchmarks/fixtures/html
+
+Usage (from backend/):
+    python -m benchmarks.parser_benchmark --rounds 50
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from app.services.html_parser import available_backends
+from app.services.scraper import PRICE_FIELDS, PriceScraper
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures" / "html"
+
+
+def pages_per_sec(fn, corpus, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for content in corpus:
+            fn(content)
+    return rounds * len(corpus) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    corpus = [path.read_bytes() for path in sorted(FIXTURE_DIR.glob("*.html"))]
+    print(f"{len(corpus)} fixtures, {sum(map(len, corpus)) / 1024:.0f} KiB total\n")
+    print(f"{'backend':<12} {'all fields':>14} {'price only':>14} {'price, early exit':>19}")
+
+    for name in available_backends():
+        scraper = PriceScraper(parser=name)
+        price_plan = scraper.plan_for(fields=PRICE_FIELDS)
+        full = pages_per_sec(lambda c: scraper.extract_page(c, "http://fixture.test/"), corpus, args.rounds)
+        price = pages_per_sec(lambda c: price_plan.run(c), corpus, args.rounds)
+        early = pages_per_sec(lambda c: price_plan.run(c, early_exit=True), corpus, args.rounds)
+        early_note = f"{early:13.0f}/s" if scraper.backend.supports_streaming else f"{'n/a':>15}"
+        print(f"{name:<12} {full:12.0f}/s {price:12.0f}/s {early_note:>19}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Price Normalizer Benchmark
+Checks the price normalizer against the labelled strings in benchmarks/fixtures/prices.jsonl,
+then parses a large synthetic corpus of price texts in eight locales (singles, was/now pairs,
+ranges, multi-buys, labels around the amount) with the old first-number extractor, the
+normalizer one text at a time and the batch normalizer, reporting texts/sec and accuracy
+against the corpus' known values. Exits non-zero if any fixture is parsed wrongly
+
+Usage (from backend/):
+    python -m benchmarks.price_normalizer_benchmark --texts 200000
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+from app.services.price_normalizer import normalize_price, normalize_prices
+
+FIXTURES = Path(__file__).parent / "fixtures" / "prices.jsonl"
+LEGACY_SYMBOLS = {'$': 'USD', '€': 'EUR', '£': 'GBP', '¥': 'JPY', '₹': 'INR'}
+FIELDS = ("price", "sale_price", "currency", "price_max", "quantity")
+
+# locale: (currency, thousands separator, decimal separator, decimals, format, was/now template)
+LOCALES = {
+    "en-US": ("USD", ",", ".", 2, "${}", "Was {} Now {}"),
+    "en-GB": ("GBP", ",", ".", 2, "£{}", "RRP {} Now {}"),
+    "de-DE": ("EUR", ".", ",", 2, "{} €", "statt {} nur {}"),
+    "fr-FR": ("EUR", " ", ",", 2, "{} €", "avant {} maintenant {}"),
+    "de-CH": ("CHF", "'", ".", 2, "CHF {}", "statt {} jetzt {}"),
+    "pt-BR": ("BRL", ".", ",", 2, "R$ {}", "De {} por {}"),
+    "ja-JP": ("JPY", ",", None, 0, "¥{}", "通常 {} → {}"),
+    "hi-IN": ("INR", ",", ".", 0, "₹{}", "MRP {} Now {}"),
+}
+
+
+def legacy_price(text: str):
+    """What PriceScraper._extract_price returned before the normalizer: the first number, commas dropped"""
+    price_match = re.search(r'[\d,]+\.?\d*', text.replace(',', ''))
+    if price_match:
+        try:
+            return float(price_match.group().replace(',', ''))
+        except ValueError:
+            return None
+    return None
+
+
+def legacy_currency(text: str):
+    for symbol, code in LEGACY_SYMBOLS.items():
+        if symbol in text:
+            return code
+    return None
+
+
+def written(value: float, locale: str) -> str:
+    currency, thousands, decimal, decimals, pattern, _ = LOCALES[locale]
+    units, cents = f"{value:.{decimals}f}".partition(".")[::2]
+    if locale == "hi-IN" and len(units) > 3:
+        head, tail = units[:-3], units[-3:]
+        groups = [head[max(i - 2, 0):i] for i in range(len(head), 0, -2)][::-1]
+        units = ",".join(groups + [tail])
+    else:
+        units = f"{int(units):,}".replace(",", thousands)
+    return pattern.format(units + (decimal + cents if decimals else ""))
+
+
+def synthetic_corpus(count: int, seed: int = 25):
+    """(text, locale, expected) triples; amounts come from a pool, as real catalogs repeat prices"""
+    rng = random.Random(seed)
+    pool = [round(math.exp(rng.uniform(math.log(1), math.log(5000))), 0) - rng.choice((0.01, 0.05, 0.5, 0.0)) for _ in range(5000)]
+    corpus = []
+    for _ in range(count):
+        locale = rng.choice(list(LOCALES))
+        currency, _, _, decimals, _, pair_template = LOCALES[locale]
+        value = round(rng.choice(pool), decimals)
+        expected = dict(price=value, sale_price=None, currency=currency, price_max=None, quantity=1)
+        shape = rng.random()
+        if shape < 0.15:
+            sale = round(value * rng.choice((0.5, 0.7, 0.8, 0.9)), decimals)
+            if sale < value:
+                text = pair_template.format(written(value, locale), written(sale, locale))
+                expected["sale_price"] = sale
+            else:
+                text = written(value, locale)
+        elif shape < 0.25:
+            high = round(value * rng.choice((1.5, 2, 3)), decimals)
+            text = f"{written(value, locale)} - {written(high, locale)}"
+            expected["price_max"] = high
+        elif shape < 0.30:
+            quantity = rng.choice((2, 3, 4))
+            unit = round(rng.choice((1, 2, 5, 10, 20)) * (10 ** (2 - decimals)), 0)
+            text = f"{quantity} for {written(unit, locale)}"
+            expected.update(price=round(unit / quantity, 2), quantity=quantity)
+        elif shape < 0.40:
+            text = rng.choice(("Price: {}", "{} inkl. MwSt.", "Only {}", "{} each", "from {}")).format(written(value, locale))
+        else:
+            text = written(value, locale)
+        corpus.append((text, locale, expected))
+    return corpus
+
+
+def agrees(got: dict, expected: dict, fields=FIELDS) -> bool:
+    for field in fields:
+        a, b = got.get(field), expected[field]
+        if isinstance(b, float) and isinstance(a, float):
+            if abs(a - b) > 0.005:
+                return False
+        elif a != b:
+            return False
+    return True
+
+
+def column_value(array, row):
+    value = array[row].item()
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=200000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    fixtures = [json.loads(line) for line in FIXTURES.read_text(encoding="utf-8").splitlines() if line.strip()]
+    wrong = 0
+    for fixture in fixtures:
+        got = normalize_price(fixture["text"], fixture.get("currency"), fixture.get("locale"))._asdict()
+        if got != fixture["expected"]:
+            wrong += 1
+            print(f"WRONG  {fixture['text']!r}: got {got}, expected {fixture['expected']}")
+    legacy_right = sum(
+        legacy_price(fixture["text"]) == fixture["expected"]["price"] for fixture in fixtures if fixture["text"]
+    )
+    print(f"{len(fixtures)} fixtures: {len(fixtures) - wrong} parsed exactly right by the normalizer, "
+          f"{legacy_right} with the right price by the old extractor\n")
+
+    corpus = synthetic_corpus(args.texts)
+    texts = [text for text, _, _ in corpus]
+    print(f"{len(texts)} synthetic texts, {len(set(texts))} distinct, {len(LOCALES)} locales\n")
+
+    legacy, legacy_seconds = timed(lambda: [
+        dict(price=legacy_price(text), currency=legacy_currency(text)) for text in texts
+    ])
+    single, single_seconds = timed(lambda: [normalize_price(text)._asdict() for text in texts])
+
+    batches, batch_seconds = timed(lambda: [
+        normalize_prices(texts[offset:offset + args.batch_size])
+        for offset in range(0, len(texts), args.batch_size)
+    ])
+    batch = [
+        dict(
+            price=column_value(columns.price, row),
+            sale_price=column_value(columns.sale_price, row),
+            currency=columns.currency[row],
+            price_max=column_value(columns.price_max, row),
+            quantity=column_value(columns.quantity, row),
+        )
+        for columns in batches
+        for row in range(len(columns.currency))
+    ]
+    assert all(agrees(b, s) for b, s in zip(batch, single)), "batch and single-text results disagree"
+
+    expected = [expected for _, _, expected in corpus]
+    print(f"{'':<30}{'seconds':>9}{'texts/s':>11}{'price':>8}{'currency':>10}{'all fields':>12}")
+    for label, results, seconds in (
+        ("old first-number extractor", legacy, legacy_seconds),
+        ("normalizer, one at a time", single, single_seconds),
+        (f"normalizer, batches of {args.batch_size}", batch, batch_seconds),
+    ):
+        price = sum(agrees(r, e, ("price",)) for r, e in zip(results, expected)) / len(texts)
+        currency = sum(agrees(r, e, ("currency",)) for r, e in zip(results, expected)) / len(texts)
+        every = sum(agrees(r, e) for r, e in zip(results, expected)) / len(texts)
+        print(f"{label:<30}{seconds:>9.2f}{len(texts) / seconds:>11.0f}{price:>8.1%}{currency:>10.1%}{every:>12.1%}")
+
+    by_locale = {}
+    for (_, locale, want), got in zip(corpus, single):
+        hits = by_locale.setdefault(locale, [0, 0])
+        hits[0] += agrees(got, want)
+        hits[1] += 1
+    print("\nall fields right, by locale: " + ", ".join(
+        f"{locale} {right / total:.1%}" for locale, (right, total) in by_locale.items()
+    ))
+    return 1 if wrong else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
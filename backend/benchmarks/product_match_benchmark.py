@@ -0,0 +1,173 @@
+"""
+Product Match Benchmark
+Builds the matcher over synthetic catalogs of increasing size and matches noisy listing
+titles generated from known products (reordered words, marketing fluff, "128 GB" vs
+"128GB", case changes, typos, dropped words, sometimes the SKU or GTIN). Reports
+recall@1 / recall@5, candidates scored per listing, single-listing latency and batch
+throughput, plus an exhaustive scan of every product on a sample for comparison.
+Products come in families of siblings (same model, different capacity and color), so
+a near miss is a real mistake
+
+Usage (from backend/):
+    python -m benchmarks.product_match_benchmark --catalog 10000,100000,1000000
+"""
+
+import argparse
+import random
+import string
+import time
+
+from app.services.product_matcher import MIN_SCORE, ProductMatcher, is_gtin
+
+TYPES = {
+    "wireless headphones": ["black", "white", "silver", "midnight blue"],
+    "smartphone": ["black", "white", "green", "lavender"],
+    "tablet": ["graphite", "silver", "rose gold"],
+    "smart watch": ["black", "silver", "pink"],
+    "bluetooth speaker": ["black", "blue", "red", "teal"],
+    "robot vacuum": ["white", "black"],
+    "espresso machine": ["black", "stainless steel", "red"],
+    "cordless drill": ["yellow", "blue", "green"],
+    "gaming mouse": ["black", "white"],
+    "mechanical keyboard": ["black", "white", "gray"],
+    "4k monitor": ["black"],
+    "power bank": ["black", "white", "blue"],
+    "air fryer": ["black", "white", "silver"],
+    "electric toothbrush": ["white", "black", "pink"],
+    "action camera": ["black"],
+}
+CAPACITIES = {
+    "smartphone": ["64GB", "128GB", "256GB", "512GB"],
+    "tablet": ["64GB", "128GB", "256GB"],
+    "power bank": ["10000mAh", "20000mAh", "26800mAh"],
+    "4k monitor": ["27in", "32in"],
+    "smart watch": ["40mm", "44mm"],
+    "air fryer": ["4L", "6L"],
+    "cordless drill": ["12V", "18V"],
+}
+LINES = ["Pro", "Max", "Ultra", "Lite", "Plus", "Air", "Neo", "Edge", "Prime", "Flex", "Sport", "Studio", "Go", "Elite"]
+FLUFF = [
+    "Free Shipping", "Brand New", "2024 Model", "Fast Delivery", "Official Store", "with Warranty", "Best Seller",
+    "Sealed", "Genuine", "Limited Offer", "UK Version", "Authentic", "Top Rated",
+]
+
+
+def brand_names(count: int, rng: random.Random):
+    syllables = ["ka", "ro", "zen", "vi", "lux", "tor", "mi", "sa", "no", "tek", "fi", "ra", "bo", "qu", "el", "dy"]
+    names = set()
+    while len(names) < count:
+        names.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).capitalize())
+    return sorted(names)
+
+
+def gtin13(rng: random.Random) -> str:
+    body = "".join(rng.choice(string.digits) for _ in range(12))
+    for check in string.digits:
+        if is_gtin(body + check):
+            return body + check
+
+
+def catalog(products: int, rng: random.Random):
+    """(id, name, brand, sku) rows in families of sibling variants"""
+    brands = brand_names(max(50, products // 200), rng)
+    rows = []
+    while len(rows) < products:
+        brand, kind = rng.choice(brands), rng.choice(list(TYPES))
+        model = f"{rng.choice(string.ascii_uppercase)}{rng.choice(string.ascii_uppercase)}{rng.randint(1, 999)}"
+        line = rng.choice(LINES)
+        variants = [(capacity, color) for capacity in CAPACITIES.get(kind, [""]) for color in TYPES[kind]]
+        for capacity, color in rng.sample(variants, min(len(variants), rng.randint(1, 6))):
+            if len(rows) == products:
+                break
+            product_id = len(rows) + 1
+            name = " ".join(filter(None, [brand, line, model, kind.title(), capacity, color.title()]))
+            sku = gtin13(rng) if rng.random() < 0.3 else f"{brand[:3].upper()}-{model}-{product_id:07d}"
+            rows.append((product_id, name, brand, sku))
+    return rows
+
+
+def typo(word: str, rng: random.Random) -> str:
+    if len(word) < 5:
+        return word
+    i = rng.randrange(len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def listing(row, rng: random.Random) -> str:
+    """A competitor's title for a catalog product"""
+    _, name, brand, sku = row
+    words = name.split()
+    if rng.random() < 0.3:  # brand moved to the end
+        words = words[1:] + [words[0]]
+    if rng.random() < 0.2 and len(words) > 4:  # a non-essential word dropped
+        del words[rng.choice([i for i, w in enumerate(words) if w in LINES] or [len(words) - 1])]
+    words = [w[:-2] + " " + w[-2:] if w.endswith(("GB", "mm")) and rng.random() < 0.5 else w for w in words]
+    if rng.random() < 0.2:
+        i = rng.randrange(len(words))
+        words[i] = typo(words[i], rng)
+    title = " ".join(words)
+    if rng.random() < 0.3:
+        title = title.upper() if rng.random() < 0.5 else title.lower()
+    if rng.random() < 0.6:
+        title += " - " + ", ".join(rng.sample(FLUFF, rng.randint(1, 2)))
+    if rng.random() < 0.1:
+        title += f" ({sku})"
+    return title
+
+
+def percentile(ordered, fraction: float) -> float:
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--catalog", default="10000,100000", help="comma-separated catalog sizes")
+    parser.add_argument("--listings", type=int, default=2000)
+    parser.add_argument("--exhaustive", type=int, default=100, help="listings also matched by a full scan")
+    args = parser.parse_args()
+
+    print(f"{'products':>9}{'build s':>9}{'recall@1':>10}{'recall@5':>10}{'cands':>7}"
+          f"{'p50 ms':>8}{'p95 ms':>8}{'batch/s':>9}{'scan r@1':>10}{'scan ms':>9}")
+    for size in (int(value) for value in args.catalog.split(",")):
+        rng = random.Random(24)
+        rows = catalog(size, rng)
+        start = time.perf_counter()
+        matcher = ProductMatcher(rows)
+        build = time.perf_counter() - start
+
+        sample = rng.sample(rows, min(args.listings, len(rows)))
+        titles = [listing(row, rng) for row in sample]
+        truth = [row[0] for row in sample]
+
+        latencies, hits1, hits5 = [], 0, 0
+        for title, expected in zip(titles, truth):
+            start = time.perf_counter()
+            found = [candidate.product_id for candidate in matcher.match(title, 5)]
+            latencies.append(time.perf_counter() - start)
+            hits1 += bool(found) and found[0] == expected
+            hits5 += expected in found
+        candidates = matcher.stats()["candidates_per_listing"]
+
+        start = time.perf_counter()
+        matcher.match_many(titles, 5)
+        batch = len(titles) / (time.perf_counter() - start)
+
+        scan_hits, scan_time = 0, 0.0
+        for title, expected in list(zip(titles, truth))[:args.exhaustive]:
+            start = time.perf_counter()
+            found = matcher.match_exhaustive(title, 1, MIN_SCORE)
+            scan_time += time.perf_counter() - start
+            scan_hits += bool(found) and found[0].product_id == expected
+        scanned = min(args.exhaustive, len(titles))
+
+        latencies.sort()
+        print(
+            f"{size:>9}{build:>9.1f}{hits1 / len(titles):>10.3f}{hits5 / len(titles):>10.3f}{candidates:>7.1f}"
+            f"{percentile(latencies, 0.5) * 1000:>8.2f}{percentile(latencies, 0.95) * 1000:>8.2f}{batch:>9.0f}"
+            f"{scan_hits / scanned:>10.3f}{scan_time / scanned * 1000:>9.1f}"
+        )
+    print(f"\nsample listing: {titles[0]!r}\n    catalog name: {sample[0][1]!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Product Search Benchmark
+Builds a synthetic catalog in a throwaway SQLite database (the FTS5 index is filled
+by the products triggers as rows are inserted) and times a mix of searches three
+ways: the old `name LIKE '%x%'` list filter, the full-text list filter
+(`/api/products/?search=`) and ranked search with highlights (`/api/products/search`)
+
+Usage (from backend/):
+    python -m benchmarks.product_search_benchmark --products 1000000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+BRANDS = [
+    "Samsung", "Sony", "Apple", "Logitech", "Anker", "Philips", "Bosch", "Dyson", "Lenovo", "Asus",
+    "Garmin", "Canon", "Nikon", "Braun", "Tefal", "Makita", "DeWalt", "Nintendo", "Razer", "Corsair",
+    "Kärcher", "Miele", "Siemens", "Panasonic", "Xiaomi", "Huawei", "Bose", "JBL", "Sennheiser", "Fitbit",
+] + [f"Brand{i:03d}" for i in range(370)]
+TYPES = [
+    "wireless headphones", "bluetooth speaker", "usb c cable", "fast charger", "power bank", "gaming mouse",
+    "mechanical keyboard", "4k monitor", "laptop stand", "smart watch", "fitness tracker", "action camera",
+    "mirrorless camera", "espresso machine", "electric kettle", "air fryer", "robot vacuum", "cordless drill",
+    "impact driver", "hair dryer", "electric toothbrush", "blender", "toaster", "coffee grinder",
+    "tablet", "smartphone", "router", "webcam", "microphone", "soundbar",
+] + [f"gadget{i:03d}" for i in range(170)]
+ADJECTIVES = ["pro", "mini", "max", "ultra", "lite", "plus", "compact", "portable", "premium", "classic"]
+COLORS = ["black", "white", "silver", "graphite", "blue", "red", "green", "rose gold"]
+WORDS = (
+    "durable lightweight battery hours warranty design quality sound noise cancelling premium materials "
+    "fast charging compatible with most devices includes case cable manual easy setup energy efficient "
+    "stainless steel ergonomic grip adjustable settings quiet motor travel friendly everyday use"
+).split()
+
+# (label, query); the LIKE baseline only searches names, as the old filter did
+QUERIES = [
+    ("brand", "samsung"),
+    ("brand + type", "sony wireless headphones"),
+    ("prefixes", "sams tab"),
+    ("prefix + color", "logi mouse black"),
+    ("sku prefix", "SKU-00123"),
+    ("rare word", "kärcher"),
+    ("description word", "ergonomic"),
+    ("no match", "zzzzqx"),
+]
+
+
+def seed(database_url: str, products: int) -> float:
+    os.environ["DATABASE_URL"] = database_url
+    # Imported after DATABASE_URL is set so the engine points at the throwaway database
+    import init_db  # noqa: F401  (registers every model)
+    from sqlalchemy import insert
+    from app.database import Base, engine
+    from app.models.product import Product
+
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(23)
+    start = time.perf_counter()
+    chunk = 50000
+    with engine.begin() as connection:
+        for offset in range(0, products, chunk):
+            rows = []
+            for i in range(offset, min(offset + chunk, products)):
+                brand, kind = rng.choice(BRANDS), rng.choice(TYPES)
+                name = f"{brand} {kind.title()} {rng.choice(ADJECTIVES).title()} {rng.randint(1, 99)} {rng.choice(COLORS).title()}"
+                rows.append({
+                    "name": name,
+                    "brand": brand,
+                    "category": kind.split()[-1],
+                    "sku": f"SKU-{i:07d}",
+                    "description": f"{name}. " + " ".join(rng.choices(WORDS, k=rng.randint(10, 30))),
+                    "base_price": round(rng.uniform(5, 900), 2),
+                })
+            connection.execute(insert(Product), rows)
+    return time.perf_counter() - start
+
+
+def timed(function, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return result, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    seconds = seed(f"sqlite:///{tempfile.mkdtemp()}/search_benchmark.db", args.products)
+    print(f"{args.products} products indexed in {seconds:.1f}s ({args.products / seconds:,.0f} rows/s)\n")
+
+    from app.database import SessionLocal, refresh_planner_stats
+    from app.models.product import Product
+    from app.services.product_search import search_filter, search_products
+
+    refresh_planner_stats()
+    db = SessionLocal()
+
+    def like_filter(query):
+        return db.query(Product).filter(Product.name.contains(query)).order_by(Product.id).limit(args.limit).all()
+
+    def fts_filter(query):
+        return db.query(Product).filter(search_filter(db, query)).order_by(Product.id).limit(args.limit).all()
+
+    print(f"{'':<18}{'hits':>6}{'LIKE p50':>10}{'LIKE max':>10}{'filter p50':>12}{'ranked p50':>12}{'ranked p95':>12}  top result")
+    for label, query in QUERIES:
+        like, like_samples = timed(lambda: like_filter(query), max(1, args.repeat // 10))
+        _, filter_samples = timed(lambda: fts_filter(query), args.repeat)
+        ranked, ranked_samples = timed(lambda: search_products(db, query, args.limit), args.repeat)
+        top = ranked[0]["name_highlight"] if ranked else "-"
+        print(
+            f"{label:<18}{len(ranked):>6}{like_samples[len(like_samples) // 2] * 1000:>8.1f}ms{like_samples[-1] * 1000:>8.1f}ms"
+            f"{filter_samples[len(filter_samples) // 2] * 1000:>10.1f}ms"
+            f"{ranked_samples[len(ranked_samples) // 2] * 1000:>10.1f}ms"
+            f"{ranked_samples[int(len(ranked_samples) * 0.95)] * 1000:>10.1f}ms  {top[:60]}"
+        )
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Query Plan Check
+Seeds a throwaway SQLite database, calls every API endpoint through a TestClient while
+recording the SQL each one runs, then runs EXPLAIN QUERY PLAN on every statement.
+Exits non-zero when a statement scans a whole table (with or without an index), or
+searches it by a range alone (e.g. every row since a date), when its endpoint isn't
+expected to read that table in full, so an index change that pushes an endpoint
+query back to a full scan fails in CI
+
+Usage (from backend/):
+    python -m benchmarks.query_plan_check
+    python -m benchmarks.query_plan_check --verbose    # print every plan
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+from collections import defaultdict
+
+# (label, method, path, tables the endpoint reads in full by design)
+ENDPOINTS = [
+    ("list products", "GET", "/api/products/?limit=50", {"products"}),
+    ("search filter", "GET", "/api/products/?search=product%207&limit=50", set()),
+    ("search products", "GET", "/api/products/search?q=product%207", set()),
+    # Building the match index reads the catalog once
+    ("match listings", "POST", "/api/products/match", {"products"}),
+    ("get product", "GET", "/api/products/7", set()),
+    ("update product", "PUT", "/api/products/7", set()),
+    ("list competitors", "GET", "/api/competitors/", {"competitors"}),
+    ("get competitor", "GET", "/api/competitors/2", set()),
+    ("create price", "POST", "/api/prices/", set()),
+    # Bulk ingest loads the known product and competitor ids once to validate rows
+    ("bulk prices", "POST", "/api/prices/bulk", {"products", "competitors"}),
+    ("price history", "GET", "/api/prices/product/7?days=30", set()),
+    ("price history page", "GET", "/api/prices/product/7?days=30&limit=20", set()),
+    ("pair price history", "GET", "/api/prices/product/7?days=30&competitor_id=2", set()),
+    ("daily history", "GET", "/api/prices/product/7?days=30&resolution=day", set()),
+    ("history ndjson", "GET", "/api/prices/product/7?days=30&format=ndjson", set()),
+    ("compare prices", "GET", "/api/prices/compare?product_id=7", set()),
+    ("price stats", "GET", "/api/prices/stats/7?days=30", set()),
+    ("daily price stats", "GET", "/api/prices/stats/7?days=30&resolution=day", set()),
+    ("recommendation", "GET", "/api/analytics/recommendation/7", set()),
+    # Whole-catalog analytics read every product's series (or rollups) in the window
+    ("insights", "GET", "/api/analytics/insights?days=30", {"price_history", "products", "latest_prices"}),
+    ("daily insights", "GET", "/api/analytics/insights?days=30&resolution=day", {"products", "latest_prices"}),
+    ("price index", "GET", "/api/analytics/price-index?days=30", {"price_history", "products"}),
+    ("competitor analysis", "GET", "/api/analytics/competitor-analysis/2", set()),
+    ("schedule", "POST", "/api/jobs/schedules", set()),
+    ("enqueue scrape", "POST", "/api/jobs/scrape", set()),
+    ("list jobs", "GET", "/api/jobs/", {"scrape_jobs"}),
+    ("queued jobs", "GET", "/api/jobs/?status=queued", set()),
+    ("get job", "GET", "/api/jobs/1", set()),
+    ("list schedules", "GET", "/api/jobs/schedules", {"scrape_schedules"}),
+    ("schedule metrics", "GET", "/api/jobs/schedules/metrics", {"scrape_schedules"}),
+    # Full exports read everything by definition; the filtered one must not
+    ("arrow export", "GET", "/api/exports/prices.arrow?dimensions=false", {"price_history"}),
+    ("product arrow export", "GET", "/api/exports/prices.arrow?product_id=7&dimensions=false", set()),
+]
+BODIES = {
+    "match listings": {"titles": ["Product 7", "Product 12 - free shipping"]},
+    "update product": {"name": "Product 7", "base_price": 99.0},
+    "create price": {"product_id": 7, "competitor_id": 2, "price": 101.5},
+    "schedule": {"product_id": 7, "competitor_id": 2, "url": "https://c2.example/p/7"},
+    "enqueue scrape": {"url": "https://c2.example/p/7", "product_id": 7, "competitor_id": 2},
+}
+BULK_BODY = '{"product_id": 7, "competitor_id": 3, "price": 98.0}\n{"product_id": 8, "competitor_id": 3, "price": 55.0}\n'
+
+# Scanning a table this small beats any index (e.g. the handful of competitors)
+SMALL_TABLE_ROWS = 100
+# A SCAN step reads every row of the table (or index); a SEARCH step with no
+# equality term (e.g. "(timestamp>?)") reads every row in a range
+SCAN_STEP = re.compile(r"^SCAN (\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX \w+)?$")
+SEARCH_STEP = re.compile(r"^SEARCH (\w+)(?: AS \w+)? USING .*\((.*)\)$")
+EQUALITY = re.compile(r"(?<![<>!])=")
+
+
+def whole_table_read(step):
+    """Table a plan step reads in full (or by a bare range), else None"""
+    scan = SCAN_STEP.match(step)
+    if scan:
+        return scan.group(1)
+    search = SEARCH_STEP.match(step)
+    if search and not EQUALITY.search(search.group(2)):
+        return search.group(1)
+    return None
+
+
+def record_statements(engines, statements):
+    from sqlalchemy import event
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        statements.append((statement, parameters))
+
+    for engine in set(engines):
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def explain(engine, statement, parameters):
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    return [row[-1] for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--competitors", type=int, default=5)
+    parser.add_argument("--points", type=int, default=30)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    os.environ.update({
+        "RESPONSE_CACHE_TTL": "0",
+        "LLM_CACHE_PATH": "",
+        "OLLAMA_API_KEY": os.environ.get("OLLAMA_API_KEY", "plan-check"),
+        # Nothing listens here: the recommendation falls back without waiting on a model
+        "OLLAMA_API_URL": "http://127.0.0.1:9/v1/chat/completions",
+    })
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/plan_check.db"
+    import init_db  # noqa: F401  (registers every model, so seeding creates every table)
+    from benchmarks.api_load_benchmark import seed
+    seed(os.environ["DATABASE_URL"], args.products, args.competitors, args.points)
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import inspect
+    from app.database import engine, read_engine
+    from app.main import app
+
+    statements = []
+    record_statements((engine, read_engine), statements)
+    by_endpoint = defaultdict(list)
+    with TestClient(app) as client:
+        for label, method, path, _ in ENDPOINTS:
+            del statements[:]
+            if label == "bulk prices":
+                response = client.post(path, content=BULK_BODY, headers={"Content-Type": "application/x-ndjson"})
+            else:
+                response = client.request(method, path, json=BODIES.get(label))
+            if response.status_code >= 400 and response.status_code != 501:
+                print(f"{label}: {method} {path} returned {response.status_code}: {response.text[:200]}")
+                return 1
+            seen = set()
+            for statement, parameters in statements:
+                if statement not in seen and not statement.lstrip().upper().startswith(("PRAGMA", "SAVEPOINT", "RELEASE")):
+                    seen.add(statement)
+                    by_endpoint[label].append((statement, parameters))
+
+    with engine.connect() as connection:
+        tables = set(inspect(connection).get_table_names())
+        small_tables = {
+            table for table in tables
+            if connection.exec_driver_sql(f"SELECT count(*) FROM {table}").scalar() < SMALL_TABLE_ROWS
+        }
+    failures = 0
+    total = 0
+    for label, method, path, full_reads in ENDPOINTS:
+        for statement, parameters in by_endpoint[label]:
+            total += 1
+            plan = explain(engine, statement, parameters)
+            # Steps over subqueries (e.g. "SCAN ranked") read rows the query already produced
+            scans = [
+                step for step in plan
+                if whole_table_read(step) in tables and whole_table_read(step) not in full_reads | small_tables
+            ]
+            if scans or args.verbose:
+                print(f"{'FULL SCAN' if scans else 'ok':<10}{label}: {method} {path}")
+                print("          " + " ".join(statement.split())[:300])
+                for step in plan:
+                    print(f"            {step}")
+            failures += bool(scans)
+
+    print(f"\n{total} statements from {len(ENDPOINTS)} endpoints, {failures} with unexpected full scans")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
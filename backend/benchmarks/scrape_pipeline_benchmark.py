@@ -0,0 +1,66 @@
+"""
+Scrape Pipeline Benchmark
+Compares the two-call scrape (scrape_price + get_product_info) with the single-fetch scrape_page
+
+Usage (from backend/):
+    python -m benchmarks.scrape_pipeline_benchmark --pages 200
+"""
+
+import argparse
+import time
+
+from bs4 import BeautifulSoup
+
+from app.services.scraper import IMAGE_SELECTORS, PRICE_SELECTORS, TITLE_SELECTORS, PriceScraper
+from benchmarks.stub_server import StubServers
+
+
+def legacy_two_parses(content: bytes) -> None:
+    """What the old scrape_price() + get_product_info() pair parsed per page"""
+    for selector_groups in ([PRICE_SELECTORS], [TITLE_SELECTORS, IMAGE_SELECTORS]):
+        soup = BeautifulSoup(content, 'html.parser')
+        for selectors in selector_groups:
+            for selector in selectors:
+                if soup.select_one(selector):
+                    break
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated server latency in seconds")
+    args = parser.parse_args()
+
+    scraper = PriceScraper()
+    with StubServers(1, args.latency) as stubs:
+        url = stubs.base_urls[0] + "/product/1"
+
+        start = time.perf_counter()
+        for _ in range(args.pages):
+            scraper.scrape_price(url)
+            scraper.get_product_info(url)
+        two_call = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.pages):
+            scraper.scrape_page(url)
+        single = time.perf_counter() - start
+
+        content = scraper.fetch(url).content
+        start = time.perf_counter()
+        for _ in range(args.pages):
+            legacy_two_parses(content)
+        two_parse = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(args.pages):
+            scraper.extract_page(content, url)
+        one_parse = time.perf_counter() - start
+
+    print(f"end-to-end  two calls: {two_call / args.pages * 1000:7.2f} ms/page (2 fetches, 2 parses)")
+    print(f"end-to-end scrape_page: {single / args.pages * 1000:7.2f} ms/page (1 fetch, 1 parse)")
+    print(f"parse CPU   two parses: {two_parse / args.pages * 1000:7.2f} ms/page")
+    print(f"parse CPU  extract_page: {one_parse / args.pages * 1000:7.2f} ms/page (all fields, {scraper.backend.name})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Sentiment Lexicon Benchmark
+Scores a synthetic review corpus with the old keyword-substring fallback, the lexicon
+scorer one text at a time, and the vectorized lexicon batch scorer, and reports
+reviews/sec plus label accuracy on the corpus' known labels
+
+Usage (from backend/):
+    python -m benchmarks.sentiment_lexicon_benchmark --reviews 50000
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.services.sentiment import label_for
+from app.services.sentiment_lexicon import lexicon_score, lexicon_scores
+
+# (text, label) clauses; review texts are built from these plus filler
+CLAUSES = [
+    ("great value for the price", "positive"), ("love the build quality", "positive"),
+    ("works perfectly", "positive"), ("really comfortable to wear", "positive"),
+    ("not bad at all", "positive"), ("would highly recommend it", "positive"),
+    ("terrible customer service", "negative"), ("stopped working after a week and I want a refund", "negative"),
+    ("not good", "negative"), ("the strap broke on day two", "negative"),
+    ("very disappointed with it", "negative"), ("don't like the smell", "negative"),
+]
+FILLER = [
+    "I ordered this for my kitchen", "arrived on tuesday", "the box had a badge on it",
+    "my partner uses it daily", "it comes in three colours", "the manual is twelve pages",
+    "we have had it for a month", "shipping took four days",
+]
+
+POSITIVE_WORDS = ["good", "great", "excellent", "love", "amazing", "perfect", "best"]
+NEGATIVE_WORDS = ["bad", "terrible", "awful", "hate", "worst", "poor", "disappointed"]
+
+
+def keyword_label(text: str) -> str:
+    """The substring-count fallback analyze_sentiment used before the lexicon scorer"""
+    text_lower = text.lower()
+    pos_count = sum(1 for word in POSITIVE_WORDS if word in text_lower)
+    neg_count = sum(1 for word in NEGATIVE_WORDS if word in text_lower)
+    if pos_count > neg_count:
+        return "positive"
+    if neg_count > pos_count:
+        return "negative"
+    return "neutral"
+
+
+def synthetic_corpus(count: int, seed: int = 11):
+    rng = random.Random(seed)
+    texts, labels = [], []
+    for _ in range(count):
+        clause, label = rng.choice(CLAUSES)
+        # Short one-liners up to long rambling reviews
+        filler = rng.sample(FILLER, rng.randint(0, len(FILLER))) * rng.choice((1, 1, 2, 5))
+        position = rng.randint(0, len(filler))
+        sentences = filler[:position] + [clause] + filler[position:]
+        texts.append(". ".join(sentences).capitalize() + rng.choice((".", "!", "")))
+        labels.append(label)
+    return texts, labels
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reviews", type=int, default=50000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    texts, labels = synthetic_corpus(args.reviews)
+    words = sum(len(text.split()) for text in texts)
+    print(f"{args.reviews} reviews, {words / args.reviews:.0f} words on average\n")
+
+    keyword, keyword_seconds = timed(lambda: [keyword_label(text) for text in texts])
+    single, single_seconds = timed(lambda: [lexicon_score(text).score for text in texts])
+    batched, batch_seconds = timed(lambda: np.concatenate([
+        lexicon_scores(texts[offset:offset + args.batch_size])[0]
+        for offset in range(0, len(texts), args.batch_size)
+    ]))
+    assert np.allclose(batched, single), "batch and single-text scores disagree"
+    lexicon_labels = [label_for(score) for score in batched.tolist()]
+
+    print(f"{'':<26}{'seconds':>9}{'reviews/s':>12}{'accuracy':>10}")
+    for label, predicted, seconds in (
+        ("keyword substrings", keyword, keyword_seconds),
+        ("lexicon, one at a time", lexicon_labels, single_seconds),
+        (f"lexicon, batches of {args.batch_size}", lexicon_labels, batch_seconds),
+    ):
+        accuracy = sum(p == t for p, t in zip(predicted, labels)) / len(labels)
+        print(f"{label:<26}{seconds:>9.2f}{len(texts) / seconds:>12.0f}{accuracy:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Sentiment Pipeline Benchmark
+Scores synthetic reviews in a throwaway SQLite database with the offline scorer,
+with batched LLM requests against a stub chat-completions server, and with one
+LLM request per review, and reports reviews/sec for each
+
+Usage (from backend/):
+    python -m benchmarks.sentiment_pipeline_benchmark --reviews 5000 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+
+from benchmarks.stub_server import SentimentStubHandler, StubServers
+
+PHRASES = [
+    "great value for the price", "stopped working after a week", "does what it says",
+    "terrible customer service", "love the build quality", "arrived late but works fine",
+    "the best one I have owned", "poor battery life", "not bad, not amazing", "would buy again",
+]
+
+
+def synthetic_reviews(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    for i in range(count):
+        # ~10% empty reviews and some repeated texts, as scraped reviews have
+        roll = rng.random()
+        if roll < 0.1:
+            content = None
+        elif roll < 0.2:
+            content = rng.choice(PHRASES)
+        else:
+            content = f"{rng.choice(PHRASES).capitalize()}. {rng.choice(PHRASES)} (order {i})"
+        yield {"product_id": 1, "source": "benchmark", "rating": rng.randint(1, 5), "content": content}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reviews", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub model latency in seconds")
+    parser.add_argument("--batch-size", type=int, default=25)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--single-limit", type=int, default=200, help="reviews scored one request each")
+    args = parser.parse_args()
+
+    with StubServers(1, args.latency, SentimentStubHandler) as stub:
+        workdir = tempfile.mkdtemp()
+        os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/sentiment_benchmark.db"
+        os.environ["LLM_CACHE_PATH"] = ""
+        os.environ["OLLAMA_API_URL"] = stub.base_urls[0] + "/v1/chat/completions"
+        os.environ["OLLAMA_MAX_CONCURRENCY"] = str(args.concurrency)
+        os.environ.setdefault("OLLAMA_API_KEY", "benchmark")
+
+        # Imported after the environment is set so the app points at the stub and throwaway files
+        from sqlalchemy import insert, update
+        from app.database import Base, SessionLocal, engine
+        from app.models.competitor import Competitor  # noqa: F401 (reviews.competitor_id)
+        from app.models.product import Product
+        from app.models.review import Review
+        from app.services import sentiment
+        from app.services.ollama_service import OllamaService
+
+        Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        db.add(Product(id=1, name="Benchmark product", base_price=10.0))
+        db.flush()
+        db.execute(insert(Review), list(synthetic_reviews(args.reviews)))
+        db.commit()
+
+        def reset():
+            db.execute(update(Review).values(sentiment=None, sentiment_score=None))
+            db.commit()
+
+        async def run(mode, batch_size, limit=None):
+            ollama = OllamaService() if mode == "llm" else None
+            try:
+                return await sentiment.score_reviews(
+                    db, ollama, mode=mode, batch_size=batch_size, concurrency=args.concurrency, limit=limit
+                )
+            finally:
+                if ollama is not None:
+                    await ollama.aclose()
+
+        runs = [
+            ("offline", "offline", args.batch_size, None),
+            (f"llm, {args.batch_size}/request", "llm", args.batch_size, None),
+            ("llm, 1/request", "llm", 1, args.single_limit),
+        ]
+        print(f"{args.reviews} reviews, stub latency {args.latency:.2f}s, concurrency {args.concurrency}\n")
+        print(f"{'':<20}{'reviews':>9}{'requests':>10}{'by llm':>9}{'offline':>9}{'seconds':>9}{'reviews/s':>11}")
+        for label, mode, batch_size, limit in runs:
+            reset()
+            result = asyncio.run(run(mode, batch_size, limit))
+            print(
+                f"{label:<20}{result['reviews']:>9}{result['llm_batches']:>10}{result['llm_scored']:>9}"
+                f"{result['offline_scored']:>9}{result['elapsed_seconds']:>9.2f}{result['reviews_per_second']:>11.1f}"
+            )
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+SQLite Profile Benchmark
+Mixed read/write load on a fresh SQLite file with SQLITE_PROFILE=off and =production.
+Writer threads record single prices the way POST /api/prices does (product lookup,
+then record_price through run_write); reader threads run per-product price stats
+and a competitor's latest prices the way the analytics endpoints do. Each profile
+runs in its own process because the engine is configured at import time
+
+Usage (from backend/):
+    python -m benchmarks.sqlite_profile_benchmark --writers 8 --readers 8 --duration 10
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+def percentile(ordered, fraction: float) -> float:
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else float("nan")
+
+
+def run_profile(args) -> dict:
+    # Imported here: the engine reads SQLITE_PROFILE / DATABASE_URL at import time
+    from sqlalchemy import func
+    from sqlalchemy.exc import OperationalError
+    from app.database import Base, ReadSessionLocal, SessionLocal, engine
+    from app.models.competitor import Competitor
+    from app.models.latest_price import LatestPrice
+    from app.models.price_history import PriceHistory
+    from app.models.product import Product
+    from app.services import write_queue
+    from app.services.price_store import insert_price_rows, record_price
+
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(3)
+    now = datetime.utcnow()
+    db = SessionLocal()
+    db.add_all(Competitor(id=i, name=f"Competitor {i}", website=f"https://c{i}.example") for i in range(1, args.competitors + 1))
+    db.add_all(Product(id=i, name=f"Product {i}", base_price=100.0) for i in range(1, args.products + 1))
+    db.flush()
+    insert_price_rows(db, [
+        {
+            "product_id": product_id, "competitor_id": competitor_id, "price": rng.uniform(50, 150),
+            "currency": "USD", "availability": 1, "sale_price": None, "discount_percentage": None,
+            "promotion_active": 0, "timestamp": now - timedelta(hours=point),
+        }
+        for point in range(args.points, 0, -1)
+        for product_id in range(1, args.products + 1) for competitor_id in range(1, args.competitors + 1)
+    ])
+    db.commit()
+    db.close()
+
+    deadline = time.perf_counter() + args.duration
+    latencies = {"write": [], "read": []}
+    errors = {"write": 0, "read": 0}
+    lock = threading.Lock()
+
+    def timed(kind, operation):
+        start = time.perf_counter()
+        try:
+            operation()
+        except OperationalError:  # "database is locked"
+            with lock:
+                errors[kind] += 1
+            return
+        with lock:
+            latencies[kind].append(time.perf_counter() - start)
+
+    def write_once(thread_rng):
+        product_id = thread_rng.randint(1, args.products)
+        competitor_id = thread_rng.randint(1, args.competitors)
+        session = SessionLocal()
+        try:
+            session.query(Product.id).filter(Product.id == product_id).first()
+            write_queue.run_write(session, lambda s: record_price(s, PriceHistory(
+                product_id=product_id, competitor_id=competitor_id, price=thread_rng.uniform(50, 150)
+            )).id)
+        finally:
+            session.close()
+
+    def read_once(thread_rng):
+        session = ReadSessionLocal()
+        try:
+            session.query(
+                func.avg(PriceHistory.price), func.min(PriceHistory.price), func.max(PriceHistory.price), func.count()
+            ).filter(PriceHistory.product_id == thread_rng.randint(1, args.products)).one()
+            session.query(LatestPrice.product_id, LatestPrice.price).filter(
+                LatestPrice.competitor_id == thread_rng.randint(1, args.competitors)
+            ).all()
+        finally:
+            session.close()
+
+    def loop(kind, operation, seed):
+        thread_rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            timed(kind, lambda: operation(thread_rng))
+
+    threads = [threading.Thread(target=loop, args=("write", write_once, i)) for i in range(args.writers)]
+    threads += [threading.Thread(target=loop, args=("read", read_once, 1000 + i)) for i in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    result = {"profile": os.environ.get("SQLITE_PROFILE", "production")}
+    for kind in ("write", "read"):
+        ordered = sorted(latencies[kind])
+        result[kind] = {
+            "ok": len(ordered),
+            "per_second": len(ordered) / args.duration,
+            "p50_ms": percentile(ordered, 0.5) * 1000,
+            "p99_ms": percentile(ordered, 0.99) * 1000,
+            "errors": errors[kind],
+        }
+    if write_queue.writer is not None:
+        result["writer"] = write_queue.writer.stats()
+        write_queue.writer.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--competitors", type=int, default=5)
+    parser.add_argument("--points", type=int, default=20, help="seeded prices per product and competitor")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_profile(args)))
+        return
+
+    print(f"{args.writers} writer + {args.readers} reader threads for {args.duration:.0f}s, "
+          f"{args.products * args.competitors * args.points} seeded prices\n")
+    print(f"{'profile':<12}{'writes/s':>10}{'w p50 ms':>10}{'w p99 ms':>10}{'w errors':>10}"
+          f"{'reads/s':>10}{'r p50 ms':>10}{'r p99 ms':>10}{'r errors':>10}")
+    for profile in ("off", "production"):
+        env = {
+            **os.environ,
+            "SQLITE_PROFILE": profile,
+            "DATABASE_URL": f"sqlite:///{tempfile.mkdtemp()}/profile_benchmark.db",
+            "RESPONSE_CACHE_TTL": "0",
+        }
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.sqlite_profile_benchmark", "--child", *sys.argv[1:]],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        write, read = result["write"], result["read"]
+        print(
+            f"{profile:<12}{write['per_second']:>10.0f}{write['p50_ms']:>10.1f}{write['p99_ms']:>10.1f}{write['errors']:>10}"
+            f"{read['per_second']:>10.0f}{read['p50_ms']:>10.1f}{read['p99_ms']:>10.1f}{read['errors']:>10}"
+        )
+        if "writer" in result:
+            print(f"{'':<12}group commit: {json.dumps(result['writer'])}")
+
+
+if __name__ == "__main__":
+    main()
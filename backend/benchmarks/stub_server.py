@@ -0,0 +1,165 @@
+"""
+Local Stub Servers
+Threaded HTTP servers that serve a fixed product page (or chat completion) after a simulated latency.
+They run in a child process so server threads don't compete with the client for the GIL.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+PRODUCT_PAGE = b"""<!DOCTYPE html>
+<html><head><title>Stub Product</title></head>
+<body>
+<h1 class="product-title">Stub Product 3000</h1>
+<img class="product-image" src="/img/product-3000.jpg">
+<div class="product-price" data-price="129.99">$129.99</div>
+</body></html>"""
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    body = PRODUCT_PAGE
+    etag = '"%s"' % hashlib.md5(PRODUCT_PAGE).hexdigest()
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ChatCompletionStubHandler(BaseHTTPRequestHandler):
+    """OpenAI-style chat completions endpoint answering with a fixed pricing JSON; GET returns the call count"""
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; Nagle + delayed ACK would add ~40 ms
+    disable_nagle_algorithm = True
+    latency = 0.0
+    calls = 0
+    calls_lock = threading.Lock()
+    answer = json.dumps({
+        "recommended_price": 99.99,
+        "strategy": "competitive",
+        "reasoning": "Stub answer",
+        "confidence": 0.8,
+    })
+
+    def _send_json(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    failure_rate = 0.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.calls_lock:
+            ChatCompletionStubHandler.calls += 1
+        time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._send_json({"choices": [{"message": {"role": "assistant", "content": self.answer}}]})
+
+    def do_GET(self):
+        self._send_json({"calls": ChatCompletionStubHandler.calls})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FlakyChatCompletionStubHandler(ChatCompletionStubHandler):
+    """Chat completions stub answering 30% of calls with 503"""
+    failure_rate = 0.3
+
+
+class SentimentStubHandler(ChatCompletionStubHandler):
+    """Chat completions stub answering sentiment prompts: one result per review id, or one for a single text"""
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        with self.calls_lock:
+            ChatCompletionStubHandler.calls += 1
+        time.sleep(self.latency)
+        prompt = request["messages"][-1]["content"]
+        if "Reviews: " in prompt:
+            items = json.loads(prompt.split("Reviews: ", 1)[1].rsplit("\n\nReturn only", 1)[0])
+            answer = {"results": [{"id": item["id"], **self._score(item["text"])} for item in items]}
+        else:
+            answer = self._score(prompt.split("Text: ", 1)[-1])
+        self._send_json({"choices": [{"message": {"role": "assistant", "content": json.dumps(answer)}}]})
+
+    @staticmethod
+    def _score(text):
+        score = round((len(text) % 21 - 10) / 10, 2)
+        label = "positive" if score > 0.05 else "negative" if score < -0.05 else "neutral"
+        return {"sentiment": label, "score": score, "confidence": 0.9}
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The stdlib default backlog of 5 drops SYNs under concurrent load
+    request_queue_size = 1024
+
+
+def _serve(count: int, handler_class, latency: float, conn):
+    handler = type("ConfiguredStubHandler", (handler_class,), {"latency": latency})
+    servers = [_StubHTTPServer(("127.0.0.1", 0), handler) for _ in range(count)]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    conn.send([s.server_address[1] for s in servers])
+    conn.recv()  # block until the parent asks us to stop
+
+
+class StubServers:
+    """Start `count` stub servers on free ports; each port acts as a distinct host"""
+
+    def __init__(self, count: int, latency: float, handler_class=StubHandler):
+        self.count = count
+        self.latency = latency
+        self.handler_class = handler_class
+        self.ports: List[int] = []
+        self._process = None
+        self._conn = None
+
+    @property
+    def base_urls(self) -> List[str]:
+        return [f"http://127.0.0.1:{port}" for port in self.ports]
+
+    def __enter__(self):
+        self._conn, child = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(self.count, self.handler_class, self.latency, child), daemon=True
+        )
+        self._process.start()
+        self.ports = self._conn.recv()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._conn.send("stop")
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.terminate()
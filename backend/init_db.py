@@ -1,18 +1,30 @@
 """
 Initialize Database
-Creates all tables
+Creates all tables and marks the database as up to date with the Alembic migrations
 """
 
+import os
+from alembic import command
+from alembic.config import Config
 from app.database import Base, engine
 from app.models.product import Product
 from app.models.competitor import Competitor
 from app.models.price_history import PriceHistory
 from app.models.review import Review
+from app.models.scrape_schedule import ScrapeSchedule
+from app.models.scrape_job import ScrapeJob
+from app.models.latest_price import LatestPrice
+from app.models.price_rollup import PriceRollup
 
 def init_db():
     """Create all database tables"""
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    # Tables match the models, so later schema changes only need `alembic upgrade head`
+    here = os.path.dirname(os.path.abspath(__file__))
+    config = Config(os.path.join(here, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(here, "migrations"))
+    command.stamp(config, "head")
     print("Database initialized successfully!")
     print("Database file: pricing_intelligence.db")
 
@@ -0,0 +1,166 @@
+"""
+Management Commands
+Maintenance tasks for existing databases
+
+Usage (from backend/):
+    python manage.py rebuild-latest-prices
+    python manage.py rebuild-rollups
+    python manage.py rebuild-search-index
+    python manage.py match-listings --input listings.jsonl --out matches.jsonl [--limit 5] [--min-score 0.3]
+    python manage.py export-prices --out exports/prices [--format arrow] [--full]
+    python manage.py score-sentiment [--mode llm|offline] [--batch-size 25] [--concurrency 4] [--limit N]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from app.database import Base, SessionLocal, engine
+# Import every model so foreign keys resolve
+from app.models import product, competitor, price_history, review, scrape_schedule, scrape_job, latest_price, price_rollup  # noqa: F401
+from app.services import price_export, price_store, product_matcher, product_search, rollups, sentiment
+
+
+def rebuild_latest_prices(args):
+    """Recompute latest_prices from price_history"""
+    Base.metadata.create_all(bind=engine, tables=[latest_price.LatestPrice.__table__])
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        count = price_store.rebuild_latest_prices(db)
+        db.commit()
+        print(f"Rebuilt {count} latest prices in {time.perf_counter() - start:.2f}s")
+    finally:
+        db.close()
+
+
+def rebuild_rollups(args):
+    """Recompute hourly and daily price_rollups from price_history"""
+    Base.metadata.create_all(bind=engine, tables=[price_rollup.PriceRollup.__table__])
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        count = rollups.rebuild_rollups(db)
+        db.commit()
+        print(f"Rebuilt {count} rollup buckets in {time.perf_counter() - start:.2f}s")
+    finally:
+        db.close()
+
+
+def rebuild_search_index(args):
+    """Re-index every product for full-text search (SQLite FTS5)"""
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        count = product_search.rebuild_search_index(db)
+        db.commit()
+        print(f"Re-indexed {count} products in {time.perf_counter() - start:.2f}s")
+    finally:
+        db.close()
+
+
+def match_listings(args):
+    """Match scraped listing titles (JSONL with a "title" field, or one title per line) to catalog products"""
+    with open(args.input, encoding="utf-8") as source:
+        listings = [
+            json.loads(line) if line.lstrip().startswith("{") else {"title": line.strip()}
+            for line in source if line.strip()
+        ]
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        matcher = product_matcher.matcher_cache.get(db)
+        built = time.perf_counter() - start
+        matched = 0
+        with open(args.out, "w", encoding="utf-8") as out:
+            for offset in range(0, len(listings), args.batch_size):
+                batch = listings[offset:offset + args.batch_size]
+                results = product_matcher.match_titles(db, [listing.get("title") for listing in batch], args.limit, args.min_score)
+                for listing, candidates in zip(batch, results):
+                    matched += bool(candidates)
+                    out.write(json.dumps({**listing, "candidates": candidates}) + "\n")
+        elapsed = time.perf_counter() - start - built
+        print(f"Indexed {len(matcher)} products in {built:.2f}s; matched {matched} of {len(listings)} listings "
+              f"in {elapsed:.2f}s ({len(listings) / max(elapsed, 1e-9):.0f} listings/s)")
+    finally:
+        db.close()
+
+
+def export_prices(args):
+    """Export price history as a date/category-partitioned Parquet or Arrow dataset"""
+    db = SessionLocal()
+    try:
+        result = price_export.export_dataset(
+            db,
+            args.out,
+            format=args.format,
+            incremental=not args.full,
+            dimensions=not args.no_dimensions,
+        )
+        print(f"Exported {result['rows']} rows after id {result['after_id']} "
+              f"to {result['directory']} in {result['elapsed_seconds']}s")
+    finally:
+        db.close()
+
+
+def score_sentiment(args):
+    """Fill in sentiment for reviews that have none, in LLM batches or offline"""
+    ollama = None
+    if args.mode == "llm":
+        from app.services.ollama_service import OllamaService
+        ollama = OllamaService()
+    db = SessionLocal()
+    try:
+        result = asyncio.run(sentiment.score_reviews(
+            db,
+            ollama,
+            mode=args.mode,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            limit=args.limit,
+        ))
+        print(f"Scored {result['reviews']} reviews ({result['llm_scored']} by the model, "
+              f"{result['offline_scored']} offline, {result['rating_only']} from rating) "
+              f"in {result['elapsed_seconds']}s, {result['reviews_per_second']} reviews/s")
+    finally:
+        db.close()
+
+
+COMMANDS = {
+    "rebuild-latest-prices": rebuild_latest_prices,
+    "rebuild-rollups": rebuild_rollups,
+    "rebuild-search-index": rebuild_search_index,
+    "match-listings": match_listings,
+    "export-prices": export_prices,
+    "score-sentiment": score_sentiment,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pricing Intelligence management commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, handler in COMMANDS.items():
+        subparsers.add_parser(name, help=handler.__doc__)
+    export = subparsers.choices["export-prices"]
+    export.add_argument("--out", default="exports/prices", help="dataset directory (holds the watermark)")
+    export.add_argument("--format", choices=price_export.FORMATS, default="parquet")
+    export.add_argument("--full", action="store_true", help="ignore the watermark and export everything")
+    export.add_argument("--no-dimensions", action="store_true", help="skip the product/competitor join")
+    match = subparsers.choices["match-listings"]
+    match.add_argument("--input", required=True, help="JSONL with a title field, or plain text, one listing per line")
+    match.add_argument("--out", required=True, help="JSONL: each input listing plus its candidates")
+    match.add_argument("--limit", type=int, default=5, help="candidates per listing")
+    match.add_argument("--min-score", type=float, default=product_matcher.MIN_SCORE)
+    match.add_argument("--batch-size", type=int, default=1000)
+    score = subparsers.choices["score-sentiment"]
+    score.add_argument("--mode", choices=sentiment.MODES, default=sentiment.DEFAULT_MODE)
+    score.add_argument("--batch-size", type=int, default=sentiment.DEFAULT_BATCH_SIZE, help="reviews per LLM request")
+    score.add_argument("--concurrency", type=int, default=sentiment.DEFAULT_CONCURRENCY, help="LLM requests in flight")
+    score.add_argument("--limit", type=int, help="score at most this many reviews")
+    args = parser.parse_args()
+    COMMANDS[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,7 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from app.database import Base
-from app.models import product, competitor, price_history, review
+from app.models import product, competitor, price_history, review, scrape_schedule, scrape_job, latest_price, price_rollup
 
 # this is the Alembic Config object
 config = context.config
@@ -25,6 +25,16 @@ config.set_main_option("sqlalchemy.url", database_url)
 # add your model's MetaData object here for 'autogenerate' support
 target_metadata = Base.metadata
 
+def include_name(name, type_, parent_names) -> bool:
+    """Leave the full-text search objects (raw DDL, see app/models/product.py) out of autogenerate"""
+    if type_ == "table":
+        return not name.startswith(product.SEARCH_TABLE)
+    if type_ == "column":
+        return not (parent_names.get("table_name") == "products" and name == product.SEARCH_VECTOR_COLUMN)
+    if type_ == "index":
+        return name != product.SEARCH_INDEX
+    return True
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     url = config.get_main_option("sqlalchemy.url")
@@ -33,6 +43,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -48,7 +59,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_name=include_name
         )
 
         with context.begin_transaction():
@@ -0,0 +1,48 @@
+"""price index strategy
+
+Replaces price_history's single-column indexes (id, product_id,
+competitor_id) and the (product, competitor, time) composite with covering
+(product, time, price) and (competitor, time) indexes plus a partial index
+on active promotions; latest_prices gets covering indexes by product and by
+competitor. New indexes are built before the old ones are dropped.
+
+Revision ID: bea566151915
+Revises: 7d3e1b52a9c4
+Create Date: 2026-10-17 03:23:27.169722
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bea566151915'
+down_revision = '7d3e1b52a9c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_price_history_product_time', 'price_history', ['product_id', 'timestamp', 'price'], unique=False)
+    op.create_index('idx_price_history_competitor_time', 'price_history', ['competitor_id', 'timestamp'], unique=False)
+    op.create_index('idx_price_history_active_promotions', 'price_history', ['competitor_id'], unique=False, sqlite_where=sa.text('promotion_active = 1'), postgresql_where=sa.text('promotion_active = 1'))
+    op.drop_index('idx_product_competitor_time', table_name='price_history')
+    op.drop_index('ix_price_history_competitor_id', table_name='price_history')
+    op.drop_index('ix_price_history_id', table_name='price_history')
+    op.drop_index('ix_price_history_product_id', table_name='price_history')
+    op.create_index('idx_latest_prices_product_price', 'latest_prices', ['product_id', 'competitor_id', 'price'], unique=False)
+    op.create_index('idx_latest_prices_competitor_price', 'latest_prices', ['competitor_id', 'product_id', 'price'], unique=False)
+    op.drop_index('idx_latest_prices_competitor', table_name='latest_prices')
+
+
+def downgrade() -> None:
+    op.create_index('idx_latest_prices_competitor', 'latest_prices', ['competitor_id'], unique=False)
+    op.drop_index('idx_latest_prices_competitor_price', table_name='latest_prices')
+    op.drop_index('idx_latest_prices_product_price', table_name='latest_prices')
+    op.create_index('ix_price_history_product_id', 'price_history', ['product_id'], unique=False)
+    op.create_index('ix_price_history_id', 'price_history', ['id'], unique=False)
+    op.create_index('ix_price_history_competitor_id', 'price_history', ['competitor_id'], unique=False)
+    op.create_index('idx_product_competitor_time', 'price_history', ['product_id', 'competitor_id', 'timestamp'], unique=False)
+    op.drop_index('idx_price_history_active_promotions', table_name='price_history')
+    op.drop_index('idx_price_history_competitor_time', table_name='price_history')
+    op.drop_index('idx_price_history_product_time', table_name='price_history')
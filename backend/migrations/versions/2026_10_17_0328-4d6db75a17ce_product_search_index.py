@@ -0,0 +1,95 @@
+"""product search index
+
+Full-text search over product name, brand, description and sku: an
+external-content FTS5 table kept in sync by triggers on SQLite, a generated
+tsvector column with a GIN index on PostgreSQL. The SQLite index is filled
+from the existing products.
+
+Revision ID: 4d6db75a17ce
+Revises: bea566151915
+Create Date: 2026-10-17 03:28:51.662043
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d6db75a17ce'
+down_revision = 'bea566151915'
+branch_labels = None
+depends_on = None
+
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE products_fts USING fts5(
+        name, brand, description, sku,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, brand, description, sku)
+        VALUES (new.id, new.name, new.brand, new.description, new.sku);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, brand, description, sku)
+        VALUES ('delete', old.id, old.name, old.brand, old.description, old.sku);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_update AFTER UPDATE OF name, brand, description, sku ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, brand, description, sku)
+        VALUES ('delete', old.id, old.name, old.brand, old.description, old.sku);
+        INSERT INTO products_fts(rowid, name, brand, description, sku)
+        VALUES (new.id, new.name, new.brand, new.description, new.sku);
+    END
+    """,
+    "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+]
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER products_fts_update",
+    "DROP TRIGGER products_fts_delete",
+    "DROP TRIGGER products_fts_insert",
+    "DROP TABLE products_fts",
+]
+
+POSTGRES_UPGRADE = [
+    """
+    ALTER TABLE products ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(sku, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(brand, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX idx_products_search ON products USING GIN (search_vector)",
+]
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX idx_products_search",
+    "ALTER TABLE products DROP COLUMN search_vector",
+]
+
+
+def _run(statements) -> None:
+    for statement in statements:
+        op.execute(sa.text(statement))
+
+
+def upgrade() -> None:
+    dialect = op.get_context().dialect.name
+    if dialect == "sqlite":
+        _run(SQLITE_UPGRADE)
+    elif dialect == "postgresql":
+        _run(POSTGRES_UPGRADE)
+
+
+def downgrade() -> None:
+    dialect = op.get_context().dialect.name
+    if dialect == "sqlite":
+        _run(SQLITE_DOWNGRADE)
+    elif dialect == "postgresql":
+        _run(POSTGRES_DOWNGRADE)